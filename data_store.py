@@ -0,0 +1,289 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# Directory of the scraped datasets
+DATA_DIR = os.path.join("util", "data")
+
+# Columnar format datasets are stored in, "parquet" or "feather"
+STORAGE_FORMAT = "parquet"
+FILE_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather"}
+
+# Dtype of every column produced by the scrapers, as (column name regex, kind) pairs:
+#   'string'  names and labels, missing values as None
+#   'int'     int64, float64 when the column has missing values
+#   'float'   float64
+#   'kda'     float64 KDA ratio, kept as text while it still holds 'Perfect'
+#             (resolved by helper.process_kda_perfect)
+# Columns no schema lists (e.g. champion score features) are stored as parsed numbers.
+LEADERBOARD_SCHEMA = [
+    (r'summoner', 'string'), (r'region', 'string'), (r'rank', 'int'), (r'tier', 'string'),
+    (r'lp', 'float'), (r'most_champion_\d+', 'string'), (r'level', 'int'),
+    (r'win', 'int'), (r'loss', 'int'), (r'winrate', 'float'),
+]
+
+META_SCHEMA = [
+    (r'rank', 'int'), (r'champion', 'string'), (r'tier', 'int'), (r'role', 'string'),
+    (r'win_rate', 'float'), (r'pick_rate', 'float'), (r'ban_rate', 'float'), (r'counter\d+', 'string'),
+]
+
+WEEKLY_META_SCHEMA = [
+    (r'rank', 'int'), (r'champion', 'string'), (r'games', 'int'), (r'KDA', 'float'), (r'WR', 'float'),
+    (r'pick', 'float'), (r'ban', 'float'), (r'cs', 'float'), (r'gold', 'int'),
+]
+
+PLAYER_SCHEMA = [
+    (r'player_id', 'string'), (r'region', 'string'),
+    # get_recent_stats
+    (r'total_games|wins|losses', 'int'),
+    (r'win_rate|avg_kills|avg_deaths|avg_assists|kill_participation', 'float'), (r'kda_ratio', 'kda'),
+    # get_recent_champions
+    (r'most_champ_\d+', 'string'), (r'WR_\d+', 'float'), (r'[WL]_\d+', 'int'), (r'KDA_\d+', 'kda'),
+    # get_preferred_role
+    (r'TOP|JUNGLE|MID|ADC|SUPPORT', 'float'), (r'most_role_\d+', 'string'), (r'most_role_\d+_value', 'float'),
+    # get_season_data
+    (r'season_champ_\d+', 'string'), (r'(cs|cpm|k|d|a|wr)_ssn_\d+', 'float'), (r'kda_ssn_\d+', 'kda'),
+    (r'games_ssn_\d+', 'int'),
+    # get_weekly_stats
+    (r'7d_champ_\d+', 'string'), (r'7d_(total|W|L)_\d+', 'int'), (r'7d_WR_\d+', 'float'),
+    # get_mastery_data
+    (r'mastery_champ_\d+', 'string'), (r'm_lv_\d+', 'int'),
+]
+
+MATCH_SCHEMA = [
+    (r'player_id', 'string'), (r'region', 'string'), (r'date', 'string'), (r'champion', 'string'),
+    (r'level', 'int'), (r'team', 'string'), (r'result', 'int'), (r'match_length_mins', 'float'),
+    (r'kill|death|assist', 'int'), (r'kda_ratio', 'kda'), (r'kill_participation|laning', 'float'),
+    (r'cs', 'int'), (r'cs_per_min', 'float'), (r'avg_tier', 'int'),
+    (r'(teammates|team_champ|oppmates|opp_champ)\d+', 'string'),
+]
+
+ERROR_SCHEMA = [(r'region|username|formatted_username|error', 'string')]
+
+# merge_stats joins matches and player stats on player_id, player columns that collide
+# with match columns get the suffix _profile
+MERGED_SCHEMA = MATCH_SCHEMA + PLAYER_SCHEMA + [(f'(?:{pattern})_profile', kind) for pattern, kind in PLAYER_SCHEMA]
+
+DATASETS = {
+    'leaderboard': {'file': 'leaderboard_data', 'schema': LEADERBOARD_SCHEMA},
+    'lb_filtered': {'file': 'lb_filtered', 'schema': LEADERBOARD_SCHEMA},
+    'meta_stats': {'file': 'meta_stats', 'schema': META_SCHEMA},
+    'weekly_meta_stats': {'file': 'weekly_meta_stats', 'schema': WEEKLY_META_SCHEMA},
+    'player_stats': {'file': 'player_stats', 'schema': PLAYER_SCHEMA},
+    'player_stats_errors': {'file': 'player_stats_errors', 'schema': ERROR_SCHEMA},
+    'recent_matches': {'file': 'recent_matches', 'schema': MATCH_SCHEMA},
+    'recent_matches_error': {'file': 'recent_matches_error', 'schema': ERROR_SCHEMA},
+    'player_stats_merged': {'file': 'player_stats_merged', 'schema': MERGED_SCHEMA},
+    'feature_eng_stats': {'file': 'feature_eng_stats', 'schema': MERGED_SCHEMA},
+}
+
+_kind_cache = {}
+
+
+def column_kind(name, column):
+    """Schema kind of a column in a dataset: 'string', 'int', 'float', 'kda' or 'number' (not listed)"""
+    key = (name, column)
+    if key not in _kind_cache:
+        kind = 'number'
+        for pattern, pattern_kind in DATASETS[name]['schema']:
+            if re.fullmatch(pattern, str(column)):
+                kind = pattern_kind
+                break
+        _kind_cache[key] = kind
+    return _kind_cache[key]
+
+
+def _as_text(values):
+    """Non-missing values as str, missing values as None"""
+    missing = values.isna().to_numpy()
+    text = values.astype(str).astype(object)
+    text[missing] = None
+    return text
+
+
+def _parse_numbers(values, name, col, keep_text=False):
+    """
+    Parse a column of numbers, also accepting thousands separators ("1,234").
+    Returns None when keep_text is set and some values are not numbers,
+    otherwise unparseable values become NaN and are reported.
+    """
+    numbers = pd.to_numeric(values, errors='coerce')
+    lost = numbers.isna() & values.notna()
+    if lost.any():
+        retry = pd.to_numeric(values[lost].astype(str).str.replace(',', '', regex=False), errors='coerce')
+        numbers = numbers.astype(np.float64)
+        numbers[lost] = retry
+        lost = numbers.isna() & values.notna()
+        if lost.any():
+            if keep_text:
+                return None
+            print(f"{name}.{col}: {int(lost.sum())} values are not numeric and were set to NaN")
+    return numbers
+
+
+def _as_int(numbers):
+    """int64 when there are no missing or fractional values, float64 otherwise"""
+    if pd.api.types.is_integer_dtype(numbers):
+        return numbers.astype(np.int64)
+    numbers = numbers.astype(np.float64)
+    values = numbers.to_numpy()
+    if not np.isnan(values).any() and (values == np.floor(values)).all():
+        return numbers.astype(np.int64)
+    return numbers
+
+
+def apply_schema(df, name):
+    """
+    Coerce df to the registered dtypes of a dataset.
+
+    string columns become str (missing as None), int/float columns are parsed once
+    (unparseable values become NaN and are reported), kda columns become float64
+    unless they still contain text such as 'Perfect'. Columns that are already of
+    the right dtype are left as they are, only columns that change are copied.
+    """
+    updates = {}
+    for col in df.columns:
+        values = df[col]
+        kind = column_kind(name, col)
+
+        if kind == 'string':
+            if values.dtype != object or pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                updates[col] = _as_text(values)
+            continue
+
+        numbers = values
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            numbers = _parse_numbers(values, name, col, keep_text=(kind == 'kda'))
+            if numbers is None:
+                # KDA still holding 'Perfect', left for process_kda_perfect
+                updates[col] = _as_text(values)
+                continue
+
+        if kind == 'int':
+            numbers = _as_int(numbers)
+        elif kind in ('float', 'kda'):
+            numbers = numbers.astype(np.float64)
+
+        if numbers is not values and not (numbers.dtype == values.dtype and numbers.equals(values)):
+            updates[col] = numbers
+
+    if not updates:
+        return df
+    df = df.copy(deep=False)
+    for col, values in updates.items():
+        df[col] = values
+    return df
+
+
+def compact_dtypes(df, name):
+    """
+    Shrink numeric columns of a dataset: int columns to int32 when their values fit
+    (same values), float64 columns the schema does not list (the champion score block
+    of feature_eng_stats) to float32, the dtype create_champion_features emits them in.
+    """
+    updates = {}
+    int32 = np.iinfo(np.int32)
+    for col in df.columns:
+        values = df[col]
+        kind = column_kind(name, col)
+        if kind == 'int' and values.dtype == np.int64:
+            if len(values) == 0 or (values.min() >= int32.min and values.max() <= int32.max):
+                updates[col] = values.astype(np.int32)
+        elif kind == 'number' and values.dtype == np.float64:
+            updates[col] = values.astype(np.float32)
+
+    if not updates:
+        return df
+    df = df.copy(deep=False)
+    for col, values in updates.items():
+        df[col] = values
+    return df
+
+
+def dataset_path(name, filename=None, data_dir=None, storage_format=None):
+    """Path of the columnar file of a dataset (filename overrides the default file stem)"""
+    storage_format = storage_format or STORAGE_FORMAT
+    stem = filename if filename is not None else DATASETS[name]['file']
+    return os.path.join(data_dir if data_dir is not None else DATA_DIR, stem + FILE_EXTENSIONS[storage_format])
+
+
+def dataset_source(name, filename=None, data_dir=None, storage_format=None):
+    """
+    File load_dataset reads for a dataset: the columnar file, or the CSV export when
+    there is no columnar file or the CSV is newer (e.g. edited or committed by hand).
+    """
+    path = dataset_path(name, filename, data_dir, storage_format)
+    csv_path = os.path.splitext(path)[0] + ".csv"
+    if os.path.exists(path):
+        if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(path):
+            return csv_path
+        return path
+    if os.path.exists(csv_path):
+        return csv_path
+    raise FileNotFoundError(f"No stored data for {name} at {path} or {csv_path}")
+
+
+def read_dataset_file(path, name, columns=None, compact=False):
+    """Read a dataset file in any supported format, CSV is coerced to the dataset schema"""
+    extension = os.path.splitext(path)[1]
+    if extension == FILE_EXTENSIONS["parquet"]:
+        df = pd.read_parquet(path, columns=columns)
+    elif extension == FILE_EXTENSIONS["feather"]:
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = apply_schema(pd.read_csv(path, usecols=columns, low_memory=False), name)
+    return compact_dtypes(df, name) if compact else df
+
+
+def load_dataset(name, filename=None, columns=None, data_dir=None, storage_format=None, compact=False):
+    """
+    Load a dataset with its stored dtypes.
+
+    Reads the Parquet/Feather file (no type inference), falling back to the CSV export
+    coerced to the dataset schema. compact=True applies compact_dtypes while loading.
+    Raises FileNotFoundError when neither file exists.
+    """
+    path = dataset_source(name, filename, data_dir, storage_format)
+    return read_dataset_file(path, name, columns, compact)
+
+
+def save_dataset(df, name, filename=None, data_dir=None, storage_format=None, export_csv=True):
+    """
+    Save a dataset in the columnar format, coerced to its schema.
+
+    The file is written to a temporary path and moved into place, so readers never see
+    a partial file. export_csv=True also writes the CSV export next to it (the files
+    committed by the GitHub Action). Returns the path of the columnar file.
+    """
+    storage_format = storage_format or STORAGE_FORMAT
+    path = dataset_path(name, filename, data_dir, storage_format)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    typed = apply_schema(df, name)
+    # Sparse columns (e.g. sparse champion scores) are written dense
+    sparse_cols = [col for col in typed.columns if isinstance(typed[col].dtype, pd.SparseDtype)]
+    if sparse_cols:
+        typed = typed.copy(deep=False)
+        for col in sparse_cols:
+            typed[col] = typed[col].sparse.to_dense()
+
+    # CSV first, so the columnar file is never older than its export
+    if export_csv:
+        typed.to_csv(os.path.splitext(path)[0] + ".csv", index=False)
+
+    temp_path = path + ".tmp"
+    if storage_format == "feather":
+        typed.reset_index(drop=True).to_feather(temp_path)
+    else:
+        typed.to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+    return path
+
+
+def remove_dataset(name, filename=None, data_dir=None, storage_format=None):
+    """Delete the columnar file and CSV export of a dataset (e.g. a finished checkpoint)"""
+    path = dataset_path(name, filename, data_dir, storage_format)
+    for file in (path, os.path.splitext(path)[0] + ".csv"):
+        if os.path.exists(file):
+            os.remove(file)
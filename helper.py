@@ -1,8 +1,14 @@
 import pandas as pd
 from datetime import datetime
 import os
+import json
+import time
+import sqlite3
+import hashlib
 import numpy as np
+from functools import lru_cache
 from urllib.parse import quote, unquote
+from data_store import save_dataset, load_dataset, dataset_source, read_dataset_file, apply_schema
 
 class ChampionConverter:
     def __init__(self):
@@ -31,7 +37,414 @@ class ChampionConverter:
 
     def num_to_champion(self, number):
         return self.number_to_champion.get(number, None)
-    
+
+
+# Shared, immutable champion vocabulary: champion number = position + 1
+CHAMPION_VOCABULARY = pd.Index(ChampionConverter().champions, name='champion')
+
+
+def encode_champion_columns(df, columns):
+    """
+    Map champion names to champion numbers with one factorize pass per column;
+    only the distinct names of a column are looked up in CHAMPION_VOCABULARY.
+
+    Missing values stay NaN. Names outside the vocabulary also become NaN, but are
+    counted instead of being dropped silently.
+
+    Returns:
+    (encoded, unknown): dict of column -> Series (int64, float64 when NaN is present)
+    and a Series counting the unknown names
+    """
+    encoded = {}
+    unknown_counts = {}
+    for col in columns:
+        codes, uniques = pd.factorize(df[col])
+        if len(uniques) == 0:
+            # Nothing but missing values, left as they are
+            encoded[col] = df[col].copy()
+            continue
+        # Code -1 (missing) picks the trailing 0
+        numbers_of_uniques = np.append(CHAMPION_VOCABULARY.get_indexer(uniques) + 1, 0)
+
+        numbers = numbers_of_uniques[codes]
+        if (numbers == 0).any():
+            numbers = np.where(numbers == 0, np.nan, numbers)
+        encoded[col] = pd.Series(numbers, index=df.index, name=col)
+
+        unknown_uniques = np.flatnonzero(numbers_of_uniques[:-1] == 0)
+        if len(unknown_uniques):
+            occurrences = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            for unique_idx in unknown_uniques:
+                name = uniques[unique_idx]
+                unknown_counts[name] = unknown_counts.get(name, 0) + int(occurrences[unique_idx])
+
+    unknown_counts = pd.Series(unknown_counts, dtype=np.int64).sort_values(ascending=False)
+    return encoded, unknown_counts
+
+
+class MetaScoreTable:
+    """
+    Weekly meta score per champion, computed once from weekly_meta_stats.
+
+    weight = 1/rank*0.5 + games/100*0.3 + pick*0.1 - ban*0.1, taken from the first
+    row of each champion. Scores are stored in an array indexed by ChampionConverter
+    number (index 0 is unused and stays 0), champions missing from weekly_meta score 0.
+    """
+    _csv_cache = {}
+
+    def __init__(self, weekly_meta, converter=None):
+        self.converter = converter if converter is not None else ChampionConverter()
+        self.weekly_meta = weekly_meta
+        self.scores = np.zeros(len(self.converter.champions) + 1)
+
+        first_rows = weekly_meta.drop_duplicates(subset='champion', keep='first')
+        ids = first_rows['champion'].map(self.converter.champion_to_number).fillna(0).to_numpy(dtype=np.int64)
+        known = ids > 0
+
+        rank = pd.to_numeric(first_rows['rank'], errors='coerce').to_numpy(dtype=np.float64)
+        games = pd.to_numeric(first_rows['games'], errors='coerce').to_numpy(dtype=np.float64)
+        pick_rate = pd.to_numeric(first_rows['pick'], errors='coerce').to_numpy(dtype=np.float64)
+        ban_rate = pd.to_numeric(first_rows['ban'], errors='coerce').to_numpy(dtype=np.float64)
+
+        with np.errstate(divide='ignore'):
+            weight = (
+                1 / rank * 0.5 +
+                games / 100 * 0.3 +
+                pick_rate * 0.1 -
+                ban_rate * 0.1
+            )
+
+        self.scores[ids[known]] = weight[known]
+
+    @classmethod
+    def from_csv(cls, filepath=None):
+        """
+        Load the table from the stored weekly_meta_stats (Parquet, or a CSV/Feather filepath),
+        reusing it until the file changes
+        """
+        if filepath is None:
+            filepath = dataset_source('weekly_meta_stats')
+
+        key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+        if key not in cls._csv_cache:
+            cls._csv_cache[key] = cls(read_dataset_file(filepath, 'weekly_meta_stats'))
+        return cls._csv_cache[key]
+
+    @classmethod
+    def ensure(cls, weekly_meta):
+        """Return weekly_meta as a MetaScoreTable (None loads the default CSV)"""
+        if isinstance(weekly_meta, cls):
+            return weekly_meta
+        if weekly_meta is None:
+            return cls.from_csv()
+        return cls(weekly_meta)
+
+    def score(self, champion):
+        """Meta score of a single champion name"""
+        return self.scores[self.converter.champion_to_number.get(champion, 0)]
+
+    def scores_for(self, champions):
+        """Meta scores aligned with a list of champion names"""
+        ids = [self.converter.champion_to_number.get(champion, 0) for champion in champions]
+        return self.scores[ids]
+
+
+# Score multiplier for champions whose best meta tier is low
+TIER_PENALTIES = {3: 0.9, 4: 0.85, 5: 0.8}
+
+# Score penalty per opponent that counters the champion
+COUNTER_PENALTY = 0.1
+
+
+class DraftPenaltyTable:
+    """
+    Tier and counter penalties from a meta_stats snapshot, applied to whole batches of drafts.
+
+    tier_penalties: multiplier per champion number (1.0 when no penalty)
+    counters: (champion number x opponent id) boolean matrix, True where the opponent
+    counters the champion. Opponent ids are champion numbers, extended with counter
+    names outside the champion list. Id 0 means no/unknown champion everywhere.
+    """
+    _csv_cache = {}
+
+    def __init__(self, meta_stats, converter=None):
+        self.converter = converter if converter is not None else ChampionConverter()
+        self.meta_stats = meta_stats
+        champion_to_number = self.converter.champion_to_number
+        n_champions = len(self.converter.champions)
+
+        # Highest tier is the lowest tier number listed for the champion
+        self.tier_penalties = np.ones(n_champions + 1)
+        highest_tiers = meta_stats.dropna(subset=['tier']).groupby('champion')['tier'].min()
+        for champ, tier in highest_tiers.items():
+            if champ in champion_to_number and tier in TIER_PENALTIES:
+                self.tier_penalties[champion_to_number[champ]] = TIER_PENALTIES[tier]
+
+        self.opponent_to_number = dict(champion_to_number)
+        counter_pairs = []
+        counter_cols = meta_stats[['champion', 'counter1', 'counter2', 'counter3']]
+        for champ, counter1, counter2, counter3 in counter_cols.itertuples(index=False):
+            if pd.isna(counter1) or champ not in champion_to_number:
+                continue
+            for counter in (counter1, counter2, counter3):
+                if pd.notna(counter):
+                    self.opponent_to_number.setdefault(counter, len(self.opponent_to_number) + 1)
+                    counter_pairs.append((champion_to_number[champ], self.opponent_to_number[counter]))
+
+        self.counters = np.zeros((n_champions + 1, len(self.opponent_to_number) + 1), dtype=bool)
+        for champ_id, opp_id in counter_pairs:
+            self.counters[champ_id, opp_id] = True
+
+        # Penalty accumulated per countering opponent (0.1 + 0.1 + ...), up to a full team
+        steps = [0.0]
+        for _ in range(5):
+            steps.append(steps[-1] + COUNTER_PENALTY)
+        self.counter_penalty_steps = np.array(steps)
+
+    @classmethod
+    def from_csv(cls, filepath=None):
+        """
+        Load the table from the stored meta_stats (Parquet, or a CSV/Feather filepath),
+        reusing it until the file changes
+        """
+        if filepath is None:
+            filepath = dataset_source('meta_stats')
+
+        key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+        if key not in cls._csv_cache:
+            cls._csv_cache[key] = cls(read_dataset_file(filepath, 'meta_stats'))
+        return cls._csv_cache[key]
+
+    @classmethod
+    def ensure(cls, meta_stats):
+        """Return meta_stats as a DraftPenaltyTable (None loads the default CSV)"""
+        if isinstance(meta_stats, cls):
+            return meta_stats
+        if meta_stats is None:
+            return cls.from_csv()
+        return cls(meta_stats)
+
+    def countered_by(self, champion):
+        """Names of the opponents listed as counters of a champion"""
+        champ_id = self.converter.champion_to_number.get(champion, 0)
+        names = {opp_id: name for name, opp_id in self.opponent_to_number.items()}
+        return [names[opp_id] for opp_id in np.flatnonzero(self.counters[champ_id])]
+
+    def _encode(self, champs, mapping):
+        if isinstance(champs, pd.DataFrame):
+            ids = np.zeros(champs.shape, dtype=np.int64)
+            for col_idx, col in enumerate(champs.columns):
+                ids[:, col_idx] = champs[col].map(mapping).fillna(0).to_numpy(dtype=np.int64)
+            return ids
+        # Plain lists of drafts skip pandas overhead (interactive single drafts)
+        return np.array([[mapping.get(champ, 0) for champ in draft] for draft in champs], dtype=np.int64)
+
+    def encode_team(self, team_champs):
+        """Teammate names (drafts x slots) to champion numbers, 0 for missing/unknown"""
+        return self._encode(team_champs, self.converter.champion_to_number)
+
+    def encode_opponents(self, opp_champs):
+        """Opponent names (drafts x slots) to opponent ids, 0 for missing/unknown"""
+        return self._encode(opp_champs, self.opponent_to_number)
+
+    def apply(self, base_scores, team_ids=None, opp_ids=None, champion_ids=None, return_penalty=False):
+        """
+        Apply tier penalties and, when drafts are given, teammate/opponent zeroing and
+        counter penalties to a (drafts x champions) score matrix.
+
+        Parameters:
+        base_scores: array (drafts x champions) of pre-penalty scores
+        team_ids: array (drafts x 4) from encode_team, or None to skip team composition
+        opp_ids: array (drafts x 5) from encode_opponents, or None to skip team composition
+        champion_ids: champion number of each score column (defaults to 1..n_champions)
+        return_penalty: also return the counter penalty matrix
+
+        Returns:
+        array of penalized scores (not clipped at 0), plus the counter penalty if requested
+        """
+        base_scores = np.atleast_2d(base_scores)
+        if champion_ids is None:
+            champion_ids = np.arange(1, len(self.tier_penalties))
+        champion_ids = np.asarray(champion_ids)
+
+        scores = base_scores * self.tier_penalties[champion_ids]
+        counter_penalty = np.zeros_like(scores)
+
+        if team_ids is not None or opp_ids is not None:
+            n_drafts = len(scores)
+            team_ids = np.zeros((n_drafts, 0), dtype=np.int64) if team_ids is None else np.atleast_2d(team_ids)
+            opp_ids = np.zeros((n_drafts, 0), dtype=np.int64) if opp_ids is None else np.atleast_2d(opp_ids)
+
+            # Number of opponents in each draft that counter each champion column
+            counters = self.counters[champion_ids].T.astype(np.int8)
+            counter_count = counters[opp_ids].sum(axis=1)
+            counter_penalty = self.counter_penalty_steps[np.minimum(counter_count, 5)]
+            scores = np.where(counter_count > 0, scores * (1 - counter_penalty), scores)
+
+            # Champions already locked in by either team can not be picked
+            column_of = np.full(self.counters.shape[1], -1, dtype=np.int64)
+            column_of[champion_ids] = np.arange(len(champion_ids))
+            column_of[0] = -1
+            picked_cols = column_of[np.concatenate([team_ids, opp_ids], axis=1)]
+            draft_rows, slots = np.nonzero(picked_cols >= 0)
+            scores[draft_rows, picked_cols[draft_rows, slots]] = 0
+
+        if return_penalty:
+            return scores, counter_penalty
+        return scores
+
+
+# Default location of the incremental feature store
+FEATURE_STORE_FILE = os.path.join("cache", "feature_store.db")
+
+
+def snapshot_key(*parts):
+    """Hash describing what a stored feature vector was computed against"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update("\x1f".join(map(str, part.columns)).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        else:
+            digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """
+    SQLite store of computed feature vectors, keyed by a fingerprint of the input row.
+
+    Each namespace (e.g. champion_scores) keeps the snapshot key its vectors were
+    computed against (meta data, settings, input columns) and the output columns
+    with their dtypes. Lookups with a different snapshot miss, so every row is
+    recomputed after a meta change, and saving a new snapshot drops the old vectors.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path if db_path is not None else FEATURE_STORE_FILE
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        # Callers may open the store on one thread and use it from another (e.g. asyncio.to_thread),
+        # one call at a time
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS namespaces ("
+            "namespace TEXT PRIMARY KEY, snapshot TEXT, columns TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            "namespace TEXT, row_key INTEGER, vector BLOB, PRIMARY KEY (namespace, row_key))"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def row_keys(df):
+        """64-bit content hash of every row (index ignored)"""
+        return pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+
+    def columns(self, namespace, snapshot):
+        """Stored {column: dtype} of a namespace, None when empty or from another snapshot"""
+        row = self.conn.execute(
+            "SELECT snapshot, columns FROM namespaces WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        if row is None or row[0] != snapshot:
+            return None
+        return json.loads(row[1])
+
+    def lookup(self, namespace, row_keys, snapshot, batch_size=500):
+        """
+        Fetch stored vectors for row_keys.
+
+        Returns:
+        (found, values): boolean mask of rows found and a float64 array
+        (rows x stored columns), None when nothing is stored for this snapshot
+        """
+        row_keys = np.asarray(row_keys, dtype=np.int64)
+        found = np.zeros(len(row_keys), dtype=bool)
+        columns = self.columns(namespace, snapshot)
+        if columns is None or len(row_keys) == 0:
+            return found, None
+
+        vectors = {}
+        unique_keys = np.unique(row_keys).tolist()
+        for start in range(0, len(unique_keys), batch_size):
+            batch = unique_keys[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT row_key, vector FROM features WHERE namespace = ? AND row_key IN ({placeholders})",
+                [namespace] + batch
+            )
+            for row_key, vector in rows:
+                vectors[row_key] = np.frombuffer(vector, dtype=np.float64)
+
+        values = np.zeros((len(row_keys), len(columns)))
+        for idx, row_key in enumerate(row_keys.tolist()):
+            vector = vectors.get(row_key)
+            if vector is not None:
+                values[idx] = vector
+                found[idx] = True
+        return found, values
+
+    @staticmethod
+    def reconcile(stored, columns):
+        """
+        Column dtypes covering both the stored and the new vectors, None when they can not share
+        a namespace. Integer and float versions of a column (e.g. a feature that is an integer 0
+        for every row of a batch) widen to the float dtype; other dtype changes do not match.
+        """
+        if stored is None or list(stored) != list(columns):
+            return None
+        reconciled = {}
+        for col, dtype in columns.items():
+            if stored[col] == dtype:
+                reconciled[col] = dtype
+                continue
+            try:
+                old, new = np.dtype(stored[col]), np.dtype(dtype)
+            except TypeError:
+                return None
+            if old.kind == 'f' and new.kind in 'biu':
+                reconciled[col] = old.name
+            elif new.kind == 'f' and old.kind in 'biu':
+                reconciled[col] = new.name
+            else:
+                return None
+        return reconciled
+
+    def save(self, namespace, row_keys, snapshot, values, columns):
+        """
+        Store vectors (rows x columns) for row_keys. columns maps column name to dtype
+        string; a new snapshot or column set replaces everything stored in the namespace,
+        integer/float dtype changes widen the stored dtype (see reconcile).
+
+        Returns the {column: dtype} stored for the namespace
+        """
+        columns = {col: str(dtype) for col, dtype in columns.items()}
+        stored = self.columns(namespace, snapshot)
+        reconciled = self.reconcile(stored, columns)
+        if reconciled is None:
+            self.conn.execute("DELETE FROM features WHERE namespace = ?", (namespace,))
+        else:
+            columns = reconciled
+        if columns != stored:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO namespaces (namespace, snapshot, columns) VALUES (?, ?, ?)",
+                (namespace, snapshot, json.dumps(columns))
+            )
+
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO features (namespace, row_key, vector) VALUES (?, ?, ?)",
+            ((namespace, row_key, vector.tobytes()) for row_key, vector in zip(np.asarray(row_keys).tolist(), values))
+        )
+        self.conn.commit()
+        return columns
+
+    def close(self):
+        self.conn.close()
+
 def convert_date(date_str):
     """Convert datetime string to Unix timestamp"""
     try:
@@ -40,6 +453,63 @@ def convert_date(date_str):
         return pd.to_datetime(date_str).timestamp()
     except:
         return None
+
+
+# Format of OP.GG match dates, e.g. "Sat, Jan 4, 2025 12:20 AM"
+OPGG_DATE_FORMAT = '%a, %b %d, %Y %I:%M %p'
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_fallback(date_str):
+    """pandas' general parser for one string outside OPGG_DATE_FORMAT, NaT when it fails"""
+    try:
+        parsed = pd.to_datetime(date_str)
+        if parsed.tzinfo is not None:
+            parsed = parsed.tz_convert(None)
+        return parsed
+    except Exception:
+        return pd.NaT
+
+
+def parse_opgg_dates(dates):
+    """
+    Parse OP.GG date strings to datetime64.
+
+    Every distinct string is parsed once: with OPGG_DATE_FORMAT in one vectorized
+    pass, the rest with pandas' general parser (cached across calls). Strings
+    that can not be parsed become NaT and are reported.
+
+    Parameters:
+    dates: Series (or list) of date strings
+
+    Returns:
+    Series of datetime64[ns] with the same index
+    """
+    dates = dates if isinstance(dates, pd.Series) else pd.Series(dates)
+    codes, uniques = pd.factorize(dates)
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+
+    parsed = pd.to_datetime(uniques, format=OPGG_DATE_FORMAT, errors='coerce')
+    other_format = parsed.isna()
+    if other_format.any():
+        parsed[other_format] = [_parse_date_fallback(date_str) for date_str in uniques[other_format]]
+
+    failed = parsed.isna()
+    if failed.any():
+        occurrences = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        print(f"Warning: {occurrences[failed.to_numpy()].sum()} unparseable dates set to NaT, "
+              f"e.g. {uniques[failed].head(5).tolist()}")
+
+    # Code -1 (missing) picks the trailing NaT
+    values = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    return pd.Series(values[codes], index=dates.index, name=dates.name)
+
+
+def dates_to_timestamps(dates):
+    """datetime64 Series to Unix timestamps in seconds (same values as Timestamp.timestamp())"""
+    nanoseconds = dates.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    timestamps = np.round(nanoseconds / 1e9, 6)
+    return pd.Series(np.where(dates.isna(), np.nan, timestamps), index=dates.index, name=dates.name)
     
 
 def convert_to_minutes(time_str):
@@ -89,7 +559,7 @@ def convert_result_to_binary(result_str):
     """
     return 1 if result_str.lower().strip() == 'victory' else 0
 
-def merge_stats(recent_stats, player_stats, current_time =None):
+def merge_stats(recent_stats, player_stats, current_time =None, save=True):
     """
     Merge recent match stats with player profile stats and save to CSV.
     Only keeps rows where matches exist in both DataFrames.
@@ -97,6 +567,7 @@ def merge_stats(recent_stats, player_stats, current_time =None):
     Args:
         recent_stats (DataFrame/dict): Recent match statistics
         player_stats (DataFrame/tuple): Player profile statistics
+        save (bool): Write player_stats_merged, False when merging one player at a time
         
     Returns:
         DataFrame: Combined statistics
@@ -153,15 +624,10 @@ def merge_stats(recent_stats, player_stats, current_time =None):
             cols.insert(1, 'region')
         merged_df = merged_df[cols]
 
-        # Create directory if it doesn't exist
-        save_dir = "util/data"
-        os.makedirs(save_dir, exist_ok=True)
-
-        # Save to CSV
-        filename = f"player_stats_merged_{current_time}.csv"
-        filepath = os.path.join(save_dir, filename)
-        merged_df.to_csv(filepath, index=False)
-        print(f"\nSuccessfully saved merged stats to {filepath}")
+        if save:
+            # Save to Parquet plus the CSV export
+            filepath = save_dataset(merged_df, 'player_stats_merged', filename=f"player_stats_merged_{current_time}")
+            print(f"\nSuccessfully saved merged stats to {filepath}")
 
         return merged_df
 
@@ -212,10 +678,8 @@ def filter_leaderboard(df, tiers=None):
         # Reset index
         filtered_df = filtered_df.reset_index(drop=True)
         
-        # Save to CSV
-        output_file = os.path.join("util", "data", "lb_filtered.csv")
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        filtered_df.to_csv(output_file, index=False)
+        # Save to Parquet plus the CSV export
+        output_file = save_dataset(filtered_df, 'lb_filtered')
         
         print(f"\nFiltered leaderboard to {len(tiers)} tiers: {', '.join(tiers)}")
         print(f"Remaining entries: {len(filtered_df)}")
@@ -309,8 +773,7 @@ def get_player_list(leaderboard=None):
     try:
         
         if leaderboard is None:
-            leaderboard_file = os.path.join("util", "data", "lb_filtered.csv")
-            leaderboard = pd.read_csv(leaderboard_file)
+            leaderboard = load_dataset('lb_filtered')
             
         # Rename summoner column to username
         leaderboard = leaderboard.rename(columns={'summoner': 'username'})
@@ -325,77 +788,95 @@ def get_player_list(leaderboard=None):
         print(f"Error processing leaderboard: {e}")
         return None
 
+def _safe_kda_convert(x):
+    """KDA value to a number: 'Perfect' -> 6, unparseable -> None"""
+    if isinstance(x, (int, float)):
+        return x
+    if isinstance(x, str) and x.lower() == 'perfect':
+        return 6
+    try:
+        return float(x)
+    except:
+        return None
+
+
+def _perfect_mask(values):
+    """Rows whose value contains 'perfect' (any case), checked once per distinct value"""
+    if pd.api.types.is_numeric_dtype(values):
+        return np.zeros(len(values), dtype=bool)
+    codes, uniques = pd.factorize(values)
+    # Code -1 (missing) picks the trailing False
+    unique_mask = np.array([('perfect' in str(value).lower()) for value in uniques] + [False])
+    return unique_mask[codes]
+
+
+def _kda_column_sources(df):
+    """
+    KDA-like columns with the kills/assists columns that replace a 'Perfect' value,
+    (col, None, None) where 'Perfect' becomes 6
+    """
+    sources = []
+    for i in range(1, 8):
+        col = f'kda_ssn_{i}'
+        if col in df.columns:
+            kills_col, assists_col = f'k_ssn_{i}', f'a_ssn_{i}'
+            if kills_col in df.columns and assists_col in df.columns:
+                sources.append((col, kills_col, assists_col))
+            else:
+                sources.append((col, None, None))
+
+    # kda_ratio_profile always uses the average kills/assists
+    if 'kda_ratio_profile' in df.columns:
+        sources.append(('kda_ratio_profile', 'avg_kills', 'avg_assists'))
+
+    other_cols = [col for col in df.columns if 'kda_ratio' in col.lower() 
+                 and col != 'kda_ratio_profile' 
+                 and col not in [f'kda_ssn_{i}' for i in range(1, 8)]]
+    for col in other_cols:
+        prefix = col.split('kda_ratio')[0]
+        kills_col, assists_col = f"{prefix}kills", f"{prefix}assists"
+        if kills_col in df.columns and assists_col in df.columns:
+            sources.append((col, kills_col, assists_col))
+        else:
+            sources.append((col, None, None))
+    return sources
+
+
 def process_kda_perfect(df):
     """
     Process KDA values in the DataFrame, replacing 'Perfect' with appropriate values.
+
+    KDA_1..3: 'Perfect' -> 6, other values to numbers.
+    kda_ssn_*, kda_ratio_profile and other kda_ratio columns: 'Perfect' -> kills + assists
+    (6 when those columns are missing), then numeric.
+    String checks and conversions run once per distinct value, the rest is vectorized.
     """
     try:
         # Create a copy to avoid modifying the original dataframe
         df = df.copy()
-        
-        # Function to safely convert to numeric
-        def safe_convert(x):
-            if isinstance(x, (int, float)):
-                return x
-            if isinstance(x, str) and x.lower() == 'perfect':
-                return 6
-            try:
-                return float(x)
-            except:
-                return None
 
         # 1. Process KDA_1, KDA_2, KDA_3
         for col in ['KDA_1', 'KDA_2', 'KDA_3']:
-            if col in df.columns:
-                df[col] = df[col].apply(safe_convert)
-
-        # 2. Process kda_ssn_1 to kda_ssn_7
-        for i in range(1, 8):
-            col = f'kda_ssn_{i}'
-            if col in df.columns:
-                perfect_mask = df[col].astype(str).str.contains('perfect', case=False)
-                if perfect_mask.any():
-                    kills_col, assists_col = f'k_ssn_{i}', f'a_ssn_{i}'
-                    if kills_col in df.columns and assists_col in df.columns:
-                        df.loc[perfect_mask, col] = df.loc[perfect_mask].apply(
-                            lambda row: pd.to_numeric(row[kills_col], errors='coerce') + 
-                                      pd.to_numeric(row[assists_col], errors='coerce'), 
-                            axis=1
-                        )
-                    else:
-                        df.loc[perfect_mask, col] = 6
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # 3. Process kda_ratio_profile
-        if 'kda_ratio_profile' in df.columns:
-            perfect_mask = df['kda_ratio_profile'].astype(str).str.contains('perfect', case=False)
-            if perfect_mask.any():
-                df.loc[perfect_mask, 'kda_ratio_profile'] = df.loc[perfect_mask].apply(
-                    lambda row: pd.to_numeric(row['avg_kills'], errors='coerce') + 
-                              pd.to_numeric(row['avg_assists'], errors='coerce'),
-                    axis=1
-                )
-            df['kda_ratio_profile'] = pd.to_numeric(df['kda_ratio_profile'], errors='coerce')
-
-        # 4. Process remaining kda_ratio columns
-        other_cols = [col for col in df.columns if 'kda_ratio' in col.lower() 
-                     and col != 'kda_ratio_profile' 
-                     and col not in [f'kda_ssn_{i}' for i in range(1, 8)]]
-        
-        for col in other_cols:
-            perfect_mask = df[col].astype(str).str.contains('perfect', case=False)
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                codes, uniques = pd.factorize(df[col])
+                converted = np.array([_safe_kda_convert(value) for value in uniques] + [np.nan], dtype=object)
+                df[col] = pd.Series(converted[codes], index=df.index, name=col).infer_objects()
+
+        # 2. Process kda_ssn_1..7, kda_ratio_profile and the other kda_ratio columns
+        for col, kills_col, assists_col in _kda_column_sources(df):
+            values = df[col]
+            perfect_mask = _perfect_mask(values)
             if perfect_mask.any():
-                prefix = col.split('kda_ratio')[0]
-                kills_col, assists_col = f"{prefix}kills", f"{prefix}assists"
-                if kills_col in df.columns and assists_col in df.columns:
-                    df.loc[perfect_mask, col] = df.loc[perfect_mask].apply(
-                        lambda row: pd.to_numeric(row[kills_col], errors='coerce') + 
-                                  pd.to_numeric(row[assists_col], errors='coerce'),
-                        axis=1
+                if kills_col is not None:
+                    replacement = (
+                        pd.to_numeric(df.loc[perfect_mask, kills_col], errors='coerce') +
+                        pd.to_numeric(df.loc[perfect_mask, assists_col], errors='coerce')
                     )
                 else:
-                    df.loc[perfect_mask, col] = 6
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+                    replacement = 6
+                values = values.astype(object)
+                values[perfect_mask] = replacement
+            df[col] = pd.to_numeric(values, errors='coerce')
 
         return df
 
@@ -404,6 +885,17 @@ def process_kda_perfect(df):
         return df
 
 
+def coerce_scraped(df, name):
+    """
+    Type freshly scraped rows once: 'Perfect' KDA values are resolved with
+    process_kda_perfect, then every column gets the dtype registered for the
+    dataset in data_store, so later steps never re-parse strings.
+    """
+    if df is None or df.empty:
+        return df
+    return apply_schema(process_kda_perfect(df), name)
+
+
 def check_mixed_types(df):
     """
     Check and print dataframe column types, inconsistencies, and basic statistics
@@ -458,18 +950,15 @@ def check_nan_float(df, column_name):
     print(f"Number of float values: {float_mask.sum()}")
     print(f"Number of NaN values: {is_nan_mask.sum()}")
 
-def convert_team_colors(df):
-    """
-    Convert 'team' column values from 'blue'/'red' to 1/2
-    
-    Parameters:
-    df (pandas.DataFrame): Input DataFrame with 'team' column
-    
-    Returns:
-    pandas.DataFrame: DataFrame with converted team values
-    """
+def _apply_conversion(df, updates, drops):
+    """Copy of df with the converted columns replaced and the dropped columns removed"""
     df = df.copy()
-    
+    for col, values in updates.items():
+        df[col] = values
+    return df.drop(columns=drops)
+
+
+def _team_colors_plan(df):
     if 'team' not in df.columns:
         raise ValueError("Column 'team' not found in DataFrame")
     
@@ -480,26 +969,21 @@ def convert_team_colors(df):
     }
     
     # Convert team colors to numbers
-    df['team'] = df['team'].map(team_mapping, na_action='ignore')
-    
-    return df
+    return {'team': df['team'].map(team_mapping, na_action='ignore')}, []
 
-def convert_region(df):
+def convert_team_colors(df):
     """
-    Convert 'region' column values to numeric:
-    kr -> 1
-    euw -> 2
-    vn -> 3
-    na -> 4
+    Convert 'team' column values from 'blue'/'red' to 1/2
     
     Parameters:
-    df (pandas.DataFrame): Input DataFrame with 'region' column
+    df (pandas.DataFrame): Input DataFrame with 'team' column
     
     Returns:
-    pandas.DataFrame: DataFrame with converted region values
+    pandas.DataFrame: DataFrame with converted team values
     """
-    df = df.copy()
-    
+    return _apply_conversion(df, *_team_colors_plan(df))
+
+def _region_plan(df):
     if 'region' not in df.columns:
         raise ValueError("Column 'region' not found in DataFrame")
     
@@ -512,68 +996,74 @@ def convert_region(df):
     }
     
     # Convert regions to numbers, keeping NA as NA
-    df['region'] = df['region'].map(region_mapping, na_action='ignore')
-    
-    return df
+    return {'region': df['region'].map(region_mapping, na_action='ignore')}, []
 
-def convert_champion_columns(df):
+def convert_region(df):
     """
-    Convert all champion-related columns to numbers using ChampionConverter
+    Convert 'region' column values to numeric:
+    kr -> 1
+    euw -> 2
+    vn -> 3
+    na -> 4
     
     Parameters:
-    df (pandas.DataFrame): Input DataFrame
+    df (pandas.DataFrame): Input DataFrame with 'region' column
     
     Returns:
-    pandas.DataFrame: DataFrame with converted champion values
+    pandas.DataFrame: DataFrame with converted region values
     """
-    df = df.copy()
-    
-    # Initialize champion converter
-    converter = ChampionConverter()
-    
+    return _apply_conversion(df, *_region_plan(df))
+
+def _champion_columns_plan(df):
     # Get all champion-related columns
     champion_columns = [col for col in df.columns if 'champ' in col.lower()]
     
-    for col in champion_columns:       
-        # Convert champion names to numbers
-        df[col] = df[col].map(converter.champion_to_num, na_action='ignore')
+    # Convert champion names to numbers
+    encoded, unknown_counts = encode_champion_columns(df, champion_columns)
+    if len(unknown_counts):
+        print(f"Warning: {unknown_counts.sum()} unknown champion names set to NaN "
+              f"({len(unknown_counts)} distinct): {unknown_counts.head(10).to_dict()}")
     
-    return df
+    return encoded, []
 
-def convert_date_column(df):
+def convert_champion_columns(df):
     """
-    Convert date column from string format to Unix timestamp
-    Handles missing values (NaT, None, NaN)
+    Convert all champion-related columns to numbers using the shared champion vocabulary.
+    Unknown names become NaN and are reported.
     
     Parameters:
-    df (pandas.DataFrame): Input DataFrame with 'date' column
+    df (pandas.DataFrame): Input DataFrame
     
     Returns:
-    pandas.DataFrame: DataFrame with converted date values
+    pandas.DataFrame: DataFrame with converted champion values
     """
-    df = df.copy()
-    
+    return _apply_conversion(df, *_champion_columns_plan(df))
+
+def _date_column_plan(df):
     if 'date' not in df.columns:
         raise ValueError("Column 'date' not found in DataFrame")
     
-    # Convert dates to timestamps
-    df['date'] = df['date'].apply(convert_date)
-    
-    return df
+    # Convert dates to timestamps, parsing each distinct date string once
+    timestamps = dates_to_timestamps(parse_opgg_dates(df['date']))
+    if len(timestamps) and timestamps.isna().all():
+        # Same as convert_date returning None for every row
+        timestamps = pd.Series(None, index=df.index, name='date', dtype=object)
+    return {'date': timestamps}, []
 
-def convert_role_columns(df):
+def convert_date_column(df):
     """
-    Convert role columns to numbers:
-    TOP -> 1, MID -> 2, ADC -> 3, JUNGLE -> 4, SUPPORT -> 5
+    Convert date column from string format to Unix timestamp
+    Handles missing values (NaT, None, NaN)
     
     Parameters:
-    df (pandas.DataFrame): Input DataFrame
+    df (pandas.DataFrame): Input DataFrame with 'date' column
     
     Returns:
-    pandas.DataFrame: DataFrame with converted role values
+    pandas.DataFrame: DataFrame with converted date values
     """
-    df = df.copy()
-    
+    return _apply_conversion(df, *_date_column_plan(df))
+
+def _role_columns_plan(df):
     # Define role mapping
     role_mapping = {
         'TOP': 1,
@@ -586,29 +1076,31 @@ def convert_role_columns(df):
     # Role columns to convert
     role_columns = ['most_role_1', 'most_role_2']
     
-    
+    updates = {}
     for col in role_columns:
         if col in df.columns:       
             # Convert roles to numbers
-            df[col] = df[col].map(role_mapping, na_action='ignore')
+            updates[col] = df[col].map(role_mapping, na_action='ignore')
             
         else:
             print(f"Warning: Column {col} not found in DataFrame")
     
-    return df
+    return updates, []
 
-def convert_id_columns(df):
+def convert_role_columns(df):
     """
-    Drop ID-related columns (player_id, teammates1-4, oppmates1-5)
+    Convert role columns to numbers:
+    TOP -> 1, MID -> 2, ADC -> 3, JUNGLE -> 4, SUPPORT -> 5
     
     Parameters:
     df (pandas.DataFrame): Input DataFrame
     
     Returns:
-    pandas.DataFrame: DataFrame with ID columns dropped
+    pandas.DataFrame: DataFrame with converted role values
     """
-    df = df.copy()
-    
+    return _apply_conversion(df, *_role_columns_plan(df))
+
+def _id_columns_plan(df):
     # Specific ID columns to drop
     id_columns = (
         ['player_id', 'region_profile'] + 
@@ -623,21 +1115,21 @@ def convert_id_columns(df):
         missing = set(id_columns) - set(existing_columns)
         print(f"Note: Some columns were not found in DataFrame: {missing}")
     
-    # Drop the columns
-    df = df.drop(columns=existing_columns)
-    
-    return df
+    return {}, existing_columns
 
-def remove_match_stats(df):
+def convert_id_columns(df):
     """
-    Remove match-specific statistics to prevent future data leakage.
+    Drop ID-related columns (player_id, teammates1-4, oppmates1-5)
     
     Parameters:
     df (pandas.DataFrame): Input DataFrame
     
     Returns:
-    pandas.DataFrame: DataFrame with match-specific columns removed
+    pandas.DataFrame: DataFrame with ID columns dropped
     """
+    return _apply_conversion(df, *_id_columns_plan(df))
+
+def _match_stats_plan(df):
     # List of columns that contain match-specific information
     match_stat_columns = [
         'level',            # Champion level
@@ -653,14 +1145,32 @@ def remove_match_stats(df):
         'cs_per_min'       # CS per minute in the match
     ]
     
-    # Create a copy of the dataframe
-    df_clean = df.copy()
-    
     # Remove match-specific columns
-    columns_to_drop = [col for col in match_stat_columns if col in df_clean.columns]
-    df_clean = df_clean.drop(columns=columns_to_drop)
+    return {}, [col for col in match_stat_columns if col in df.columns]
+
+def remove_match_stats(df):
+    """
+    Remove match-specific statistics to prevent future data leakage.
     
-    return df_clean
+    Parameters:
+    df (pandas.DataFrame): Input DataFrame
+    
+    Returns:
+    pandas.DataFrame: DataFrame with match-specific columns removed
+    """
+    return _apply_conversion(df, *_match_stats_plan(df))
+
+# Conversion steps of convert_df. Each plan returns ({column: converted values}, [dropped columns])
+# computed from the input columns; no two steps convert the same column.
+CONVERSION_PLAN = [
+    ('convert_team_colors', _team_colors_plan),           # Convert blue/red to 1/2
+    ('convert_region', _region_plan),                     # Convert kr/euw/vn/na to 1/2/3/4
+    ('convert_champion_columns', _champion_columns_plan), # Convert champion names to numbers
+    ('convert_date_column', _date_column_plan),           # Convert dates to timestamps
+    ('convert_role_columns', _role_columns_plan),         # Convert roles to 1-5
+    ('convert_id_columns', _id_columns_plan),             # Drop ID-related columns
+    ('remove_match_stats', _match_stats_plan)             # Remove match-specific columns
+]
 
 def convert_df(df):
     """
@@ -674,41 +1184,97 @@ def convert_df(df):
     - Role conversion (TOP/MID/ADC/JUNGLE/SUPPORT to 1/2/3/4/5)
     - Drop ID columns (player_id, teammates1-4, oppmates1-5, region_profile)
     
+    All steps of CONVERSION_PLAN are computed up front from the input and the
+    output is built once, so peak memory stays around twice the input instead of
+    one full copy per step. The time of every step is printed.
+    
     Parameters:
     df (pandas.DataFrame): Input training DataFrame
     
     Returns:
     pandas.DataFrame: Processed DataFrame with all conversions
     """
-    df = df.copy()
+    total_start = time.perf_counter()
     
-    # Drop rows where champion is NA
+    # Drop rows where champion is NA. The filtered frame is a private copy,
+    # otherwise the unchanged columns are copied when the output is built
     initial_rows = len(df)
-    df = df.dropna(subset=['champion'])
-    rows_dropped = initial_rows - len(df)
+    keep = df['champion'].notna()
+    rows_dropped = initial_rows - int(keep.sum())
+    if rows_dropped:
+        df = df[keep]
     print(f"Dropped {rows_dropped} rows with NA champion values")
 
-    # Sequential conversions
-    conversions = [
-        convert_team_colors,      # Convert blue/red to 1/2
-        convert_region,          # Convert kr/euw/vn/na to 1/2/3/4
-        convert_champion_columns, # Convert champion names to numbers
-        convert_date_column,     # Convert dates to timestamps
-        convert_role_columns,    # Convert roles to 1-5
-        convert_id_columns,       # Drop ID-related columns
-        remove_match_stats        # Remove match-specific columns
-    ]
-    
-    ## Apply each conversion function in sequence
-    for convert_func in conversions:
+    ## Plan every conversion against the input
+    updates = {}
+    drops = set()
+    timings = {}
+    for name, plan in CONVERSION_PLAN:
+        step_start = time.perf_counter()
         try:
-            print(f"Applying {convert_func.__name__}...")
-            df = convert_func(df)
+            print(f"Applying {name}...")
+            step_updates, step_drops = plan(df)
         except Exception as e:
-            print(f"Error in {convert_func.__name__}: {str(e)}")
+            print(f"Error in {name}: {str(e)}")
             raise
+        updates.update(step_updates)
+        drops.update(step_drops)
+        timings[name] = time.perf_counter() - step_start
+
+    # Materialize the output once, column by column, without consolidating blocks
+    step_start = time.perf_counter()
+    columns = {}
+    for col in df.columns:
+        if col in drops:
+            continue
+        if col in updates:
+            columns[col] = updates[col]
+        else:
+            columns[col] = df[col] if rows_dropped else df[col].copy()
+    result = pd.DataFrame(columns, copy=False)
+    timings['materialize'] = time.perf_counter() - step_start
+
+    print(f"convert_df finished in {time.perf_counter() - total_start:.3f}s: " +
+          ", ".join(f"{name} {elapsed:.3f}s" for name, elapsed in timings.items()))
     
-    return df
+    return result
+
+
+def top_n_indices(scores, n, chunk_size=10000):
+    """
+    Column indices of the n largest values in each row of a 2D array, largest first.
+    Ties are broken by column position like pandas nlargest(keep='first').
+    Float arrays keep their dtype (a float32 block is not upcast), rows are ranked
+    chunk_size at a time to bound the temporary arrays.
+    """
+    scores = np.asarray(scores)
+    if not np.issubdtype(scores.dtype, np.floating):
+        scores = scores.astype(np.float64)
+    n = min(n, scores.shape[1])
+    if n == 0 or len(scores) == 0:
+        return np.zeros((len(scores), n), dtype=np.int64)
+    if len(scores) > chunk_size:
+        return np.concatenate([
+            top_n_indices(scores[start:start + chunk_size], n, chunk_size)
+            for start in range(0, len(scores), chunk_size)
+        ])
+
+    # argpartition finds the n largest, but picks arbitrarily among values tied with
+    # the n-th largest; those rows take the leftmost tied columns instead
+    indices = np.sort(np.argpartition(-scores, n - 1, axis=1)[:, :n], axis=1)
+    threshold = np.take_along_axis(scores, indices, axis=1).min(axis=1)[:, None]
+    at_threshold = scores == threshold
+    ambiguous = np.flatnonzero((scores > threshold).sum(axis=1) + at_threshold.sum(axis=1) > n)
+    if len(ambiguous):
+        rows = scores[ambiguous]
+        tied = at_threshold[ambiguous]
+        needed = n - (rows > threshold[ambiguous]).sum(axis=1, keepdims=True)
+        selected = (rows > threshold[ambiguous]) | (tied & (np.cumsum(tied, axis=1) <= needed))
+        indices[ambiguous] = np.nonzero(selected)[1].reshape(len(ambiguous), n)
+
+    # Largest first, equal values in column order
+    order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(indices, order, axis=1)
 
 
 def get_top_champion_scores(df, n=5):
@@ -724,7 +1290,8 @@ def get_top_champion_scores(df, n=5):
     """
     try:
         converter = ChampionConverter()
-        df = df.copy()
+        # New columns are added to a shallow copy, the input frame is left as it is
+        df = df.copy(deep=False)
         
         # Get all champion columns (from Aatrox to Zyra)
         champion_start = df.columns.get_loc('Aatrox')
@@ -732,22 +1299,40 @@ def get_top_champion_scores(df, n=5):
         champion_cols = df.columns[champion_start:champion_end]
         
         # Convert scores to numeric, replacing non-numeric values with 0
-        champion_scores = df[champion_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        # (a positional slice is a view of the score block, not a copy)
+        champion_scores = df.iloc[:, champion_start:champion_end]
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in champion_scores.dtypes):
+            champion_scores = champion_scores.apply(pd.to_numeric, errors='coerce')
+        # A float32 score block (dense or sparse) is ranked as float32, anything else as float64
+        score_dtype = np.float32 if all(
+            np.dtype(getattr(dtype, 'subtype', dtype)) == np.float32 for dtype in champion_scores.dtypes
+        ) else np.float64
+        champion_scores = champion_scores.to_numpy(dtype=score_dtype)
+        if np.isnan(champion_scores).any():
+            champion_scores = np.nan_to_num(champion_scores, nan=0.0)
         
-        # Get indices of top n values for each row
-        top_n_indices = champion_scores.apply(lambda x: pd.Series(x.nlargest(n).index), axis=1)
-        top_n_values = champion_scores.apply(lambda x: pd.Series(x.nlargest(n).values), axis=1)
+        # Champion number of every score column
+        champion_numbers = np.array([
+            converter.champion_to_number.get(champion, -1) for champion in champion_cols
+        ], dtype=np.int64)
+
+        top_indices = top_n_indices(champion_scores, n)
+        top_values = np.take_along_axis(champion_scores, top_indices, axis=1)
         
         # Create new columns for champion names and scores
+        top_columns = {}
         for i in range(n):
-            # Champion scores
-            df[f'{i+1}_champ_score'] = top_n_values.iloc[:, i].astype(float)
-            
-            # Champion names (converted to numbers)
-            champ_names = top_n_indices.iloc[:, i]
-            df[f'{i+1}_champ_name'] = champ_names.map(
-                lambda x: int(converter.champion_to_num(x)) if pd.notnull(x) else -1
-            )
+            if i < top_indices.shape[1]:
+                top_columns[f'{i+1}_champ_score'] = top_values[:, i]
+                top_columns[f'{i+1}_champ_name'] = champion_numbers[top_indices[:, i]]
+            else:
+                top_columns[f'{i+1}_champ_score'] = np.zeros(len(df))
+                top_columns[f'{i+1}_champ_name'] = np.full(len(df), -1, dtype=np.int64)
+
+        # Added in one go so large n does not fragment the frame
+        for col in [col for col in top_columns if col in df.columns]:
+            df[col] = top_columns.pop(col)
+        df = pd.concat([df, pd.DataFrame(top_columns, index=df.index)], axis=1, copy=False)
         
         return df
     
@@ -758,7 +1343,97 @@ def get_top_champion_scores(df, n=5):
             df[f'{i}_champ_score'] = 0.0
             df[f'{i}_champ_name'] = -1
         return df
-    
+
+
+class TopKDecoder:
+    """
+    Decodes model probabilities into the top k champions per row.
+
+    Built once per label encoder: class index -> champion number -> champion name are
+    precomputed NumPy arrays, so decoding is array indexing instead of a
+    num_to_champion call per cell. Ranking uses top_n_indices (argpartition plus a
+    sort of the k survivors), ties keep the lower class index first.
+    """
+
+    def __init__(self, classes, converter=None):
+        self.converter = converter if converter is not None else ChampionConverter()
+        # Champion name by champion number (index 0 and unknown numbers are None)
+        self.names_by_number = np.array([None] + self.converter.champions, dtype=object)
+        self.class_numbers = np.asarray(classes).astype(np.int64)
+        self.class_names = self.champion_names(self.class_numbers)
+
+    @classmethod
+    def from_label_encoder(cls, label_encoder, converter=None):
+        return cls(label_encoder.classes_, converter)
+
+    def champion_names(self, numbers):
+        """Champion names for an array of champion numbers (None where unknown)"""
+        numbers = pd.to_numeric(pd.Series(np.asarray(numbers).ravel()), errors='coerce').to_numpy(dtype=np.float64)
+        valid = np.isfinite(numbers) & (numbers >= 1) & (numbers < len(self.names_by_number))
+        ids = np.where(valid, numbers, 0).astype(np.int64)
+        return self.names_by_number[ids]
+
+    def decode(self, proba, k=5):
+        """
+        Top k of each row of proba (rows x classes), most likely first.
+
+        Returns (class indices, champion numbers, champion names, probabilities),
+        each a rows x k array.
+        """
+        proba = np.asarray(proba)
+        indices = top_n_indices(proba, k)
+        return (
+            indices,
+            self.class_numbers[indices],
+            self.class_names[indices],
+            np.take_along_axis(proba, indices, axis=1)
+        )
+
+    @staticmethod
+    def hit_rank(top_numbers, y_true):
+        """
+        1-based rank of the true champion number within each row of top_numbers,
+        0 where it is not in the top k
+        """
+        y_true = pd.to_numeric(pd.Series(np.asarray(y_true).ravel()), errors='coerce').to_numpy(dtype=np.float64)
+        hits = top_numbers == y_true[:, None]
+        return np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, 0)
+
+    def results_frame(self, proba, y_true=None, k=5):
+        """
+        Results table of predict_top_k_with_confidence: True_Champion (when y_true is
+        given), Rank_i_Champion / Rank_i_Confidence for i in 1..k and Prediction_Rank
+        ('Rank_i' or 'Not in Top k')
+        """
+        _, top_numbers, top_names, top_proba = self.decode(proba, k)
+
+        results = {}
+        if y_true is not None:
+            results['True_Champion'] = self.champion_names(y_true)
+        for i in range(top_names.shape[1]):
+            results[f'Rank_{i+1}_Champion'] = top_names[:, i]
+            results[f'Rank_{i+1}_Confidence'] = top_proba[:, i].round(4)
+
+        if y_true is not None:
+            rank = self.hit_rank(top_numbers, y_true)
+            labels = np.array([f'Not in Top {k}'] + [f'Rank_{i}' for i in range(1, top_names.shape[1] + 1)], dtype=object)
+            results['Prediction_Rank'] = labels[rank]
+
+        return pd.DataFrame(results)
+
+
+def predict_top_k_with_confidence(model, X, y_true, label_encoder, k=5, decoder=None):
+    """
+    Predict the top k champions with confidence scores and compare with the true label.
+    Returns a DataFrame with the true champion, predicted champions, their confidence
+    scores and the rank the true champion was found at.
+    """
+    if decoder is None:
+        decoder = TopKDecoder.from_label_encoder(label_encoder)
+    proba = model.predict_proba(X)
+    return decoder.results_frame(proba, y_true, k)
+
+
 def check_datatypes(df):
     datatype= pd.DataFrame({
         'dtype': df.dtypes,
@@ -780,15 +1455,17 @@ def calculate_champ_variety_score(df):
     # Filter to only include columns that exist in the DataFrame
     existing_columns = [col for col in champ_columns if col in df.columns]
     
-    # Function to count unique non-NaN values
-    def count_unique_champions(row):
-        # Get all values that are not NaN
-        valid_champions = row[existing_columns].dropna()
-        # Count unique values
-        return len(set(valid_champions))
-    
-    # Calculate the score for each row
-    df['champ_variety_score'] = df.apply(count_unique_champions, axis=1)
+    # Count unique non-NaN champions per row: factorize to integer codes (NaN -> -1),
+    # sort each row and count the positions where a new code starts
+    if existing_columns and len(df):
+        champs = df[existing_columns].to_numpy()
+        codes = pd.factorize(champs.ravel())[0].reshape(champs.shape)
+        codes = np.sort(codes, axis=1)
+        new_value = np.ones(codes.shape, dtype=bool)
+        new_value[:, 1:] = codes[:, 1:] != codes[:, :-1]
+        df['champ_variety_score'] = (new_value & (codes >= 0)).sum(axis=1).astype(np.int64)
+    else:
+        df['champ_variety_score'] = np.zeros(len(df), dtype=np.int64)
     
     return df
 
@@ -838,29 +1515,40 @@ def get_most_role_3(df):
         'JUNGLE': 4,
         'SUPPORT': 5
     }
-    
-    def get_third_role_info(row):
-        # Create dictionary of role values excluding most_role_1 and most_role_2
-        role_values = {
-            'TOP': row['TOP'],
-            'JUNGLE': row['JUNGLE'],
-            'MID': row['MID'],
-            'ADC': row['ADC'],
-            'SUPPORT': row['SUPPORT']
-        }
-        
-        # Remove most_role_1 and most_role_2 from consideration
-        role_values.pop(row['most_role_1'], None)
-        role_values.pop(row['most_role_2'], None)
-        
-        # Find highest remaining role and its value
-        if role_values:
-            third_role, third_value = max(role_values.items(), key=lambda x: x[1])
-            return role_mapping[third_role], third_value
-        return 0, 0.0  # Default values if no third role found
+    roles = ['TOP', 'JUNGLE', 'MID', 'ADC', 'SUPPORT']
+    
+    # Highest role value excluding most_role_1 and most_role_2 (matched by role name).
+    # Scanned in role order keeping the first maximum, like max() over the role dict:
+    # a NaN in the first candidate role is kept, later NaN values never win
+    excluded = np.zeros((len(df), len(roles)), dtype=bool)
+    for col in ['most_role_1', 'most_role_2']:
+        most_role = df[col].to_numpy()
+        # Numeric (already converted) roles never match a role name
+        if most_role.dtype == object:
+            for role_idx, role in enumerate(roles):
+                excluded[:, role_idx] |= most_role == role
 
+    role_values = np.column_stack([df[role].to_numpy() for role in roles])
+    best_role = np.zeros(len(df), dtype=np.int64)
+    best_value = np.zeros(len(df), dtype=role_values.dtype)
+    unset = np.ones(len(df), dtype=bool)
+    for role_idx, role in enumerate(roles):
+        values = role_values[:, role_idx]
+        take = ~excluded[:, role_idx] & (unset | (values > best_value))
+        best_role[take] = role_mapping[role]
+        best_value[take] = values[take]
+        unset &= excluded[:, role_idx]
+    
+    # Same dtype a row of the frame (or of the role columns, for mixed frames) would have
+    value_dtype = np.result_type(*[df[role].dtype for role in roles])
+    if value_dtype != np.float64:
+        frame_dtypes = df.dtypes.unique()
+        if all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame_dtypes):
+            value_dtype = np.result_type(*frame_dtypes)
+    
     # Add both most_role_3 and most_role_3_value
-    df[['most_role_3', 'most_role_3_value']] = df.apply(get_third_role_info, axis=1, result_type='expand')
+    df['most_role_3'] = best_role.astype(np.result_type(np.int64, value_dtype))
+    df['most_role_3_value'] = best_value.astype(value_dtype)
     
     return df
 
@@ -900,115 +1588,144 @@ def calculate_role_specialization(df):
     
     return df
 
+def _repeated_sum(value, max_count):
+    """value added to itself 0..max_count times, in the same order as Python's sum()"""
+    sums = [0]
+    for _ in range(max_count):
+        sums.append(sums[-1] + value)
+    return np.array(sums, dtype=np.float64)
+
+
+def champion_loyalty_arrays(recent_champs, recent_wins, recent_losses, season_champs, season_games):
+    """
+    Array core of calculate_champion_loyalty, shared with the single-record feature builder.
+
+    recent_champs, recent_wins, recent_losses: (rows x 2) for most_champ_1..2, W_1..2, L_1..2
+    season_champs, season_games: (rows x 7) for season_champ_1..7, games_ssn_1..7
+    Champions may be names or encoded numbers, missing ones NaN/None.
+
+    Returns (loyalty_score, confidence_score, [recent_champ_1_loyal, recent_champ_2_loyal],
+    any_match, no_data, failed) as arrays over rows.
+    """
+    n_rows = len(recent_champs)
+    recent_valid = pd.notna(recent_champs)
+    season_valid = pd.notna(season_champs)
+    season_games = np.asarray(season_games, dtype=np.float64)
+    season_games = np.where(np.isnan(season_games), 0, season_games)
+
+    # Position of each season champion among the listed ones
+    season_position = np.cumsum(season_valid, axis=1) - 1
+
+    total_season_games = np.zeros(n_rows)
+    for i in range(7):
+        total_season_games = total_season_games + np.where(season_valid[:, i], season_games[:, i], 0)
+
+    # Games with each recent champion, 0 when the champion is missing
+    recent_games = np.where(
+        recent_valid, np.asarray(recent_wins, dtype=np.float64) + np.asarray(recent_losses, dtype=np.float64), 0
+    )
+    total_recent_games = recent_games[:, 0] + recent_games[:, 1]
+
+    no_data = ~recent_valid.any(axis=1) | ~season_valid.any(axis=1) | (total_recent_games == 0)
+
+    loyalty_score = np.zeros(n_rows)
+    any_match = np.zeros(n_rows, dtype=bool)
+    loyal_flags = []
+    rows = np.arange(n_rows)
+    # Position of each recent champion among the listed ones (the first listed gets 1.7)
+    recent_position = np.cumsum(recent_valid, axis=1) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in range(2):
+            matches = season_valid & (season_champs == recent_champs[:, [k]]) & recent_valid[:, [k]]
+            matched = matches.any(axis=1)
+            loyal_flags.append(matched.astype(np.int64))
+
+            first_match = matches.argmax(axis=1)
+            season_idx = season_position[rows, first_match]
+            position = recent_position[:, k]
+
+            recent_weight = recent_games[rows, np.maximum(position, 0)] / total_recent_games
+            season_weight = season_games[rows, first_match] / total_season_games
+            position_weight = np.where(position == 0, 1.7, 1.3)
+            seasonal_position_weight = np.where(season_idx < 3, 1.3, 1.0)
+
+            combined_weight = (
+                recent_weight * 0.6 +
+                season_weight * 0.4
+            ) * position_weight * seasonal_position_weight
+
+            loyalty_score = loyalty_score + np.where(matched, combined_weight, 0)
+            any_match |= matched
+
+    # Confidence from how many champion slots are filled, plus recent game volume
+    n_season_top = season_valid[:, :3].sum(axis=1)
+    n_season_rest = season_valid[:, 3:].sum(axis=1)
+    recent_volume = total_recent_games / 100
+    confidence_score = (
+        np.where(recent_valid[:, 0], 0.5, 0) +
+        np.where(recent_valid[:, 1], 0.2, 0) +
+        _repeated_sum(0.1, 3)[n_season_top] +
+        _repeated_sum(0.05, 4)[n_season_rest] +
+        np.where(recent_volume < 0.1, recent_volume, 0.1)
+    )
+
+    loyalty_score = np.round(np.where(loyalty_score > 1.0, 1.0, loyalty_score), 3)
+    confidence_score = np.round(np.where(confidence_score > 1.0, 1.0, confidence_score), 3)
+    loyalty_score[no_data | ~any_match] = 0
+    confidence_score[no_data] = 0
+
+    # Matched rows whose season champions have no games divide by zero. The per-row version
+    # failed on them (0 everywhere) or, on all-numeric frames, returned a NaN loyalty score;
+    # both score 0 here
+    failed = ~no_data & any_match & (total_season_games == 0)
+    loyalty_score[failed] = 0
+    confidence_score[failed] = 0
+    loyal_flags = [np.where(failed, 0, flags) for flags in loyal_flags]
+    any_match &= ~failed
+
+    return loyalty_score, confidence_score, loyal_flags, any_match, no_data, failed
+
+
 def calculate_champion_loyalty(df):
+    """
+    Champion loyalty features from the top 2 recent champions and the 7 season champions:
+    champion_loyalty_score, loyalty_confidence_score, recent_champ_1_loyal, recent_champ_2_loyal
+
+    Computed on (rows x 2) recent and (rows x 7) season arrays. Season positions count
+    only listed champions, and the first season slot listing a champion is used.
+    """
     df = df.copy()
-    
-    def get_loyalty_scores(row):
-        try:
-            # Get champions lists, handle potential NaN/None values (only top 2)
-            recent_champs = [
-                row['most_champ_1'] if pd.notna(row['most_champ_1']) else None,
-                row['most_champ_2'] if pd.notna(row['most_champ_2']) else None
-            ]
-            
-            # Include all 7 season champions
-            season_champs = []
-            season_games = []
-            for i in range(1, 8):
-                champ = row[f'season_champ_{i}'] if pd.notna(row[f'season_champ_{i}']) else None
-                games = row[f'games_ssn_{i}'] if pd.notna(row[f'games_ssn_{i}']) else 0
-                if champ is not None:
-                    season_champs.append(champ)
-                    season_games.append(games)
-            
-            # Add individual champion loyalty flags (only top 2)
-            champ_loyalty_flags = {
-                'recent_champ_1_loyal': 1 if (pd.notna(row['most_champ_1']) and 
-                                            row['most_champ_1'] in season_champs) else 0,
-                'recent_champ_2_loyal': 1 if (pd.notna(row['most_champ_2']) and 
-                                            row['most_champ_2'] in season_champs) else 0
-            }
-            
-            # Remove None values from recent champions
-            recent_champs = [c for c in recent_champs if c is not None]
-            
-            # If no valid champions, return defaults
-            if not recent_champs or not season_champs:
-                return {
-                    'loyalty_score': 0,
-                    'confidence_score': 0,
-                    **champ_loyalty_flags
-                }
-            
-            # Calculate games played for recent champions (only top 2)
-            recent_games = [
-                (row['W_1'] + row['L_1']) if pd.notna(row['most_champ_1']) else 0,
-                (row['W_2'] + row['L_2']) if pd.notna(row['most_champ_2']) else 0
-            ]
-            
-            total_recent_games = sum(recent_games)
-            total_season_games = sum(season_games)
-            
-            if total_recent_games == 0:
-                return {
-                    'loyalty_score': 0,
-                    'confidence_score': 0,
-                    **champ_loyalty_flags
-                }
-                
-            # Calculate overlap score with enhanced weights
-            loyalty_score = 0
-            for idx, champ in enumerate(recent_champs):
-                if champ in season_champs:
-                    season_idx = season_champs.index(champ)
-                    
-                    recent_weight = recent_games[idx] / total_recent_games
-                    season_weight = season_games[season_idx] / total_season_games
-                    position_weight = 1.7 if idx == 0 else 1.3  # Adjusted weights for 2 champions
-                    seasonal_position_weight = 1.3 if season_idx < 3 else 1.0
-                    
-                    combined_weight = (
-                        recent_weight * 0.6 +
-                        season_weight * 0.4
-                    ) * position_weight * seasonal_position_weight
-                    
-                    loyalty_score += combined_weight
-            
-            # Calculate confidence score (adjusted for 2 champions)
-            confidence_score = 0
-            confidence_score += 0.5 if pd.notna(row['most_champ_1']) else 0  # Increased weight for main
-            confidence_score += 0.2 if pd.notna(row['most_champ_2']) else 0  # Increased weight for second
-            confidence_score += sum(0.1 for i in range(1, 4) if pd.notna(row[f'season_champ_{i}']))
-            confidence_score += sum(0.05 for i in range(4, 8) if pd.notna(row[f'season_champ_{i}']))
-            
-            recent_games = sum((row[f'W_{i}'] + row[f'L_{i}']) if pd.notna(row[f'most_champ_{i}']) else 0 
-                             for i in range(1, 3))  # Only top 2
-            confidence_score += min(0.1, recent_games / 100)
-            
-            return {
-                'loyalty_score': round(min(loyalty_score, 1.0), 3),
-                'confidence_score': round(min(confidence_score, 1.0), 3),
-                **champ_loyalty_flags
-            }
-            
-        except Exception as e:
-            print(f"Error calculating loyalty scores: {e}")
-            return {
-                'loyalty_score': 0,
-                'confidence_score': 0,
-                'recent_champ_1_loyal': 0,
-                'recent_champ_2_loyal': 0
-            }
-    
-    # Apply calculations and expand results to columns
-    results = df.apply(get_loyalty_scores, axis=1)
-    
-    # Convert results to new columns
-    df['champion_loyalty_score'] = results.apply(lambda x: x['loyalty_score'])
-    df['loyalty_confidence_score'] = results.apply(lambda x: x['confidence_score'])
-    df['recent_champ_1_loyal'] = results.apply(lambda x: x['recent_champ_1_loyal'])
-    df['recent_champ_2_loyal'] = results.apply(lambda x: x['recent_champ_2_loyal'])
-    
+
+    required_cols = (
+        ['most_champ_1', 'most_champ_2', 'W_1', 'L_1', 'W_2', 'L_2'] +
+        [f'season_champ_{i}' for i in range(1, 8)] +
+        [f'games_ssn_{i}' for i in range(1, 8)]
+    )
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        print(f"Error calculating loyalty scores: missing columns {missing_cols}")
+        df['champion_loyalty_score'] = 0.0
+        df['loyalty_confidence_score'] = 0.0
+        df['recent_champ_1_loyal'] = 0
+        df['recent_champ_2_loyal'] = 0
+        return df
+
+    loyalty_score, confidence_score, loyal_flags, any_match, no_data, failed = champion_loyalty_arrays(
+        df[['most_champ_1', 'most_champ_2']].to_numpy(),
+        df[['W_1', 'W_2']].to_numpy(dtype=np.float64),
+        df[['L_1', 'L_2']].to_numpy(dtype=np.float64),
+        df[[f'season_champ_{i}' for i in range(1, 8)]].to_numpy(),
+        df[[f'games_ssn_{i}' for i in range(1, 8)]].to_numpy(dtype=np.float64)
+    )
+    if failed.any():
+        print(f"Error calculating loyalty scores: division by zero in {failed.sum()} rows")
+
+    # Always float64, also when no row matched (the per-row version left an integer 0 column)
+    df['champion_loyalty_score'] = loyalty_score
+    df['loyalty_confidence_score'] = confidence_score
+    df['recent_champ_1_loyal'] = loyal_flags[0]
+    df['recent_champ_2_loyal'] = loyal_flags[1]
+
     return df
 
 def optimize_feature_dtypes(df):
@@ -1176,30 +1893,63 @@ def remove_unwanted_columns(df):
     return df
 
 
-def apply_feature_engineering(df, n=5):
+def apply_feature_engineering(df, n=5, incremental=False, feature_store=None):
     """
     Performs feature engineering pipeline
+
+    incremental=True reuses the row-level features stored in the FeatureStore
+    (cache/feature_store.db by default) for rows already seen with the same columns
+    and n, and only computes them for new or changed rows.
     """
     df = df.copy()
     
-    # Engineering pipeline
-    transformations = [
+    # Engineering pipeline, row-level features first
+    row_transformations = [
         calculate_champ_variety_score,
         calculate_playstyle,
         get_most_role_3,
         calculate_role_specialization,
         calculate_champion_loyalty,
         lambda x: get_top_champion_scores(x, n),  # Add top 5 champions
+    ]
+    final_transformations = [
         remove_unwanted_columns,
         optimize_feature_dtypes 
     ]
-    
-    for transform in transformations:
-        try:
-            print(f"Applying {transform.__name__}...")
-            df = transform(df)
-        except Exception as e:
-            print(f"Error in {transform.__name__}: {str(e)}")
-            raise
-    
-    return df
+
+    def run(frame, transformations):
+        for transform in transformations:
+            try:
+                print(f"Applying {transform.__name__}...")
+                frame = transform(frame)
+            except Exception as e:
+                print(f"Error in {transform.__name__}: {str(e)}")
+                raise
+        return frame
+
+    if not incremental:
+        return run(df, row_transformations + final_transformations)
+    # Nothing to look up or compute, and no stored columns to restore
+    if df.empty:
+        return run(df, final_transformations)
+
+    store = feature_store if feature_store is not None else FeatureStore()
+    snapshot = snapshot_key(n, list(df.columns), [str(dtype) for dtype in df.dtypes])
+    row_keys = FeatureStore.row_keys(df)
+    found, cached = store.lookup('feature_engineering', row_keys, snapshot)
+    print(f"Feature store: {found.sum()} rows cached, {(~found).sum()} rows to compute")
+
+    columns = store.columns('feature_engineering', snapshot)
+    if (~found).any():
+        computed = run(df[~found], row_transformations)
+        columns = {col: str(computed[col].dtype) for col in computed.columns if col not in df.columns}
+        new_values = computed[list(columns)].to_numpy(dtype=np.float64)
+        columns = store.save('feature_engineering', row_keys[~found], snapshot, new_values, columns)
+        if cached is None:
+            cached = np.zeros((len(df), len(columns)))
+        cached[~found] = new_values
+
+    for col_idx, (col, dtype) in enumerate(columns.items()):
+        df[col] = pd.Series(cached[:, col_idx], index=df.index).astype(dtype)
+
+    return run(df, final_transformations)
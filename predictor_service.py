@@ -0,0 +1,393 @@
+# Imports helper from the repository root and draft_features from util/, run it from the root with
+#   PYTHONPATH=.:util python predictor_service.py --model-dir model
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost as xgb
+from helper import MetaScoreTable, DraftPenaltyTable, TopKDecoder
+from draft_features import DraftFeatureBuilder, CategoryEncoder, MODEL_FEATURES, lock_in_sequence, pad_draft
+
+# Default location of the trained model and its label encoder
+MODEL_DIR = "model"
+MODEL_FILE = "champion_predictor.json"
+ENCODER_FILE = "label_encoder.joblib"
+# Training categories of the categorical features (CategoryEncoder.from_frame(X_train).save)
+CATEGORIES_FILE = "categories.json"
+
+# Micro-batching defaults: a batch is sent to the model once it holds MAX_BATCH_SIZE
+# rows or MAX_WAIT_MS after its first request arrived, whichever comes first
+MAX_BATCH_SIZE = 256
+MAX_WAIT_MS = 2.0
+
+
+class ChampionPredictor:
+    """
+    Champion predictor loaded once and kept in memory.
+
+    The booster, label encoder and meta lookup tables are read at construction.
+    Requests carry either ready feature rows or a player profile with drafts, which
+    are turned into feature rows by a DraftFeatureBuilder sharing the warm tables.
+    Predictions go through Booster.inplace_predict on a float32 matrix laid out in
+    the booster's feature order, which skips the XGBClassifier/DMatrix overhead
+    of model.predict_proba. The booster was trained on the category codes of the
+    categorical features, so their raw values are encoded with the training
+    categories (CATEGORIES_FILE) when the matrix is built. Class indices are decoded
+    to champion names by a TopKDecoder.
+    """
+
+    def __init__(self, model_dir=None, model_file=None, encoder_file=None, categories_file=None):
+        model_dir = model_dir if model_dir is not None else MODEL_DIR
+        self.model_path = model_file if model_file is not None else os.path.join(model_dir, MODEL_FILE)
+        self.encoder_path = encoder_file if encoder_file is not None else os.path.join(model_dir, ENCODER_FILE)
+        self.categories_path = categories_file if categories_file is not None else os.path.join(model_dir, CATEGORIES_FILE)
+
+        self.label_encoder = joblib.load(self.encoder_path)
+        self.booster = xgb.Booster()
+        self.booster.load_model(self.model_path)
+        self.feature_names = list(self.booster.feature_names or [])
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+
+        # Categorical features are fed to the booster as their training category codes
+        categorical = [
+            name for name, kind in zip(self.feature_names, self.booster.feature_types or []) if kind == 'c'
+        ]
+        if os.path.exists(self.categories_path):
+            self.category_encoder = CategoryEncoder.load(self.categories_path)
+        else:
+            self.category_encoder = CategoryEncoder({})
+        missing = [name for name in categorical if name not in self.category_encoder.categories]
+        if missing:
+            raise ValueError(
+                f"No training categories for the categorical features {missing} in {self.categories_path}"
+            )
+
+        # Class index -> champion number -> champion name
+        self.decoder = TopKDecoder.from_label_encoder(self.label_encoder)
+        self.class_names = self.decoder.class_names
+
+        # Meta lookup tables used to build draft features, kept warm between requests
+        self.meta_table = MetaScoreTable.from_csv()
+        self.penalty_table = DraftPenaltyTable.from_csv()
+        self.feature_builder = DraftFeatureBuilder(self.penalty_table, self.meta_table)
+        # Builder column of every booster feature (-1 where the builder has no such column)
+        self.builder_columns = np.array([
+            MODEL_FEATURES.index(name) if name in MODEL_FEATURES else -1 for name in self.feature_names
+        ], dtype=np.int64)
+
+        # The booster is not safe to call from several threads at once
+        self._lock = threading.Lock()
+
+    def to_matrix(self, rows):
+        """
+        Feature matrix (rows x booster features, float32) from a DataFrame, a dict or a
+        list of dicts keyed by feature name. Missing features are NaN, which the booster
+        treats as missing values; unknown keys are ignored. Categorical features are given
+        as their values (a categorical column of a DataFrame by its values, not its own
+        codes) and encoded with the training categories. A NumPy array is taken to be
+        model input already: booster feature order, categorical features as codes.
+        """
+        if isinstance(rows, np.ndarray):
+            return np.atleast_2d(rows).astype(np.float32, copy=False)
+        if isinstance(rows, pd.DataFrame):
+            frame = rows.reindex(columns=self.feature_names)
+            matrix = np.empty((len(frame), len(self.feature_names)), dtype=np.float32)
+            for col, name in enumerate(self.feature_names):
+                values = frame[name]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(object)
+                matrix[:, col] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+            return self.category_encoder.encode(matrix, self.feature_names)
+        if isinstance(rows, dict):
+            rows = [rows]
+
+        matrix = np.full((len(rows), len(self.feature_names)), np.nan, dtype=np.float32)
+        for i, row in enumerate(rows):
+            for name, value in row.items():
+                col = self.feature_index.get(name)
+                if col is not None and value is not None:
+                    matrix[i, col] = value
+        return self.category_encoder.encode(matrix, self.feature_names)
+
+    def predict_proba(self, rows):
+        """Class probabilities (rows x classes) for a feature matrix, DataFrame or dict rows"""
+        matrix = rows if isinstance(rows, np.ndarray) else self.to_matrix(rows)
+        if len(matrix) == 0:
+            return np.zeros((0, len(self.class_names)), dtype=np.float32)
+        with self._lock:
+            proba = self.booster.inplace_predict(matrix)
+        return np.asarray(proba).reshape(len(matrix), -1)
+
+    def check_k(self, k):
+        """k of a request, ValueError unless it is an integer in 1..number of classes"""
+        if isinstance(k, bool) or not isinstance(k, (int, np.integer)):
+            raise ValueError(f"k must be an integer, got {k!r}")
+        if not 1 <= k <= len(self.class_names):
+            raise ValueError(f"k must be between 1 and {len(self.class_names)}, got {k}")
+        return int(k)
+
+    def top_k(self, proba, k=5):
+        """Top k champions and probabilities for each row of proba, most likely first"""
+        _, _, top_names, top_proba = self.decoder.decode(proba, k)
+        return [
+            [{'champion': name, 'probability': float(p)} for name, p in zip(names, probs)]
+            for names, probs in zip(top_names, top_proba)
+        ]
+
+    def predict(self, rows, k=5):
+        """Top k champions for each feature row"""
+        return self.top_k(self.predict_proba(rows), k)
+
+    def draft_matrix(self, profile, drafts):
+        """
+        Booster feature matrix (model input, categorical features as codes) of one player in
+        several drafts, one row per (team_champs, opp_champs) pair. The player's score
+        components are computed once.
+        """
+        builder = self.feature_builder
+        features = builder.drafts_features(builder.player_state(profile), drafts)
+        if self.feature_names != MODEL_FEATURES:
+            matrix = np.full((len(features), len(self.feature_names)), np.nan, dtype=np.float32)
+            known = self.builder_columns >= 0
+            matrix[:, known] = features[:, self.builder_columns[known]]
+            features = matrix
+        return self.category_encoder.encode(features, self.feature_names)
+
+    def predict_draft(self, profile, team_champs=None, opp_champs=None, k=5):
+        """Top k champions of one player in one draft"""
+        return self.predict(self.draft_matrix(profile, [(team_champs, opp_champs)]), k)[0]
+
+    def what_if(self, profile, drafts=None, k=5, team_champs=None, opp_champs=None):
+        """
+        Re-rank the candidate picks of one player across hypothetical drafts.
+
+        drafts: list of (team_champs, opp_champs) pairs; when omitted, team_champs is kept
+        and opp_champs are locked in one at a time (see lock_in_sequence).
+        All drafts are scored with a single predict_proba call.
+
+        Returns a DataFrame with one row per draft: the draft columns followed by
+        Rank_i_Champion / Rank_i_Confidence for i in 1..k
+        """
+        if drafts is None:
+            drafts = lock_in_sequence(team_champs, opp_champs)
+        proba = self.predict_proba(self.draft_matrix(profile, drafts))
+
+        padded = [pad_draft(team, opp) for team, opp in drafts]
+        draft_columns = {}
+        for i in range(4):
+            draft_columns[f'team_champ{i+1}'] = [team[i] for team, _ in padded]
+        for i in range(5):
+            draft_columns[f'opp_champ{i+1}'] = [opp[i] for _, opp in padded]
+        return pd.concat([pd.DataFrame(draft_columns), self.decoder.results_frame(proba, None, k)], axis=1)
+
+
+class BatchingPredictor:
+    """
+    Micro-batches concurrent predict calls into single booster calls.
+
+    Callers submit feature rows from any thread and get a Future back. A single
+    worker thread takes the first waiting request, collects whatever else arrives
+    within max_wait_ms (up to max_batch_size rows), scores everything with one
+    predict_proba call and resolves each Future with its own slice of the result.
+    """
+
+    def __init__(self, predictor, max_batch_size=None, max_wait_ms=None):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size if max_batch_size is not None else MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else MAX_WAIT_MS) / 1000
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="predictor-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, rows, k=5):
+        """
+        Queue feature rows for prediction, the Future resolves to their top k lists. Invalid
+        rows or k fail the Future with a ValueError before anything is queued.
+        """
+        future = Future()
+        try:
+            k = self.predictor.check_k(k)
+            matrix = self.predictor.to_matrix(rows)
+            if matrix.ndim != 2 or matrix.shape[1] != len(self.predictor.feature_names):
+                raise ValueError(f"rows must have {len(self.predictor.feature_names)} features, got shape {matrix.shape}")
+        except (TypeError, AttributeError) as e:
+            future.set_exception(ValueError(f"invalid rows: {e}"))
+            return future
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        self._queue.put((matrix, k, future))
+        return future
+
+    def predict(self, rows, k=5, timeout=None):
+        """Blocking predict through the batcher"""
+        return self.submit(rows, k).result(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped.set()
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                break
+            try:
+                proba = self.predictor.predict_proba(np.concatenate([matrix for matrix, _, _ in batch]))
+            except Exception as e:
+                print(f"Error in batched prediction: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # One failing request must not stop the worker, every other Future would hang
+            start = 0
+            for matrix, k, future in batch:
+                try:
+                    future.set_result(self.predictor.top_k(proba[start:start + len(matrix)], k))
+                except Exception as e:
+                    print(f"Error decoding batched prediction: {e}")
+                    future.set_exception(e)
+                start += len(matrix)
+
+    def close(self):
+        """Stop the worker once the requests already queued are served"""
+        self._queue.put(None)
+        self._worker.join()
+
+
+def parse_drafts(request):
+    """
+    Drafts of a what-if request: "drafts": [{"team": [...], "opp": [...]}, ...], or
+    "team" and "opp" with the opponents locked in one at a time
+    """
+    if "drafts" in request:
+        return [(draft.get("team"), draft.get("opp")) for draft in request["drafts"]]
+    return lock_in_sequence(request.get("team"), request.get("opp"))
+
+
+def make_handler(batcher, timeout=5.0):
+    """
+    Request handler class serving a BatchingPredictor:
+
+    GET  /health   -> {"status": "ok", "features": <number of model features>}
+    POST /predict  <- {"rows": [{feature: value, ...}, ...], "k": 5}
+                   -> {"predictions": [[{"champion": ..., "probability": ...}, ...], ...]}
+    POST /what_if  <- {"profile": {...}, "drafts": [{"team": [...], "opp": [...]}, ...], "k": 5}
+                      (or "team"/"opp" instead of "drafts", opponents locked in one at a time)
+                   -> {"predictions": [...]}, one top k list per draft
+    """
+
+    class PredictorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; with Nagle's algorithm on, the body waits
+        # for the client's delayed ACK (~40 ms) on keep-alive connections
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {"status": "ok", "features": len(batcher.predictor.feature_names)})
+
+        def do_POST(self):
+            if self.path not in ("/predict", "/what_if"):
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                k = batcher.predictor.check_k(request.get("k", 5))
+                if self.path == "/predict":
+                    rows = request.get("rows", request.get("features"))
+                    if rows is None:
+                        raise ValueError("request needs 'rows'")
+                else:
+                    if not isinstance(request.get("profile"), dict):
+                        raise ValueError("request needs a 'profile' object")
+                    # Built here so all drafts of the request reach the booster as one block
+                    rows = batcher.predictor.draft_matrix(request["profile"], parse_drafts(request))
+            except (ValueError, AttributeError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                predictions = batcher.predict(rows, k, timeout=timeout)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except FutureTimeoutError:
+                self._send_json(503, {"error": f"prediction timed out after {timeout} s"})
+                return
+            except Exception as e:
+                print(f"Error serving prediction: {e}")
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"predictions": predictions})
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the latency budget
+            pass
+
+    return PredictorHandler
+
+
+def serve(host="127.0.0.1", port=8000, model_dir=None, max_batch_size=None, max_wait_ms=None):
+    """Load the predictor once and serve it over HTTP until interrupted"""
+    predictor = ChampionPredictor(model_dir)
+    batcher = BatchingPredictor(predictor, max_batch_size, max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    print(f"Champion predictor serving {len(predictor.class_names)} classes on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the champion predictor over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.model_dir, args.max_batch_size, args.max_wait_ms)
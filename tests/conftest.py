@@ -0,0 +1,107 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The scripts run from the repository root with the root and util/ on the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UTIL_DIR = os.path.join(ROOT, "util")
+DATA_DIR = os.path.join(UTIL_DIR, "data")
+FIXTURE_DIR = os.path.join(DATA_DIR, "fixtures")
+for path in (UTIL_DIR, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Committed merges of player stats and recent matches, 100 rows each
+MERGED_FILES = [
+    "player_stats_merged_2025-01-09.csv",
+    "player_stats_merged_2025-01-10.csv",
+    "player_stats_merged_2025-01-11.csv",
+]
+
+
+def read_data(filename):
+    return pd.read_csv(os.path.join(DATA_DIR, filename), low_memory=False)
+
+
+@pytest.fixture(scope="session")
+def meta_stats():
+    return read_data("meta_stats.csv")
+
+
+@pytest.fixture(scope="session")
+def weekly_meta():
+    return read_data("weekly_meta_stats.csv")
+
+
+@pytest.fixture(scope="session")
+def merged_stats():
+    """player_stats_merged_2025-01-11 with a champion on every row"""
+    merged = read_data("player_stats_merged_2025-01-11.csv")
+    return merged[merged['champion'].notna()].reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def champion_features(merged_stats, meta_stats, weekly_meta):
+    """create_champion_features output of merged_stats, nothing written to util/data"""
+    from feature_eng import create_champion_features
+    return create_champion_features(
+        merged_stats.copy(), meta_stats, weekly_meta, use_checkpoint=False, save=False
+    )
+
+
+@pytest.fixture(scope="session")
+def converted_features(champion_features):
+    """champion_features after convert_df, the input of apply_feature_engineering"""
+    from helper import convert_df
+    return convert_df(champion_features.copy())
+
+
+@pytest.fixture(scope="session")
+def training_frame(converted_features):
+    """apply_feature_engineering output of merged_stats: the frame the model is trained on"""
+    from helper import apply_feature_engineering
+    return apply_feature_engineering(converted_features)
+
+
+@pytest.fixture(scope="session")
+def stand_in_model(training_frame, tmp_path_factory):
+    """
+    Small XGBClassifier trained like the notebook (enable_categorical=True on the
+    training frame), saved with its label encoder and categories as predictor_service
+    expects them. Returns (model_dir, classifier, X).
+    """
+    xgb = pytest.importorskip("xgboost")
+    preprocessing = pytest.importorskip("sklearn.preprocessing")
+    import joblib
+    from draft_features import CategoryEncoder
+    from predictor_service import MODEL_FILE, ENCODER_FILE, CATEGORIES_FILE
+
+    X = training_frame.drop(columns=['champion', 'region'])
+    # XGBoost >= 3 rejects float categories (most_role_3); whole numbers keep the same codes
+    for col in X.columns:
+        if isinstance(X[col].dtype, pd.CategoricalDtype) and X[col].cat.categories.dtype.kind == 'f':
+            X[col] = X[col].cat.rename_categories(X[col].cat.categories.astype(int))
+    label_encoder = preprocessing.LabelEncoder()
+    y = label_encoder.fit_transform(training_frame['champion'].to_numpy(dtype=int))
+    classifier = xgb.XGBClassifier(
+        max_depth=4, n_estimators=5, enable_categorical=True, max_cat_to_onehot=10, max_cat_threshold=100,
+        objective='multi:softprob', tree_method='hist', random_state=42
+    )
+    classifier.fit(X, y)
+
+    model_dir = tmp_path_factory.mktemp("model")
+    classifier.save_model(str(model_dir / MODEL_FILE))
+    joblib.dump(label_encoder, model_dir / ENCODER_FILE)
+    CategoryEncoder.from_frame(X).save(model_dir / CATEGORIES_FILE)
+    return model_dir, classifier, X
+
+
+@pytest.fixture(scope="session")
+def predictor(stand_in_model):
+    """ChampionPredictor of the stand-in model, meta tables read from util/data"""
+    from predictor_service import ChampionPredictor
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(ROOT)
+        return ChampionPredictor(str(stand_in_model[0]))
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+
+import async_pipeline
+from scrape_executor import RateLimiter
+
+PLAYERS = ["alpha", "bravo", "charlie", "delta"]
+
+
+class FakeStore:
+    def __init__(self, events):
+        self.events = events
+
+    def close(self):
+        self.events.append('close')
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path, meta_stats, weekly_meta):
+    """
+    run_pipeline on fake leaderboard, profile and match data: merge_stats keeps the match
+    rows, create_champion_features returns its input, nothing is written. Returns the
+    list of events (create start/end, store close) and the saved datasets.
+    """
+    monkeypatch.chdir(tmp_path)
+    events = []
+    saved = {}
+    rows = [{'summoner': name, 'tier': 'CHALLENGER'} for name in PLAYERS]
+
+    def create_champion_features(merged, *args, **kwargs):
+        events.append('start')
+        time.sleep(0.2)
+        events.append('end')
+        return merged
+
+    monkeypatch.setattr(async_pipeline, '_leaderboard_page', lambda pool, limiter, region, page: rows)
+    monkeypatch.setattr(async_pipeline, 'get_pool', lambda: None)
+    monkeypatch.setattr(async_pipeline, 'get_meta_stats', lambda: meta_stats)
+    monkeypatch.setattr(async_pipeline, 'get_weekly_meta', lambda: weekly_meta)
+    monkeypatch.setattr(async_pipeline, 'merge_stats', lambda matches, player, save=False: matches.copy())
+    monkeypatch.setattr(async_pipeline, 'create_champion_features', create_champion_features)
+    monkeypatch.setattr(async_pipeline, 'FeatureStore', lambda: FakeStore(events))
+    monkeypatch.setattr(async_pipeline, 'clean_leaderboard', pd.DataFrame)
+    monkeypatch.setattr(async_pipeline, 'filter_leaderboard', lambda leaderboard, tiers: None)
+    monkeypatch.setattr(async_pipeline, 'save_dataset', lambda df, name, **kwargs: saved.setdefault(name, df))
+    return events, saved
+
+
+def scrape(region, username):
+    return pd.DataFrame({'rank': [1]}), pd.DataFrame({'champion': ['Ahri', 'Lux']})
+
+
+def run(**kwargs):
+    return asyncio.run(async_pipeline.run_pipeline(
+        regions=['euw'], pages_per_region=1, workers=2, limiter=RateLimiter(100, 100), scrape=scrape, **kwargs
+    ))
+
+
+def test_merge_error_is_recorded(pipeline, monkeypatch):
+    events, saved = pipeline
+
+    def merge_stats(matches, player, save=False):
+        if (matches['player_id'] == 'bravo').any():
+            raise KeyError('champion')
+        return matches.copy()
+
+    monkeypatch.setattr(async_pipeline, 'merge_stats', merge_stats)
+    features = run()
+
+    assert sorted(features['player_id'].unique()) == ['alpha', 'charlie', 'delta']
+    errors = saved['player_stats_errors']
+    assert errors['username'].tolist() == ['bravo']
+    assert 'champion' in errors['error'].iloc[0]
+    # The failed player is left out of the saved halves too
+    assert 'bravo' not in saved['recent_matches']['player_id'].tolist()
+    assert events[-1] == 'close'
+
+
+def test_callback_error_closes_store_last(pipeline):
+    events, _ = pipeline
+
+    def on_features(features):
+        raise RuntimeError("callback failed")
+
+    with pytest.raises(RuntimeError, match="callback failed"):
+        run(on_features=on_features, feature_batch=1)
+    assert events.count('close') == 1 and events[-1] == 'close'
+
+
+def test_producer_error_waits_for_feature_thread(pipeline, monkeypatch):
+    """The store is closed only after the running create_champion_features call returned"""
+    events, _ = pipeline
+
+    async def produce_players(players, *args):
+        for name in PLAYERS:
+            players.put_nowait(('euw', name, name))
+        while 'start' not in events:
+            await asyncio.sleep(0.01)
+        raise RuntimeError("leaderboard failed")
+
+    monkeypatch.setattr(async_pipeline, 'produce_players', produce_players)
+    with pytest.raises(RuntimeError, match="leaderboard failed"):
+        run()
+    assert events[-2:] == ['end', 'close']
@@ -0,0 +1,179 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper import calculate_champion_loyalty
+from conftest import MERGED_FILES, read_data
+
+LOYALTY_COLUMNS = ['champion_loyalty_score', 'loyalty_confidence_score', 'recent_champ_1_loyal', 'recent_champ_2_loyal']
+RECENT_CHAMPS = ['most_champ_1', 'most_champ_2']
+SEASON_CHAMPS = [f'season_champ_{i}' for i in range(1, 8)]
+SEASON_GAMES = [f'games_ssn_{i}' for i in range(1, 8)]
+
+
+def reference_champion_loyalty(df):
+    """The original row-wise calculate_champion_loyalty, kept as the reference for the vectorized one"""
+    df = df.copy()
+
+    def get_loyalty_scores(row):
+        try:
+            recent_champs = [
+                row['most_champ_1'] if pd.notna(row['most_champ_1']) else None,
+                row['most_champ_2'] if pd.notna(row['most_champ_2']) else None
+            ]
+
+            season_champs = []
+            season_games = []
+            for i in range(1, 8):
+                champ = row[f'season_champ_{i}'] if pd.notna(row[f'season_champ_{i}']) else None
+                games = row[f'games_ssn_{i}'] if pd.notna(row[f'games_ssn_{i}']) else 0
+                if champ is not None:
+                    season_champs.append(champ)
+                    season_games.append(games)
+
+            champ_loyalty_flags = {
+                'recent_champ_1_loyal': 1 if (pd.notna(row['most_champ_1']) and
+                                            row['most_champ_1'] in season_champs) else 0,
+                'recent_champ_2_loyal': 1 if (pd.notna(row['most_champ_2']) and
+                                            row['most_champ_2'] in season_champs) else 0
+            }
+
+            recent_champs = [c for c in recent_champs if c is not None]
+
+            if not recent_champs or not season_champs:
+                return {'loyalty_score': 0, 'confidence_score': 0, **champ_loyalty_flags}
+
+            recent_games = [
+                (row['W_1'] + row['L_1']) if pd.notna(row['most_champ_1']) else 0,
+                (row['W_2'] + row['L_2']) if pd.notna(row['most_champ_2']) else 0
+            ]
+
+            total_recent_games = sum(recent_games)
+            total_season_games = sum(season_games)
+
+            if total_recent_games == 0:
+                return {'loyalty_score': 0, 'confidence_score': 0, **champ_loyalty_flags}
+
+            loyalty_score = 0
+            for idx, champ in enumerate(recent_champs):
+                if champ in season_champs:
+                    season_idx = season_champs.index(champ)
+
+                    recent_weight = recent_games[idx] / total_recent_games
+                    season_weight = season_games[season_idx] / total_season_games
+                    position_weight = 1.7 if idx == 0 else 1.3
+                    seasonal_position_weight = 1.3 if season_idx < 3 else 1.0
+
+                    combined_weight = (
+                        recent_weight * 0.6 +
+                        season_weight * 0.4
+                    ) * position_weight * seasonal_position_weight
+
+                    loyalty_score += combined_weight
+
+            confidence_score = 0
+            confidence_score += 0.5 if pd.notna(row['most_champ_1']) else 0
+            confidence_score += 0.2 if pd.notna(row['most_champ_2']) else 0
+            confidence_score += sum(0.1 for i in range(1, 4) if pd.notna(row[f'season_champ_{i}']))
+            confidence_score += sum(0.05 for i in range(4, 8) if pd.notna(row[f'season_champ_{i}']))
+
+            recent_games = sum((row[f'W_{i}'] + row[f'L_{i}']) if pd.notna(row[f'most_champ_{i}']) else 0
+                               for i in range(1, 3))
+            confidence_score += min(0.1, recent_games / 100)
+
+            return {
+                'loyalty_score': round(min(loyalty_score, 1.0), 3),
+                'confidence_score': round(min(confidence_score, 1.0), 3),
+                **champ_loyalty_flags
+            }
+
+        except Exception:
+            return {'loyalty_score': 0, 'confidence_score': 0, 'recent_champ_1_loyal': 0, 'recent_champ_2_loyal': 0}
+
+    results = df.apply(get_loyalty_scores, axis=1)
+    df['champion_loyalty_score'] = results.apply(lambda x: x['loyalty_score'])
+    df['loyalty_confidence_score'] = results.apply(lambda x: x['confidence_score'])
+    df['recent_champ_1_loyal'] = results.apply(lambda x: x['recent_champ_1_loyal'])
+    df['recent_champ_2_loyal'] = results.apply(lambda x: x['recent_champ_2_loyal'])
+    return df
+
+
+def with_degenerate_rows(df):
+    """df followed by copies of its first rows without recent champions, season champions or games"""
+    head = df.head(5)
+    no_recent = head.copy()
+    no_recent[RECENT_CHAMPS] = np.nan
+    no_season = head.copy()
+    no_season[SEASON_CHAMPS] = np.nan
+    no_recent_games = head.copy()
+    no_recent_games[['W_1', 'L_1', 'W_2', 'L_2']] = 0
+    # Matching champions with no season games divide by zero in the per-row version
+    no_season_games = head.copy()
+    no_season_games[SEASON_GAMES] = 0
+    second_only = head.copy()
+    second_only['most_champ_1'] = np.nan
+    return pd.concat([df, no_recent, no_season, no_recent_games, no_season_games, second_only], ignore_index=True)
+
+
+def divides_by_zero(df):
+    """
+    Rows the per-row version divides by zero on: a recent champion with recent games is one
+    of the season champions, and the season champions have no games
+    """
+    def row_divides(row):
+        season_champs = [row[col] for col in SEASON_CHAMPS if pd.notna(row[col])]
+        recent_games = sum(row[f'W_{i}'] + row[f'L_{i}'] for i in (1, 2) if pd.notna(row[f'most_champ_{i}']))
+        matched = any(pd.notna(row[col]) and row[col] in season_champs for col in RECENT_CHAMPS)
+        return matched and recent_games > 0 and row[SEASON_GAMES].fillna(0).sum() == 0
+    return df.apply(row_divides, axis=1).to_numpy(dtype=bool)
+
+
+def assert_same_loyalty(df):
+    with np.errstate(divide='ignore', invalid='ignore'), contextlib.redirect_stdout(io.StringIO()):
+        expected = reference_champion_loyalty(df)
+        result = calculate_champion_loyalty(df)
+    # The per-row version fails on these rows (0 everywhere) on mixed frames but gives a NaN
+    # loyalty score on all-numeric frames; the vectorized version scores them 0 everywhere
+    zero_season_games = divides_by_zero(df)
+    assert (result.loc[zero_season_games, LOYALTY_COLUMNS] == 0).all().all()
+    # The per-row version leaves integer zeros when no row matches, the scores are float64 now
+    pd.testing.assert_frame_equal(
+        result.loc[~zero_season_games, LOYALTY_COLUMNS], expected.loc[~zero_season_games, LOYALTY_COLUMNS],
+        check_dtype=False
+    )
+    assert result['champion_loyalty_score'].dtype == np.float64
+    assert result['loyalty_confidence_score'].dtype == np.float64
+
+
+@pytest.mark.parametrize("filename", MERGED_FILES)
+def test_matches_row_wise_on_merged_stats(filename):
+    """Champion names, as in player_stats_merged"""
+    assert_same_loyalty(with_degenerate_rows(read_data(filename)))
+
+
+def test_matches_row_wise_on_converted_features(converted_features):
+    """Champion numbers, as apply_feature_engineering sees them after convert_df"""
+    assert_same_loyalty(with_degenerate_rows(converted_features))
+
+
+def test_no_matching_rows():
+    df = read_data(MERGED_FILES[0]).head(10)
+    df[SEASON_CHAMPS] = np.nan
+    assert_same_loyalty(df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert (calculate_champion_loyalty(df)['champion_loyalty_score'] == 0).all()
+
+
+def test_zero_season_games(converted_features):
+    """Matched champions whose season champions have no games score 0, the per-row version gives NaN"""
+    df = converted_features.head(5).copy()
+    df[SEASON_GAMES] = 0
+    assert divides_by_zero(df).all()
+    with np.errstate(divide='ignore', invalid='ignore'), contextlib.redirect_stdout(io.StringIO()):
+        assert reference_champion_loyalty(df)['champion_loyalty_score'].isna().all()
+        result = calculate_champion_loyalty(df)
+    expected = pd.DataFrame(0.0, index=df.index, columns=LOYALTY_COLUMNS)
+    pd.testing.assert_frame_equal(result[LOYALTY_COLUMNS], expected, check_dtype=False)
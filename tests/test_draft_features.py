@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper import convert_df, apply_feature_engineering
+from feature_eng import create_champion_features
+from draft_features import DraftFeatureBuilder, CategoryEncoder, MODEL_FEATURES, lock_in_sequence
+from conftest import MERGED_FILES, read_data
+
+TEAM_COLUMNS = [f'team_champ{i}' for i in range(1, 5)]
+OPP_COLUMNS = [f'opp_champ{i}' for i in range(1, 6)]
+
+# Match columns of a player_stats_merged row, everything else is the player's profile
+MATCH_COLUMNS = (
+    ['player_id', 'region', 'date', 'champion', 'level', 'team', 'result', 'match_length_mins', 'kill',
+     'death', 'assist', 'kda_ratio', 'kill_participation', 'laning', 'cs', 'cs_per_min', 'avg_tier'] +
+    [f'teammates{i}' for i in range(1, 5)] + [f'oppmates{i}' for i in range(1, 6)] +
+    TEAM_COLUMNS + OPP_COLUMNS
+)
+
+
+def batch_frame(merged, meta_stats, weekly_meta):
+    """Batch pipeline output the model is trained on, MODEL_FEATURES columns"""
+    features = create_champion_features(merged.copy(), meta_stats, weekly_meta, use_checkpoint=False, save=False)
+    features = apply_feature_engineering(convert_df(features)).drop(columns=['champion', 'region'])
+    assert list(features.columns) == MODEL_FEATURES
+    return features
+
+
+def model_input(frame):
+    """
+    What XGBoost (enable_categorical=True) sees of a batch frame: float32 in MODEL_FEATURES
+    order, categorical columns as their category codes
+    """
+    columns = []
+    for col in MODEL_FEATURES:
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.codes.astype(np.float32).where(values.cat.codes >= 0)
+        columns.append(values.to_numpy(dtype=np.float32, na_value=np.nan))
+    return np.column_stack(columns)
+
+
+def as_profile(record):
+    """get_player_stats record of a merged row: profile columns without the _profile suffix"""
+    profile = {key: value for key, value in record.items() if key not in MATCH_COLUMNS}
+    for key in [key for key in profile if key.endswith('_profile')]:
+        profile[key[:-len('_profile')]] = profile.pop(key)
+    return profile
+
+
+def draft_of(record):
+    return [record[col] for col in TEAM_COLUMNS], [record[col] for col in OPP_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def builder(meta_stats, weekly_meta):
+    return DraftFeatureBuilder(meta_stats, weekly_meta)
+
+
+@pytest.mark.parametrize("filename", MERGED_FILES)
+def test_matches_batch_pipeline(filename, builder, meta_stats, weekly_meta):
+    merged = read_data(filename)
+    merged = merged[merged['champion'].notna()].reset_index(drop=True)
+    frame = batch_frame(merged, meta_stats, weekly_meta)
+    expected = model_input(frame)
+    # The categories a model trained on this frame was fitted with
+    encoder = CategoryEncoder.from_frame(frame)
+    assert set(encoder.categories) == {
+        'most_role_1', 'most_role_2', 'most_role_3', 'champ_variety_score', 'playstyle',
+        'role_specialization', 'recent_champ_1_loyal', 'recent_champ_2_loyal'
+    }
+
+    records = merged.to_dict('records')
+    built = np.array([builder.build(record, *draft_of(record)) for record in records])
+    np.testing.assert_array_equal(encoder.encode(built), expected)
+
+    # A get_player_stats record (no _profile suffix) gives the same vector
+    from_profiles = np.array([builder.build(as_profile(record), *draft_of(record)) for record in records])
+    np.testing.assert_array_equal(encoder.encode(from_profiles), expected)
+
+
+def test_category_codes():
+    encoder = CategoryEncoder({'most_role_1': [1, 2, 4, 5], 'most_role_3': [1.0, 4.0, 'Unknown']})
+    np.testing.assert_array_equal(encoder.codes('most_role_1', [1, 4, 5, 3, np.nan]), [0, 2, 3, np.nan, np.nan])
+    # Missing values take the 'Unknown' category where training had one
+    np.testing.assert_array_equal(encoder.codes('most_role_3', [4, np.nan, 2]), [1, 2, np.nan])
+
+    matrix = np.zeros((1, len(MODEL_FEATURES)), dtype=np.float32)
+    matrix[0, MODEL_FEATURES.index('most_role_1')] = 4
+    matrix[0, MODEL_FEATURES.index('avg_kills')] = 4
+    encoded = encoder.encode(matrix)
+    assert encoded[0, MODEL_FEATURES.index('most_role_1')] == 2
+    assert encoded[0, MODEL_FEATURES.index('avg_kills')] == 4
+    assert matrix[0, MODEL_FEATURES.index('most_role_1')] == 4
+
+
+def test_categories_round_trip(merged_stats, meta_stats, weekly_meta, tmp_path):
+    encoder = CategoryEncoder.from_frame(batch_frame(merged_stats, meta_stats, weekly_meta))
+    encoder.save(tmp_path / "categories.json")
+    assert CategoryEncoder.load(tmp_path / "categories.json").categories == encoder.categories
+
+
+def test_drafts_share_the_player_state(builder, merged_stats):
+    record = merged_stats.iloc[0].to_dict()
+    team, opp = draft_of(record)
+    state = builder.player_state(record)
+
+    drafts = lock_in_sequence(team, opp)
+    matrix = builder.drafts_features(state, drafts)
+    assert matrix.shape == (len(opp) + 1, len(MODEL_FEATURES))
+    for row, (draft_team, draft_opp) in zip(matrix, drafts):
+        np.testing.assert_array_equal(row, builder.build(record, draft_team, draft_opp))
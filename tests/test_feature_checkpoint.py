@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+from feature_checkpoint import FeatureCheckpoint
+from feature_eng import create_champion_features
+
+CHAMPIONS = ['Ahri', 'Zed']
+
+
+def test_resume_reads_completed_batches(tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    checkpoint = FeatureCheckpoint(checkpoint_dir, fingerprint='a', batch_size=2, total_rows=4, columns=CHAMPIONS)
+    checkpoint.write_batch(0, 2, np.array([[0.5, 0.25], [1.0, 0.0]]))
+
+    resumed = FeatureCheckpoint(checkpoint_dir, fingerprint='a', batch_size=2, total_rows=4, columns=CHAMPIONS)
+    assert resumed.has_batch(0) and not resumed.has_batch(2)
+    np.testing.assert_array_equal(resumed.read_batch(0), [[0.5, 0.25], [1.0, 0.0]])
+
+    # Another fingerprint starts over
+    restarted = FeatureCheckpoint(checkpoint_dir, fingerprint='b', batch_size=2, total_rows=4, columns=CHAMPIONS)
+    assert restarted.completed_rows() == 0
+
+
+def test_clear_keeps_other_files(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "meta_stats.csv").write_text("champion\nAhri\n")
+
+    checkpoint = FeatureCheckpoint(str(data_dir), fingerprint='a', batch_size=2, total_rows=2, columns=CHAMPIONS)
+    checkpoint.write_batch(0, 2, np.zeros((2, 2)))
+    FeatureCheckpoint(str(data_dir), fingerprint='b', batch_size=2, total_rows=2, columns=CHAMPIONS).clear()
+
+    assert sorted(os.listdir(data_dir)) == ["meta_stats.csv"]
+
+    # A directory holding only the checkpoint is removed with it
+    own_dir = tmp_path / "checkpoint"
+    checkpoint = FeatureCheckpoint(str(own_dir), fingerprint='a', batch_size=2, total_rows=2, columns=CHAMPIONS)
+    checkpoint.write_batch(0, 2, np.zeros((2, 2)))
+    checkpoint.clear()
+    assert not own_dir.exists()
+
+
+def test_score_dtype_is_part_of_the_fingerprint(merged_stats, meta_stats, weekly_meta, tmp_path, monkeypatch):
+    """A float32 checkpoint left by an interrupted run must not resume into a float64 run"""
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    # Keep the shards as an interrupted run would leave them
+    monkeypatch.setattr(FeatureCheckpoint, 'clear', lambda self: None)
+    create_champion_features(merged_stats.copy(), meta_stats, weekly_meta, checkpoint_dir=checkpoint_dir,
+                             score_dtype=np.float32, save=False)
+    monkeypatch.undo()
+
+    resumed = create_champion_features(merged_stats.copy(), meta_stats, weekly_meta, checkpoint_dir=checkpoint_dir,
+                                       score_dtype=np.float64, save=False)
+    expected = create_champion_features(merged_stats.copy(), meta_stats, weekly_meta, use_checkpoint=False,
+                                        score_dtype=np.float64, save=False)
+    assert resumed.equals(expected)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from helper import FeatureStore, apply_feature_engineering
+
+SEASON_CHAMPS = [f'season_champ_{i}' for i in range(1, 8)]
+
+
+def test_incremental_matches_full_run(converted_features, tmp_path):
+    store = FeatureStore(str(tmp_path / "features.db"))
+    try:
+        first = apply_feature_engineering(converted_features.iloc[:60], incremental=True, feature_store=store)
+        pd.testing.assert_frame_equal(first, apply_feature_engineering(converted_features.iloc[:60]))
+
+        # 60 rows come from the store, 40 are computed
+        full = apply_feature_engineering(converted_features, incremental=True, feature_store=store)
+        pd.testing.assert_frame_equal(full, apply_feature_engineering(converted_features))
+    finally:
+        store.close()
+
+
+def test_degenerate_row_keeps_cached_values(converted_features, tmp_path):
+    """
+    A new row without season champions makes every loyalty score of its batch 0. Storing it
+    must not drop the cached vectors or cast the cached float scores to integers.
+    """
+    stored_rows = converted_features.iloc[:-1]
+    new_row = converted_features.iloc[[-1]].copy()
+    new_row[SEASON_CHAMPS] = np.nan
+    frame = pd.concat([stored_rows, new_row])
+
+    store = FeatureStore(str(tmp_path / "features.db"))
+    try:
+        cached = apply_feature_engineering(stored_rows, incremental=True, feature_store=store)
+        assert (cached['champion_loyalty_score'] > 0).any()
+
+        result = apply_feature_engineering(frame, incremental=True, feature_store=store)
+        pd.testing.assert_frame_equal(result.iloc[:-1], cached)
+        pd.testing.assert_frame_equal(result, apply_feature_engineering(frame))
+
+        count = store.conn.execute(
+            "SELECT COUNT(*) FROM features WHERE namespace = 'feature_engineering'"
+        ).fetchone()[0]
+        assert count == len(frame)
+    finally:
+        store.close()
+
+
+def test_save_widens_integer_columns(tmp_path):
+    store = FeatureStore(str(tmp_path / "features.db"))
+    try:
+        store.save('scores', np.array([1, 2]), 'snap', np.array([[0.5], [0.25]]), {'score': 'float64'})
+        columns = store.save('scores', np.array([3]), 'snap', np.array([[0.0]]), {'score': 'int64'})
+        assert columns == {'score': 'float64'}
+
+        found, values = store.lookup('scores', np.array([1, 2, 3]), 'snap')
+        assert found.all()
+        np.testing.assert_array_equal(values[:, 0], [0.5, 0.25, 0.0])
+
+        # Another float precision is a different set of vectors
+        store.save('scores', np.array([4]), 'snap', np.array([[1.0]]), {'score': 'float32'})
+        found, _ = store.lookup('scores', np.array([1, 4]), 'snap')
+        np.testing.assert_array_equal(found, [False, True])
+    finally:
+        store.close()
+
+
+def test_incremental_empty_frame(converted_features, tmp_path):
+    store = FeatureStore(str(tmp_path / "features.db"))
+    try:
+        result = apply_feature_engineering(converted_features.iloc[:0], incremental=True, feature_store=store)
+        assert result.empty
+    finally:
+        store.close()
@@ -0,0 +1,135 @@
+import pathlib
+
+import pandas as pd
+import pytest
+
+# The backend and the scrapers it reuses need the scraping requirements
+for module in ("lxml", "cssselect", "requests", "selenium", "webdriver_manager"):
+    pytest.importorskip(module)
+
+from selenium.webdriver.common.by import By
+
+from helper import coerce_scraped
+from http_backend import (FixtureClient, fixture_path, parse_html, static_match_date,
+                          get_player_stats, get_matches_stats, get_meta_stats)
+from Player_scrapper import BASE_URL, MASTERY_URL, extract_profile, get_mastery_data, build_player_frames
+from Recent_match_scrapper import extract_matches
+from Meta_scrapper import BASE_URL as META_URL, ROLES, TABLE_SELECTOR, extract_champion_table
+from conftest import FIXTURE_DIR
+
+# Player whose profile and mastery pages are saved under util/data/fixtures
+REGION = "euw"
+USERNAME = "Agurin--EUW"
+PROFILE_URL = BASE_URL.format(region=REGION, username=USERNAME)
+PROFILE_MASTERY_URL = MASTERY_URL.format(region=REGION, username=USERNAME)
+
+
+@pytest.fixture
+def client():
+    return FixtureClient(FIXTURE_DIR)
+
+
+def test_stats_text_is_laid_out_like_webelement_text(client):
+    stats = client.page(PROFILE_URL).find_element(By.CSS_SELECTOR, "div.stats-box div.stats")
+    assert stats.text == "20G 13W 7L\n65%\n5.1 / 4.0 / 7.9\n3.25:1\nP/Kill 55%"
+
+
+def test_player_stats_from_fixture(client):
+    merged_df, dfs = get_player_stats(REGION, USERNAME, client=client, fallback=False)
+
+    assert len(merged_df) == 1
+    assert set(dfs) == {'recent_stats', 'recent_champions', 'preferred_roles', 'season_data', 'weekly_stats', 'mastery_data'}
+    player = merged_df.iloc[0]
+    assert (player['player_id'], player['region']) == (USERNAME, REGION)
+    assert (player['total_games'], player['wins'], player['losses'], player['win_rate']) == (20, 13, 7, 0.65)
+    assert (player['avg_kills'], player['avg_deaths'], player['avg_assists']) == (5.1, 4.0, 7.9)
+    assert (player['most_champ_1'], player['W_1'], player['L_1'], player['KDA_1']) == ("Elise", 6, 2, 4.5)
+    assert (player['most_role_1'], player['most_role_1_value'], player['most_role_2']) == ("JUNGLE", 0.85, "MID")
+    assert (player['season_champ_2'], player['games_ssn_2'], player['wr_ssn_2']) == ("Jarvan IV", 20, 0.55)
+    assert player['season_champ_5'] is None
+    assert (player['7d_champ_1'], player['7d_total_1'], player['7d_WR_1']) == ("Elise", 7, 0.71)
+    assert (player['mastery_champ_4'], player['m_lv_4']) == ("Vi", 12)
+
+
+def test_matches_from_fixture(client):
+    matches = get_matches_stats(REGION, USERNAME, client=client, fallback=False)
+
+    assert matches['date'].tolist() == [
+        "Sat, Jan 11, 2025 3:46 AM", "Fri, Jan 10, 2025 11:05 PM", "Fri, Jan 10, 2025 9:12 PM"
+    ]
+    assert matches['champion'].tolist() == ["Jarvan IV", "Elise", "Lee Sin"]
+    assert matches['team'].tolist() == ["blue", "red", "blue"]
+    assert matches['result'].tolist() == [1, 0, 1]
+    first = matches.iloc[0]
+    assert (first['kill'], first['death'], first['assist'], first['cs'], first['cs_per_min']) == (3, 6, 7, 177, 6.1)
+    assert [first[f'team_champ{i}'] for i in range(1, 5)] == ["K'Sante", "Orianna", "Kai'Sa", "Rakan"]
+    assert [first[f'opp_champ{i}'] for i in range(1, 6)] == ["Aatrox", "Vi", "Ahri", "Jinx", "Nautilus"]
+    # The red side player gets the red side as teammates
+    assert matches.iloc[1]['team_champ1'] == "Renekton"
+
+
+def test_meta_stats_from_fixture(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # get_meta_stats saves util/data/meta_stats
+    meta = get_meta_stats(client=client, fallback=False)
+
+    assert len(meta) == 15
+    assert meta['role'].unique().tolist() == ROLES
+    ahri = meta[meta['champion'] == "Ahri"].iloc[0]
+    assert (ahri['tier'], ahri['win_rate'], ahri['pick_rate'], ahri['ban_rate']) == (1, 0.521, 0.083, 0.045)
+    assert [ahri['counter1'], ahri['counter2'], ahri['counter3']] == ["Zed", "Yasuo", "Kassadin"]
+    # Unknown tier colours and missing counters
+    lee_sin = meta[meta['champion'] == "Lee Sin"].iloc[0]
+    assert (lee_sin['tier'], lee_sin['counter1']) == (5, "")
+    assert (tmp_path / "util" / "data" / "meta_stats.parquet").exists()
+
+
+def test_missing_page_without_fallback(client):
+    merged_df, dfs = get_player_stats(REGION, "Nobody--EUW", client=client, fallback=False)
+    assert merged_df is None and dfs == {}
+    assert get_matches_stats(REGION, "Nobody--EUW", client=client, fallback=False).empty
+
+
+@pytest.fixture(scope="module")
+def browser():
+    """Headless Chrome for loading the fixture pages, the Selenium comparisons skip without one"""
+    from selenium import webdriver
+    from driver_pool import chrome_options
+    try:
+        driver = webdriver.Chrome(options=chrome_options(window_size="1920,1080"))
+    except Exception as e:
+        pytest.skip(f"Chrome is not available: {e}")
+    yield driver
+    driver.quit()
+
+
+def load(browser, url):
+    browser.get(pathlib.Path(fixture_path(url, FIXTURE_DIR)).as_uri())
+
+
+def test_player_stats_match_selenium(browser, client):
+    load(browser, PROFILE_URL)
+    player_data = extract_profile(browser, timeout=5)
+    load(browser, PROFILE_MASTERY_URL)
+    player_data['mastery_data'] = get_mastery_data(browser, timeout=5)
+    expected, _ = build_player_frames(player_data, REGION, USERNAME)
+
+    merged_df, _ = get_player_stats(REGION, USERNAME, client=client, fallback=False)
+    pd.testing.assert_frame_equal(merged_df, expected)
+
+
+def test_matches_match_selenium(browser, client):
+    load(browser, PROFILE_URL)
+    # Both read the date from the time stamp markup, the hover tooltip needs OP.GG's scripts
+    rows = extract_matches(browser, USERNAME, timeout=5, read_date=static_match_date)
+    expected = coerce_scraped(pd.DataFrame(rows), 'recent_matches')
+
+    pd.testing.assert_frame_equal(get_matches_stats(REGION, USERNAME, client=client, fallback=False), expected)
+
+
+@pytest.mark.parametrize("role", ROLES)
+def test_meta_table_matches_selenium(browser, client, role):
+    load(browser, META_URL.format(role=role))
+    expected = extract_champion_table(browser.find_element(By.CSS_SELECTOR, TABLE_SELECTOR), role)
+
+    table = parse_html(client.fetch(META_URL.format(role=role))).find_element(By.CSS_SELECTOR, TABLE_SELECTOR)
+    assert extract_champion_table(table, role) == expected
@@ -0,0 +1,222 @@
+import contextlib
+import http.client
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("xgboost")
+
+from draft_features import CategoryEncoder
+from predictor_service import BatchingPredictor, make_handler
+from test_draft_features import draft_of
+
+
+def test_matches_xgbclassifier_on_batch_frame(predictor, stand_in_model, monkeypatch):
+    _, classifier, X = stand_in_model
+    expected = classifier.predict_proba(X)
+    np.testing.assert_allclose(predictor.predict_proba(X), expected, rtol=1e-5, atol=1e-6)
+
+    # Categorical values passed as if they were codes reach the trees as other categories
+    monkeypatch.setattr(predictor, 'category_encoder', CategoryEncoder({}))
+    assert not np.allclose(predictor.predict_proba(X), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_draft_rows_match_xgbclassifier(predictor, stand_in_model, merged_stats):
+    _, classifier, X = stand_in_model
+    expected = classifier.predict_proba(X)
+
+    records = merged_stats.to_dict('records')
+    proba = np.concatenate([
+        predictor.predict_proba(predictor.draft_matrix(record, [draft_of(record)])) for record in records
+    ])
+    np.testing.assert_allclose(proba, expected, rtol=1e-5, atol=1e-6)
+
+    # Feature dicts with raw values, as /predict receives them
+    rows = [predictor.feature_builder.as_dict(predictor.feature_builder.build(record, *draft_of(record)))
+            for record in records]
+    np.testing.assert_allclose(predictor.predict_proba(rows), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_needs_categories_of_categorical_features(stand_in_model, tmp_path):
+    import shutil
+    from predictor_service import ChampionPredictor, MODEL_FILE, ENCODER_FILE
+    model_dir = stand_in_model[0]
+    for name in (MODEL_FILE, ENCODER_FILE):
+        shutil.copy(model_dir / name, tmp_path / name)
+    with pytest.raises(ValueError, match="categorical features"):
+        ChampionPredictor(str(tmp_path))
+
+
+@contextlib.contextmanager
+def serving(predictor, timeout=2.0, max_wait_ms=None):
+    """BatchingPredictor behind an in-process HTTP server, yields post(path, body) and get(path)"""
+    batcher = BatchingPredictor(predictor, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher, timeout=timeout))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def request(method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        try:
+            if body is not None and not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+            conn.request(method, path, body=body)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    try:
+        yield (lambda path, body: request("POST", path, body)), (lambda path: request("GET", path))
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+
+def count_calls(monkeypatch, predictor, name):
+    calls = []
+    method = getattr(predictor, name)
+
+    def counted(*args):
+        calls.append(args)
+        return method(*args)
+
+    monkeypatch.setattr(predictor, name, counted)
+    return calls
+
+
+def as_json(record):
+    return {key: None if pd.isna(value) else value for key, value in record.items()}
+
+
+def test_batched_results_are_split_back_in_order(predictor, stand_in_model, monkeypatch):
+    X = stand_in_model[2]
+    calls = count_calls(monkeypatch, predictor, 'predict_proba')
+    # Requests of 1, 2, 3 and 4 rows, queued well within one collection window
+    requests = [X.iloc[start:start + size] for start, size in [(0, 1), (1, 2), (3, 3), (6, 4)]]
+    batcher = BatchingPredictor(predictor, max_wait_ms=500)
+    try:
+        futures = [batcher.submit(rows, k) for rows, k in zip(requests, [1, 2, 3, 4])]
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.close()
+
+    assert len(calls) == 1 and len(calls[0][0]) == 10
+    for rows, k, result in zip(requests, [1, 2, 3, 4], results):
+        assert result == predictor.predict(rows, k)
+        assert [len(top) for top in result] == [k] * len(rows)
+
+
+def test_max_batch_size_splits_batches(predictor, stand_in_model, monkeypatch):
+    X = stand_in_model[2]
+    calls = count_calls(monkeypatch, predictor, 'predict_proba')
+    batcher = BatchingPredictor(predictor, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(X.iloc[[i]]) for i in range(8)]
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.close()
+    assert [len(args[0]) for args in calls] == [4, 4]
+    assert results == [predictor.predict(X.iloc[[i]]) for i in range(8)]
+
+
+def test_worker_survives_failing_requests(predictor, stand_in_model, monkeypatch):
+    X = stand_in_model[2]
+    top_k = predictor.top_k
+
+    def failing_top_k(proba, k=5):
+        if k == 2:
+            raise RuntimeError("decode failed")
+        return top_k(proba, k)
+
+    monkeypatch.setattr(predictor, 'top_k', failing_top_k)
+    batcher = BatchingPredictor(predictor, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(X.iloc[[i]], k) for i, k in enumerate([1, 2, 3])]
+        assert futures[0].result(timeout=5) == predictor.predict(X.iloc[[0]], 1)
+        with pytest.raises(RuntimeError, match="decode failed"):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) == predictor.predict(X.iloc[[2]], 3)
+
+        # Invalid requests fail before they reach the worker
+        for k in (-1000, -1, 0, len(predictor.class_names) + 1, 1.5, "5", True):
+            with pytest.raises(ValueError, match="k must be"):
+                batcher.predict(X.iloc[[0]], k, timeout=5)
+        with pytest.raises(ValueError, match="features"):
+            batcher.predict(np.zeros((1, 3), dtype=np.float32), timeout=5)
+
+        # A booster error fails its whole batch, the next one is served
+        monkeypatch.setattr(predictor, 'predict_proba', lambda rows: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            batcher.predict(X.iloc[[0]], timeout=5)
+        monkeypatch.undo()
+        assert batcher.predict(X.iloc[[3]], 4, timeout=5) == predictor.predict(X.iloc[[3]], 4)
+    finally:
+        batcher.close()
+
+
+def test_endpoints(predictor, merged_stats):
+    record = merged_stats.iloc[0].to_dict()
+    team, opp = draft_of(record)
+    rows = [predictor.feature_builder.as_dict(predictor.feature_builder.build(record, team, opp[:i]))
+            for i in range(3)]
+
+    with serving(predictor) as (post, get):
+        assert get("/health") == (200, {"status": "ok", "features": len(predictor.feature_names)})
+        assert get("/metrics")[0] == 404
+
+        status, body = post("/predict", {"rows": rows, "k": 3})
+        assert status == 200
+        assert body["predictions"] == predictor.predict(rows, 3)
+
+        # Opponents locked in one at a time, one top k list per draft
+        status, body = post("/what_if", {"profile": as_json(record), "team": team, "opp": opp, "k": 2})
+        assert status == 200
+        drafts = [(team, opp[:count]) for count in range(len(opp) + 1)]
+        assert body["predictions"] == predictor.predict(predictor.draft_matrix(record, drafts), 2)
+
+        status, body = post("/what_if", {"profile": as_json(record), "drafts": [{"team": team, "opp": opp}]})
+        assert status == 200
+        assert body["predictions"] == predictor.predict(predictor.draft_matrix(record, [(team, opp)]))
+
+        assert post("/unknown", {})[0] == 404
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict", b"{not json"),
+    ("/predict", [1, 2]),
+    ("/predict", {}),
+    ("/predict", {"rows": 5}),
+    ("/predict", {"rows": [{"avg_kills": "many"}]}),
+    ("/predict", {"rows": [{}], "k": -1000}),
+    ("/predict", {"rows": [{}], "k": 0}),
+    ("/predict", {"rows": [{}], "k": 100000}),
+    ("/predict", {"rows": [{}], "k": "5"}),
+    ("/what_if", {"team": ["Ahri"]}),
+    ("/what_if", {"profile": {}, "drafts": 5}),
+])
+def test_bad_requests_get_400(predictor, path, body):
+    with serving(predictor) as (post, _):
+        status, response = post(path, body)
+        assert status == 400 and response["error"]
+        # The worker still serves
+        assert post("/predict", {"rows": [{}], "k": 1})[0] == 200
+
+
+def test_timeout_gets_503(predictor, monkeypatch):
+    predict_proba = predictor.predict_proba
+
+    def slow_predict_proba(rows):
+        time.sleep(0.5)
+        return predict_proba(rows)
+
+    monkeypatch.setattr(predictor, 'predict_proba', slow_predict_proba)
+    with serving(predictor, timeout=0.05) as (post, _):
+        status, body = post("/predict", {"rows": [{}]})
+    assert status == 503 and "timed out" in body["error"]
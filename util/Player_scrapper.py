@@ -1,38 +1,22 @@
-import os
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
-from helper import format_summoner_name
+from helper import format_summoner_name, coerce_scraped
+from data_store import save_dataset, load_dataset, remove_dataset
+from driver_pool import get_pool
+from scrape_executor import ScrapeExecutor, WORKERS
+from Recent_match_scrapper import extract_matches, match_driver_pool
 
 # Constants
 BASE_URL = "https://www.op.gg/summoners/{region}/{username}?queue_type=SOLORANKED"
 MASTERY_URL = "https://www.op.gg/summoners/{region}/{username}/mastery"
 
-def setup_driver():
-    """Setup optimized Chrome WebDriver"""
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-logging")
-    options.add_argument("--log-level=3")
-    options.add_argument("--disable-extensions")
-    options.page_load_strategy = 'eager'
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-
 def wait_and_find_element(driver, selector, timeout=20, description="element"):
-    """Utility function for waiting and finding elements"""
+    """Utility function for waiting and finding elements, timeout=0 looks once (static HTML pages)"""
     try:
+        if not timeout:
+            return driver.find_element(By.CSS_SELECTOR, selector)
         element = WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, selector))
         )
@@ -307,15 +291,16 @@ def get_season_data(season_champ_box):
     
     return season_data
 
-def get_mastery_data(driver):
+def get_mastery_data(driver, timeout=20):
     # Initialize dictionary with metadata
     mastery_data = { }
     
     try:
-        # Wait for container to load
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.css-zefc5s.e1poynyt0"))
-        )
+        # Wait for container to load (static HTML pages pass timeout=0)
+        if timeout:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.css-zefc5s.e1poynyt0"))
+            )
         
         # Get all champion boxes (limiting to first 16)
         champion_boxes = driver.find_elements(By.CSS_SELECTOR, "div.css-8fea4f.e1poynyt1")[:16]
@@ -343,202 +328,378 @@ def get_mastery_data(driver):
     return mastery_data
 
 
-def get_player_stats(region, username):
-    """Main function to get player statistics"""
-    driver = None
-    try:
-        driver = setup_driver()
-        
-        # Format URLs
-        profile_url = BASE_URL.format(region=region, username=username)
-        mastery_url = MASTERY_URL.format(region=region, username=username)
-        
-        # Get main profile data
-        driver.get(profile_url)
-        
-        # Find main containers
-        main_container = wait_and_find_element(driver, "#content-container")
-        if not main_container:
-            raise Exception("Could not find main container")
-            
-        stats_box = wait_and_find_element(
-            driver,
-            "div.stats-box.stats-box--SOLORANKED"
-        )
-        
-        season_champ_box = wait_and_find_element(
-            driver,
-            "div:nth-child(1) > div.css-18w3o0f.ere6j7v0"
-        )
+def extract_profile(driver, timeout=20):
+    """Stats box, season champions and 7-day ranked box of the profile page loaded in driver"""
+    # Find main containers
+    main_container = wait_and_find_element(driver, "#content-container", timeout)
+    if not main_container:
+        raise Exception("Could not find main container")
+    
+    stats_box = wait_and_find_element(
+        driver,
+        "div.stats-box.stats-box--SOLORANKED",
+        timeout
+    )
 
-        ranked_7d_box = wait_and_find_element(
-            driver,
-            "div[class*='efsztyx0']"
-        )
+    season_champ_box = wait_and_find_element(
+        driver,
+        "div:nth-child(1) > div.css-18w3o0f.ere6j7v0",
+        timeout
+    )
 
-        # Extract all stats
-        player_data = {
-            'recent_stats': get_recent_stats(stats_box) if stats_box else None,
-            'recent_champions': get_recent_champions(stats_box) if stats_box else None,
-            'preferred_roles': get_preferred_role(stats_box) if stats_box else None,
-            'season_data': get_season_data(season_champ_box) if season_champ_box else None,
-            'weekly_stats': get_weekly_stats(ranked_7d_box) if ranked_7d_box else None,
-        }
+    ranked_7d_box = wait_and_find_element(
+        driver,
+        "div[class*='efsztyx0']",
+        timeout
+    )
+
+    # Extract all stats
+    return {
+        'recent_stats': get_recent_stats(stats_box) if stats_box else None,
+        'recent_champions': get_recent_champions(stats_box) if stats_box else None,
+        'preferred_roles': get_preferred_role(stats_box) if stats_box else None,
+        'season_data': get_season_data(season_champ_box) if season_champ_box else None,
+        'weekly_stats': get_weekly_stats(ranked_7d_box) if ranked_7d_box else None,
+    }
+
+def build_player_frames(player_data, region, username):
+    """Merge the extracted sections of one player into a single typed row, returns (merged_df, dfs)"""
+    # Create DataFrames
+    dfs = {}
+    for key, data in player_data.items():
+        if data:
+            dfs[key] = pd.DataFrame([data])
+
+    # Add player ID and region to each DataFrame
+    for df in dfs.values():
+        df.insert(0, 'player_id', username)  # Insert player_id as first column
+        df.insert(1, 'region', region)      # Insert region as second column
+
+    # Merge all DataFrames into one
+    merged_df = None
+    for name, df in dfs.items():
+        if merged_df is None:
+            merged_df = df
+        else:
+            # Drop common columns except player_id and region
+            common_cols = df.columns.intersection(merged_df.columns)
+            cols_to_drop = [col for col in common_cols if col not in ['player_id', 'region']]
+            df_to_merge = df.drop(columns=cols_to_drop, errors='ignore')
+            merged_df = pd.merge(merged_df, df_to_merge, on=['player_id', 'region'], how='outer')
+
+    # Ensure player_id and region are the first columns in final order
+    if merged_df is not None and not merged_df.empty:
+        # Get all columns except player_id and region
+        other_cols = [col for col in merged_df.columns if col not in ['player_id', 'region']]
+        # Reorder columns with player_id and region first
+        merged_df = merged_df[['player_id', 'region'] + other_cols]
+        # Scraped values arrive as strings, type them once here
+        merged_df = coerce_scraped(merged_df, 'player_stats')
+
+    return merged_df, dfs
+
+def get_player_stats(region, username, pool=None):
+    """
+    Main function to get player statistics
+
+    pool: DriverPool to lease the browser from, defaults to the shared scraper pool
+    """
+    pool = pool if pool is not None else get_pool()
+    try:
+        with pool.driver() as driver:
+            # Format URLs
+            profile_url = BASE_URL.format(region=region, username=username)
+            mastery_url = MASTERY_URL.format(region=region, username=username)
         
-        # Get mastery data
-        driver.get(mastery_url)
-        mastery_data = get_mastery_data(driver)
-        player_data['mastery_data'] = mastery_data
-
-        # Create DataFrames
-        dfs = {}
-        for key, data in player_data.items():
-            if data:
-                dfs[key] = pd.DataFrame([data])
-
-        # Add player ID and region to each DataFrame
-        for df in dfs.values():
-            df.insert(0, 'player_id', username)  # Insert player_id as first column
-            df.insert(1, 'region', region)      # Insert region as second column
-
-        # Merge all DataFrames into one
-        merged_df = None
-        for name, df in dfs.items():
-            if merged_df is None:
-                merged_df = df
-            else:
-                # Drop common columns except player_id and region
-                common_cols = df.columns.intersection(merged_df.columns)
-                cols_to_drop = [col for col in common_cols if col not in ['player_id', 'region']]
-                df_to_merge = df.drop(columns=cols_to_drop, errors='ignore')
-                merged_df = pd.merge(merged_df, df_to_merge, on=['player_id', 'region'], how='outer')
-
-        # Ensure player_id and region are the first columns in final order
-        if merged_df is not None and not merged_df.empty:
-            # Get all columns except player_id and region
-            other_cols = [col for col in merged_df.columns if col not in ['player_id', 'region']]
-            # Reorder columns with player_id and region first
-            merged_df = merged_df[['player_id', 'region'] + other_cols]
-
-        # # Save merged DataFrame
-        # save_dir = "util/data"
-        # os.makedirs(save_dir, exist_ok=True)
+            # Get main profile data
+            driver.get(profile_url)
+            player_data = extract_profile(driver)
         
-        # if merged_df is not None and not merged_df.empty:
-        #     filepath = os.path.join(save_dir, f"player_stats.csv")
-        #     merged_df.to_csv(filepath, index=False)
-        #     print(f"Saved player stats to {filepath}")
+            # Get mastery data
+            driver.get(mastery_url)
+            mastery_data = get_mastery_data(driver)
+            player_data['mastery_data'] = mastery_data
 
-        return merged_df, dfs
+        return build_player_frames(player_data, region, username)
 
     except Exception as e:
         print(f"Error in get_player_stats: {e}")
         return None, {}
 
-    finally:
-        if driver:
-            driver.quit()
+def get_player_page_stats(region, username, pool=None):
+    """
+    Player stats and recent matches from a single load of the profile page
+
+    The stats box, season champions, 7-day box and match list are read from the same DOM,
+    then the mastery page is loaded once. Returns (merged_df, matches_df) like
+    get_player_stats and get_matches_stats, with None / an empty DataFrame for a failed half.
+
+    The page is read on the match scraper's browsers (match_driver_pool): the match dates come
+    from a hover tooltip, which needs their 1920x1080 window. Images are not loaded there,
+    the profile only reads their alt text.
+    """
+    pool = pool if pool is not None else match_driver_pool()
+    merged_df, matches_df = None, pd.DataFrame()
+    try:
+        with pool.driver() as driver:
+            driver.get(BASE_URL.format(region=region, username=username))
+
+            try:
+                player_data = extract_profile(driver)
+            except Exception as e:
+                print(f"Error extracting profile of {username}: {e}")
+                player_data = None
+
+            try:
+                matches_data = extract_matches(driver, username)
+                if matches_data:
+                    # Scraped values arrive as strings, type them once here
+                    matches_df = coerce_scraped(pd.DataFrame(matches_data), 'recent_matches')
+                else:
+                    print(f"No valid matches found for {username}")
+            except Exception as e:
+                print(f"Error extracting matches of {username}: {e}")
+
+            if player_data is not None:
+                driver.get(MASTERY_URL.format(region=region, username=username))
+                player_data['mastery_data'] = get_mastery_data(driver)
+
+        if player_data is not None:
+            merged_df, _ = build_player_frames(player_data, region, username)
 
-def get_multiple_player_stats(players_df):
+    except Exception as e:
+        print(f"Error in get_player_page_stats: {e}")
+
+    return merged_df, matches_df
+
+def get_multiple_player_stats(players_df, workers=WORKERS, limiter=None, scrape=None):
     """
     Get stats for multiple players from a DataFrame
     
     Parameters:
     players_df: DataFrame with columns 'region' and 'username'
+    workers: number of browsers scraping players at the same time
+    limiter: RateLimiter shared with other scrapers, defaults to a new per-region/per-host limiter
+    scrape: function (region, username) -> (merged_df, dfs) like get_player_stats
+        (e.g. http_backend.get_player_stats), defaults to Selenium on the shared browser pool
     """
-    all_merged_dfs = []
-    error_players = []
-    
-    save_dir = "util/data"
-    os.makedirs(save_dir, exist_ok=True)
-    checkpoint_file = os.path.join(save_dir, "player_stats_checkpoint.csv")
+    checkpoint_name = "player_stats_checkpoint"
     all_merged_dfs = []
     error_players = []
     
     # Load checkpoint if exists
-    start_idx = 0
-    if os.path.exists(checkpoint_file):
-        try:
-            checkpoint_df = pd.read_csv(checkpoint_file)
-            all_merged_dfs = [checkpoint_df]
-            # Get the number of players already processed
-            processed_players = set(checkpoint_df['player_id'])
-            # Filter out already processed players
-            players_df = players_df[~players_df['username'].isin(processed_players)]
-            print(f"Loaded checkpoint with {len(processed_players)} players already processed")
-        except Exception as e:
-            print(f"Error loading checkpoint: {e}")
+    try:
+        checkpoint_df = load_dataset('player_stats', filename=checkpoint_name)
+        all_merged_dfs = [checkpoint_df]
+        # Get the number of players already processed
+        processed_players = set(checkpoint_df['player_id'])
+        # Filter out already processed players
+        players_df = players_df[~players_df['username'].isin(processed_players)]
+        print(f"Loaded checkpoint with {len(processed_players)} players already processed")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading checkpoint: {e}")
 
-    print(f"Processing {len(players_df)} remaining players...")
-    
-    for idx, row in players_df.iterrows():
-        region = row['region'].lower()  # Ensure region is lowercase
-        username = row['username']
-        
+    print(f"Processing {len(players_df)} remaining players with {workers} workers...")
+
+    # Format usernames up front, the workers only scrape
+    players = []
+    for region, username in zip(players_df['region'], players_df['username']):
+        region = region.lower()  # Ensure region is lowercase
         try:
-            # Format the username
-            formatted_username = format_summoner_name(username)
-            print(f"\nProcessing player {idx + 1}/{len(players_df)}: {username} ({region})")
-            print(f"Formatted username: {formatted_username}")
-            
-            # Add delay between requests
-            if idx > 0:
-                time.sleep(2)
-                
-            merged_df, _ = get_player_stats(region, formatted_username)
-            if merged_df is not None and not merged_df.empty:
-                # Store original username in the DataFrame
-                merged_df['player_id'] = username  # Store original username
-                all_merged_dfs.append(merged_df)
-                print(f"Successfully processed {username}")
-
-                # Save checkpoint every 10 players
-                if len(all_merged_dfs) % 10 == 0:
-                    checkpoint_save = pd.concat(all_merged_dfs, ignore_index=True)
-                    checkpoint_save.to_csv(checkpoint_file, index=False)
-                    print(f"Saved checkpoint after processing {len(all_merged_dfs)} players")
-
-            else:
-                print(f"No data found for {username}")
-                error_players.append({
-                    'region': region,
-                    'username': username,
-                    'formatted_username': formatted_username,
-                    'error': 'No data found'
-                })
-                
+            players.append((region, username, format_summoner_name(username)))
         except Exception as e:
             print(f"Error processing {username}: {e}")
             error_players.append({
                 'region': region,
                 'username': username,
-                'formatted_username': formatted_username if 'formatted_username' in locals() else 'Error in formatting',
+                'formatted_username': 'Error in formatting',
                 'error': str(e)
             })
-            continue
+
+    if scrape is None:
+        pool = get_pool(size=workers)
+        scrape = lambda region, username: get_player_stats(region, username, pool=pool)
+    executor = ScrapeExecutor(lambda region, username: scrape(region, username)[0],
+                              workers=workers, limiter=limiter)
+    tasks = [(region, formatted_username) for region, _, formatted_username in players]
+
+    # Results arrive in completion order and go to the checkpoint as they complete
+    for completed, (i, merged_df, error) in enumerate(executor.map(tasks), 1):
+        region, username, formatted_username = players[i]
+        print(f"\nProcessed player {completed}/{len(players)}: {username} ({region})")
+
+        if merged_df is not None and not merged_df.empty:
+            # Store original username in the DataFrame
+            merged_df['player_id'] = username  # Store original username
+            all_merged_dfs.append(merged_df)
+            print(f"Successfully processed {username}")
+
+            # Save the checkpoint after every player: a scrape takes seconds, rewriting the
+            # checkpoint milliseconds, and an interrupted run loses nothing already scraped
+            checkpoint_save = pd.concat(all_merged_dfs, ignore_index=True)
+            save_dataset(checkpoint_save, 'player_stats', filename=checkpoint_name, export_csv=False)
+
+        else:
+            print(f"Error processing {username}: {error}" if error else f"No data found for {username}")
+            error_players.append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': str(error) if error else 'No data found'
+            })
 
     # Combine and save final results
     if all_merged_dfs:
         final_df = pd.concat(all_merged_dfs, ignore_index=True)
         
         # Save final combined stats
-        filepath = os.path.join(save_dir, "player_stats.csv")
-        final_df.to_csv(filepath, index=False)
+        filepath = save_dataset(final_df, 'player_stats')
         print(f"\nSaved combined stats for {len(all_merged_dfs)} players to {filepath}")
         
         # Clean up checkpoint file
-        if os.path.exists(checkpoint_file):
-            os.remove(checkpoint_file)
-            print("Removed checkpoint file after successful completion")
+        remove_dataset('player_stats', filename=checkpoint_name)
+        print("Removed checkpoint file after successful completion")
         
         # Save error log
         if error_players:
             error_df = pd.DataFrame(error_players)
-            error_filepath = os.path.join(save_dir, "player_stats_errors.csv")
-            error_df.to_csv(error_filepath, index=False)
+            error_filepath = save_dataset(error_df, 'player_stats_errors')
             print(f"Saved error log to {error_filepath}")
         
         return final_df
     else:
         print("\nNo player data was collected")
-        return None
\ No newline at end of file
+        return None
+
+def get_multiple_player_page_stats(players_df, workers=WORKERS, limiter=None):
+    """
+    Get player stats and recent matches for multiple players, loading each profile page once
+
+    Parameters:
+    players_df: DataFrame with columns 'region' and 'username'
+    workers: number of browsers scraping players at the same time
+    limiter: RateLimiter shared with other scrapers, defaults to a new per-region/per-host limiter
+
+    Returns (player_stats, recent_matches), saved to the same datasets as
+    get_multiple_player_stats and get_multiple_matches_stats
+    """
+    checkpoint_name = "player_page_checkpoint"
+    all_merged_dfs = []
+    all_matches_dfs = []
+    error_players = []
+    match_error_players = []
+
+    # Load checkpoint if exists, the player stats checkpoint decides who is done
+    try:
+        checkpoint_df = load_dataset('player_stats', filename=checkpoint_name)
+        all_merged_dfs = [checkpoint_df]
+        processed_players = set(checkpoint_df['player_id'])
+        try:
+            # Older checkpoints also hold the matches of players whose profile failed,
+            # those players are scraped again
+            matches_checkpoint = load_dataset('recent_matches', filename=checkpoint_name)
+            all_matches_dfs = [matches_checkpoint[matches_checkpoint['player_id'].isin(processed_players)]]
+        except FileNotFoundError:
+            pass
+        players_df = players_df[~players_df['username'].isin(processed_players)]
+        print(f"Loaded checkpoint with {len(processed_players)} players already processed")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading checkpoint: {e}")
+
+    print(f"Processing {len(players_df)} remaining players with {workers} workers...")
+
+    # Format usernames up front, the workers only scrape
+    players = []
+    for region, username in zip(players_df['region'], players_df['username']):
+        region = region.lower()  # Ensure region is lowercase
+        try:
+            players.append((region, username, format_summoner_name(username)))
+        except Exception as e:
+            print(f"Error processing {username}: {e}")
+            error_players.append({
+                'region': region,
+                'username': username,
+                'formatted_username': 'Error in formatting',
+                'error': str(e)
+            })
+
+    pool = match_driver_pool(size=workers)
+    executor = ScrapeExecutor(lambda region, username: get_player_page_stats(region, username, pool=pool),
+                              workers=workers, limiter=limiter)
+    tasks = [(region, formatted_username) for region, _, formatted_username in players]
+
+    # Results arrive in completion order and go to the checkpoint as they complete
+    for completed, (i, result, error) in enumerate(executor.map(tasks), 1):
+        region, username, formatted_username = players[i]
+        merged_df, matches_df = result if result is not None else (None, None)
+        print(f"\nProcessed player {completed}/{len(players)}: {username} ({region})")
+
+        has_matches = matches_df is not None and not matches_df.empty
+        if has_matches:
+            # Add player identification columns
+            matches_df['player_id'] = username  # Original username
+            matches_df['region'] = region
+        else:
+            match_error_players.append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': str(error) if error else 'No match data found'
+            })
+
+        if merged_df is not None and not merged_df.empty:
+            # Store original username in the DataFrame
+            merged_df['player_id'] = username  # Store original username
+            all_merged_dfs.append(merged_df)
+            # Matches are kept with the player only, a player without profile is scraped
+            # again on resume and would save them twice
+            if has_matches:
+                all_matches_dfs.append(matches_df)
+            print(f"Successfully processed {username}")
+
+            # Save the checkpoint after every player (matches first, the player stats
+            # checkpoint decides who is done)
+            if all_matches_dfs:
+                save_dataset(pd.concat(all_matches_dfs, ignore_index=True), 'recent_matches', filename=checkpoint_name, export_csv=False)
+            save_dataset(pd.concat(all_merged_dfs, ignore_index=True), 'player_stats', filename=checkpoint_name, export_csv=False)
+
+        else:
+            print(f"Error processing {username}: {error}" if error else f"No data found for {username}")
+            error_players.append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': str(error) if error else 'No data found'
+            })
+
+    if not all_merged_dfs:
+        print("\nNo player data was collected")
+        return None, None
+
+    # Combine and save final results
+    player_stats = pd.concat(all_merged_dfs, ignore_index=True)
+    filepath = save_dataset(player_stats, 'player_stats')
+    print(f"\nSaved combined stats for {len(all_merged_dfs)} players to {filepath}")
+
+    recent_matches = None
+    if all_matches_dfs:
+        recent_matches = pd.concat(all_matches_dfs, ignore_index=True)
+        filepath = save_dataset(recent_matches, 'recent_matches')
+        print(f"Saved combined match stats for {len(all_matches_dfs)} players to {filepath}")
+
+    # Clean up checkpoint files
+    remove_dataset('player_stats', filename=checkpoint_name)
+    remove_dataset('recent_matches', filename=checkpoint_name)
+    print("Removed checkpoint files after successful completion")
+
+    # Save error logs
+    for errors, name in ((error_players, 'player_stats_errors'), (match_error_players, 'recent_matches_error')):
+        if errors:
+            error_filepath = save_dataset(pd.DataFrame(errors), name)
+            print(f"Saved error log to {error_filepath}")
+
+    return player_stats, recent_matches
@@ -1,28 +1,17 @@
 import time, os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
 from urllib.parse import unquote
-from webdriver_manager.chrome import ChromeDriverManager
-from helper import convert_to_minutes, convert_percentage_to_decimal, convert_tier_to_number, convert_result_to_binary, format_summoner_name, convert_to_displayname
+from helper import convert_to_minutes, convert_percentage_to_decimal, convert_tier_to_number, convert_result_to_binary, format_summoner_name, convert_to_displayname, coerce_scraped
+from data_store import save_dataset, load_dataset, remove_dataset
+from driver_pool import get_pool
+from scrape_executor import ScrapeExecutor, WORKERS
 
-def setup_driver():
-    options = Options()
-    prefs = {
-        'profile.default_content_setting_values': {'notifications': 2},
-        'profile.managed_default_content_settings': {'images': 2}
-    }
-    options.add_experimental_option('prefs', prefs)
-    options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    for arg in ['--headless', '--no-sandbox', '--disable-dev-shm-usage', 
-                '--disable-gpu', '--window-size=1920,1080']:
-        options.add_argument(arg)
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124')
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+def match_driver_pool(size=None):
+    """Shared browser pool of the match scraper, images are not loaded"""
+    return get_pool("matches", size=size, block_images=True, window_size="1920,1080")
 
 def get_tooltip_date(driver, element):
     try:
@@ -218,49 +207,67 @@ def process_match_data(match_data, username, players):
         print(f"Error processing match: {e}")
         return None
 
-def get_matches_stats(region, username, max_retries=2):
+def extract_matches(driver, username, timeout=20, read_date=None):
+    """
+    Match rows of the profile page loaded in driver, raises when the match list does not load
+
+    Static HTML pages pass timeout=0 and their own read_date(driver, element),
+    the default hovers the time stamp to read the date tooltip.
+    """
+    read_date = read_date if read_date is not None else get_tooltip_date
+    if timeout:
+        matches_container = WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "div.css-1jxewmm.ek41ybw0"))
+        )
+    else:
+        matches_container = driver.find_element(By.CSS_SELECTOR, "div.css-1jxewmm.ek41ybw0")
+
+    matches_data = []
+    match_elements = matches_container.find_elements(By.CSS_SELECTOR, "div.css-j7qwjs.ery81n90")
+
+    #print(f"Found {len(match_elements)} matches")
+
+    for i, match in enumerate(match_elements, 1):
+        try:
+            match_data = extract_match_data(match)
+            players = get_players_info(match)
+            match_data['match_date'] = read_date(
+                driver, 
+                match.find_element(By.CSS_SELECTOR, "div.time-stamp > div")
+            )
+
+            processed_data = process_match_data(match_data, username, players)
+            if processed_data:
+                matches_data.append(processed_data)
+        except Exception as e:
+            print(f"Error processing match {i}: {e}")
+            continue
+
+    return matches_data
+
+def get_matches_stats(region, username, max_retries=2, pool=None):
     """
     Get match stats for a single player with retry mechanism
+
+    pool: DriverPool to lease the browser from, defaults to the shared match pool.
+    Each attempt leases a browser, one that crashed is replaced before the retry.
     """
-    driver = None
+    pool = pool if pool is not None else match_driver_pool()
     retry_count = 0
     
     while retry_count <= max_retries:
         try:
-            driver = setup_driver()
-            driver.set_page_load_timeout(20)  # Set page load timeout
-            
-            url = f"https://www.op.gg/summoners/{region}/{username}?queue_type=SOLORANKED"
-            print(f"Accessing URL: {url}")
-            driver.get(url)
-            
-            matches_container = WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.css-1jxewmm.ek41ybw0"))
-            )
-            
-            matches_data = []
-            match_elements = matches_container.find_elements(By.CSS_SELECTOR, "div.css-j7qwjs.ery81n90")
-            
-            #print(f"Found {len(match_elements)} matches")
+            with pool.driver() as driver:
+                driver.set_page_load_timeout(20)  # Set page load timeout
             
-            for i, match in enumerate(match_elements, 1):
-                try:
-                    match_data = extract_match_data(match)
-                    players = get_players_info(match)
-                    match_data['match_date'] = get_tooltip_date(
-                        driver, 
-                        match.find_element(By.CSS_SELECTOR, "div.time-stamp > div")
-                    )
-                    
-                    processed_data = process_match_data(match_data, username, players)
-                    if processed_data:
-                        matches_data.append(processed_data)
-                except Exception as e:
-                    print(f"Error processing match {i}: {e}")
-                    continue
+                url = f"https://www.op.gg/summoners/{region}/{username}?queue_type=SOLORANKED"
+                print(f"Accessing URL: {url}")
+                driver.get(url)
+                matches_data = extract_matches(driver, username)
             
             if matches_data:
-                return pd.DataFrame(matches_data)
+                # Scraped values arrive as strings, type them once here
+                return coerce_scraped(pd.DataFrame(matches_data), 'recent_matches')
             else:
                 raise Exception("No valid matches found")
                 
@@ -273,109 +280,104 @@ def get_matches_stats(region, username, max_retries=2):
             else:
                 print(f"Max retries reached")
                 return pd.DataFrame()
-                
-        finally:
-            if driver:
-                driver.quit()
     
     return pd.DataFrame()
 
-def get_multiple_matches_stats(players_df):
+def get_multiple_matches_stats(players_df, workers=WORKERS, limiter=None, scrape=None):
     """
     Get match stats for multiple players from a DataFrame
     
     Parameters:
     players_df: DataFrame with columns 'region' and 'username'
+    workers: number of browsers scraping players at the same time
+    limiter: RateLimiter shared with other scrapers, defaults to a new per-region/per-host limiter
+    scrape: function (region, username) -> DataFrame like get_matches_stats
+        (e.g. http_backend.get_matches_stats), defaults to Selenium on the shared match pool
     """
-    save_dir = "util/data"
-    os.makedirs(save_dir, exist_ok=True)
-    checkpoint_file = os.path.join(save_dir, "recent_matches_checkpoint.csv")
+    checkpoint_name = "recent_matches_checkpoint"
     all_matches_dfs = []
     error_players = []
     
     # Load checkpoint if exists
-    start_idx = 0
-    if os.path.exists(checkpoint_file):
-        try:
-            checkpoint_df = pd.read_csv(checkpoint_file)
-            all_matches_dfs = [checkpoint_df]
-            # Get the number of players already processed
-            processed_players = set(checkpoint_df['player_id'])
-            # Filter out already processed players
-            players_df = players_df[~players_df['username'].isin(processed_players)]
-            print(f"Loaded checkpoint with {len(processed_players)} players already processed")
-        except Exception as e:
-            print(f"Error loading checkpoint: {e}")
-    
-    print(f"Processing matches for {len(players_df)} remaining players...")
+    try:
+        checkpoint_df = load_dataset('recent_matches', filename=checkpoint_name)
+        all_matches_dfs = [checkpoint_df]
+        # Get the number of players already processed
+        processed_players = set(checkpoint_df['player_id'])
+        # Filter out already processed players
+        players_df = players_df[~players_df['username'].isin(processed_players)]
+        print(f"Loaded checkpoint with {len(processed_players)} players already processed")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading checkpoint: {e}")
     
-    for idx, row in players_df.iterrows():
-        region = row['region'].lower()  # Ensure region is lowercase
-        username = row['username']
-        
-        try:
-            # Format the username
-            formatted_username = format_summoner_name(username)
-            print(f"\nProcessing matches for player {idx + 1}/{len(players_df)}: {username} ({region})")
-            #print(f"Formatted username: {formatted_username}")
-            
-            # Add delay between requests
-            if idx > 0:
-                time.sleep(2)
-                
-            matches_df = get_matches_stats(region, formatted_username)
-            
-            if matches_df is not None and not matches_df.empty:
-                # Add player identification columns
-                matches_df['player_id'] = username  # Original username
-                matches_df['region'] = region
-                all_matches_dfs.append(matches_df)
-                print(f"Successfully processed matches for {username}")
-                #print(f"Found {len(matches_df)} matches")
-
-                 # Save checkpoint every 5 players
-                if len(all_matches_dfs) % 5 == 0:
-                    checkpoint_save = pd.concat(all_matches_dfs, ignore_index=True)
-                    checkpoint_save.to_csv(checkpoint_file, index=False)
-                    print(f"Saved checkpoint after processing {len(all_matches_dfs)} players")
+    print(f"Processing matches for {len(players_df)} remaining players with {workers} workers...")
 
-            else:
-                print(f"No match data found for {username}")
-                error_players.append({
-                    'region': region,
-                    'username': username,
-                    'formatted_username': formatted_username,
-                    'error': 'No match data found'
-                })
-                
+    # Format usernames up front, the workers only scrape
+    players = []
+    for region, username in zip(players_df['region'], players_df['username']):
+        region = region.lower()  # Ensure region is lowercase
+        try:
+            players.append((region, username, format_summoner_name(username)))
         except Exception as e:
             print(f"Error processing matches for {username}: {e}")
             error_players.append({
                 'region': region,
                 'username': username,
-                'formatted_username': formatted_username if 'formatted_username' in locals() else 'Error in formatting',
+                'formatted_username': 'Error in formatting',
                 'error': str(e)
             })
-            continue
+
+    # get_matches_stats already retries a player, the executor only backs off on empty results
+    if scrape is None:
+        pool = match_driver_pool(size=workers)
+        scrape = lambda region, username: get_matches_stats(region, username, pool=pool)
+    executor = ScrapeExecutor(scrape, workers=workers, limiter=limiter, retries=0)
+    tasks = [(region, formatted_username) for region, _, formatted_username in players]
+
+    # Results arrive in completion order and go to the checkpoint as they complete
+    for completed, (i, matches_df, error) in enumerate(executor.map(tasks), 1):
+        region, username, formatted_username = players[i]
+        print(f"\nProcessed matches for player {completed}/{len(players)}: {username} ({region})")
+
+        if matches_df is not None and not matches_df.empty:
+            # Add player identification columns
+            matches_df['player_id'] = username  # Original username
+            matches_df['region'] = region
+            all_matches_dfs.append(matches_df)
+            print(f"Successfully processed matches for {username}")
+            #print(f"Found {len(matches_df)} matches")
+
+            # Save the checkpoint after every player, a scrape takes seconds and rewriting the
+            # checkpoint milliseconds
+            checkpoint_save = pd.concat(all_matches_dfs, ignore_index=True)
+            save_dataset(checkpoint_save, 'recent_matches', filename=checkpoint_name, export_csv=False)
+
+        else:
+            print(f"Error processing matches for {username}: {error}" if error else f"No match data found for {username}")
+            error_players.append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': str(error) if error else 'No match data found'
+            })
 
     # Combine all match stats
     if all_matches_dfs:
         final_df = pd.concat(all_matches_dfs, ignore_index=True)
                 
-        filepath = os.path.join(save_dir, f"recent_matches.csv")
-        final_df.to_csv(filepath, index=False)
+        filepath = save_dataset(final_df, 'recent_matches')
         print(f"\nSaved combined match stats for {len(all_matches_dfs)} players to {filepath}")
 
         # Clean up checkpoint file
-        if os.path.exists(checkpoint_file):
-            os.remove(checkpoint_file)
-            print("Removed checkpoint file after successful completion")
+        remove_dataset('recent_matches', filename=checkpoint_name)
+        print("Removed checkpoint file after successful completion")
         
         # Save error log if any errors occurred
         if error_players:
             error_df = pd.DataFrame(error_players)
-            error_filepath = os.path.join(save_dir, f"recent_matches_error.csv")
-            error_df.to_csv(error_filepath, index=False)
+            error_filepath = save_dataset(error_df, 'recent_matches_error')
             print(f"Saved error log to {error_filepath}")
         
         # Print summary
@@ -0,0 +1,251 @@
+import time
+import asyncio
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from helper import merge_stats, filter_leaderboard, format_summoner_name, MetaScoreTable, DraftPenaltyTable, FeatureStore
+from data_store import save_dataset
+from driver_pool import get_pool
+from scrape_executor import ScrapeExecutor, RateLimiter, WORKERS
+from Leaderboard_scrapper import scrape_leaderboard_page, clean_leaderboard
+from Meta_scrapper import get_meta_stats
+from Weekly_meta_scrapper import get_weekly_meta
+from Player_scrapper import get_player_page_stats
+from Recent_match_scrapper import match_driver_pool
+from feature_eng import create_champion_features
+
+REGIONS = ["kr", "euw", "vn", "na"]
+TIERS = ["CHALLENGER"]
+
+# Players merged into one feature engineering call at most, smaller batches run
+# whenever the scrapers are slower than feature engineering
+FEATURE_BATCH = 20
+
+
+def _leaderboard_page(pool, limiter, region, page):
+    limiter.acquire(region)
+    with pool.driver() as driver:
+        return scrape_leaderboard_page(driver, region, page)
+
+
+async def produce_players(players, regions, pages_per_region, tiers, limiter, leaderboard_rows):
+    """Scrape leaderboard pages one by one and queue every new player of the wanted tiers"""
+    tiers = [tier.upper() for tier in tiers]
+    seen = set()
+    pool = get_pool()
+    for region in regions:
+        for page in range(1, pages_per_region + 1):
+            try:
+                # Leasing a browser blocks, so it happens in the worker thread too
+                rows = await asyncio.to_thread(_leaderboard_page, pool, limiter, region, page)
+            except Exception as e:
+                print(f"Error processing {region} page {page}: {e}")
+                continue
+            leaderboard_rows.extend(rows)
+
+            queued = 0
+            for row in rows:
+                key = (region, row['summoner'])
+                if row['tier'].upper() not in tiers or key in seen:
+                    continue
+                seen.add(key)
+                try:
+                    players.put_nowait((region, row['summoner'], format_summoner_name(row['summoner'])))
+                    queued += 1
+                except Exception as e:
+                    print(f"Error processing {row['summoner']}: {e}")
+            print(f"Leaderboard {region} page {page}: queued {queued} players")
+
+
+async def scrape_players(players, merged, executor, results):
+    """Worker: scrape queued players and pass each player's merged rows on as soon as both halves are in"""
+    while True:
+        player = await players.get()
+        if player is None:
+            break
+        region, username, formatted_username = player
+        try:
+            result = await asyncio.to_thread(executor.run, region, formatted_username)
+        except Exception as e:
+            print(f"Error processing {username}: {e}")
+            result = None
+        player_df, matches_df = result if result is not None else (None, None)
+
+        if player_df is None or player_df.empty or matches_df is None or matches_df.empty:
+            print(f"No data found for {username}")
+            results['errors'].append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': 'No profile data found' if player_df is None or player_df.empty else 'No match data found'
+            })
+            continue
+
+        # One player's bad data must not stop the worker, the player is recorded as failed
+        try:
+            # Store original username in both halves
+            player_df['player_id'] = username
+            matches_df['player_id'] = username
+            matches_df['region'] = region
+            merged_df = merge_stats(matches_df, player_df, save=False)
+        except Exception as e:
+            print(f"Error merging {username}: {e}")
+            results['errors'].append({
+                'region': region,
+                'username': username,
+                'formatted_username': formatted_username,
+                'error': str(e)
+            })
+            continue
+
+        results['player_stats'].append(player_df)
+        results['recent_matches'].append(matches_df)
+        if merged_df is not None and not merged_df.empty:
+            await merged.put(merged_df)
+
+
+async def stream_features(merged, meta_task, weekly_task, feature_batch, results, on_features, started, feature_store):
+    """
+    Run feature engineering on merged players as they arrive, in batches of up to feature_batch players.
+    Batches run one at a time and share feature_store.
+    """
+    meta_stats, weekly_meta = await meta_task, await weekly_task
+    # Failed meta scrapes fall back to the stored datasets, tables are built once for every batch
+    meta_stats = DraftPenaltyTable.ensure(meta_stats if meta_stats is not None and not meta_stats.empty else None)
+    weekly_meta = MetaScoreTable.ensure(weekly_meta if weekly_meta is not None and not weekly_meta.empty else None)
+
+    done = False
+    while not done:
+        batch = []
+        item = await merged.get()
+        while True:
+            if item is None:
+                done = True
+                break
+            batch.append(item)
+            if len(batch) >= feature_batch or merged.empty():
+                break
+            item = merged.get_nowait()
+        if not batch:
+            continue
+
+        merged_batch = pd.concat(batch, ignore_index=True)
+        results['merged'].append(merged_batch)
+        work = asyncio.ensure_future(asyncio.to_thread(
+            create_champion_features, merged_batch, meta_stats, weekly_meta,
+            consider_team_comp=True, use_checkpoint=False, incremental=True, feature_store=feature_store, save=False
+        ))
+        try:
+            features = await asyncio.shield(work)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted and uses feature_store, wait for it before
+            # the caller closes the store
+            await asyncio.gather(work, return_exceptions=True)
+            raise
+        if features is None:
+            continue
+        results['features'].append(features)
+        rows = sum(len(frame) for frame in results['features'])
+        print(f"Features for {len(batch)} more players ({rows} rows) after {time.monotonic() - started:.0f}s")
+        if on_features is not None:
+            on_features(features)
+
+
+async def run_pipeline(regions=None, pages_per_region=5, tiers=None, workers=WORKERS, limiter=None,
+                       scrape=None, feature_batch=FEATURE_BATCH, on_features=None, feature_store=None):
+    """
+    Streaming version of the main_scrapper flow.
+
+    Meta and weekly meta are scraped while the leaderboard pages feed a queue of players.
+    `workers` players are scraped at a time (one profile page load each, see
+    get_player_page_stats) under the per-region/per-host rate limiter, and each player is
+    merged and sent to feature engineering as soon as it completes. on_features(features)
+    is called for every feature batch. The usual datasets (leaderboard, lb_filtered,
+    player_stats, recent_matches, player_stats_merged, feature_eng_stats) are written at the end.
+
+    scrape: function (region, username) -> (player_df, matches_df), defaults to
+        get_player_page_stats on the shared match browser pool
+    feature_store: FeatureStore the champion scores are cached in, by default one
+        store (cache/feature_store.db) is opened for the run and closed at the end
+
+    Returns the features of every scraped player
+    """
+    regions = regions if regions is not None else REGIONS
+    tiers = tiers if tiers is not None else TIERS
+    limiter = limiter if limiter is not None else RateLimiter()
+    started = time.monotonic()
+
+    # Every scrape runs in a thread, the default executor is too small for the workers
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers + 4))
+
+    if scrape is None:
+        # Profiles are read on the match scraper's browsers, the leaderboard pages keep the default pool
+        pool = match_driver_pool(size=workers)
+        scrape = lambda region, username: get_player_page_stats(region, username, pool=pool)
+    executor = ScrapeExecutor(scrape, workers=workers, limiter=limiter)
+
+    results = {'player_stats': [], 'recent_matches': [], 'merged': [], 'features': [], 'errors': []}
+    leaderboard_rows = []
+    players = asyncio.Queue()
+    merged = asyncio.Queue()
+
+    meta_task = asyncio.create_task(asyncio.to_thread(get_meta_stats))
+    weekly_task = asyncio.create_task(asyncio.to_thread(get_weekly_meta))
+    store = feature_store if feature_store is not None else FeatureStore()
+    feature_task = asyncio.create_task(
+        stream_features(merged, meta_task, weekly_task, feature_batch, results, on_features, started, store)
+    )
+    scrapers = [asyncio.create_task(scrape_players(players, merged, executor, results)) for _ in range(workers)]
+
+    async def feed():
+        await produce_players(players, regions, pages_per_region, tiers, limiter, leaderboard_rows)
+        for _ in scrapers:
+            players.put_nowait(None)
+        await asyncio.gather(*scrapers)
+        merged.put_nowait(None)
+
+    feeder = asyncio.create_task(feed())
+    tasks = [feeder, feature_task, *scrapers]
+    try:
+        # Stops at the first failure of either side (e.g. an on_features callback raising)
+        done, _ = await asyncio.wait([feeder, feature_task], return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    except BaseException:
+        # Nothing may still use the store once it is closed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        if feature_store is None:
+            store.close()
+
+    # Save the complete datasets once
+    if leaderboard_rows:
+        leaderboard = clean_leaderboard(leaderboard_rows)
+        save_dataset(leaderboard, 'leaderboard')
+        filter_leaderboard(leaderboard, tiers=tiers)
+    for name, frames in (('player_stats', results['player_stats']), ('recent_matches', results['recent_matches'])):
+        if frames:
+            print(f"Saved {name} to {save_dataset(pd.concat(frames, ignore_index=True), name)}")
+    if results['errors']:
+        save_dataset(pd.DataFrame(results['errors']), 'player_stats_errors')
+    if results['merged']:
+        current_time = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        save_dataset(pd.concat(results['merged'], ignore_index=True), 'player_stats_merged',
+                     filename=f"player_stats_merged_{current_time}")
+
+    if not results['features']:
+        print("\nNo features were generated")
+        return None
+    features = pd.concat(results['features'], ignore_index=True)
+    print(f"Saved features to {save_dataset(features, 'feature_eng_stats')}")
+    print(f"Pipeline finished in {time.monotonic() - started:.0f}s, "
+          f"{len(results['player_stats'])} players, {len(results['errors'])} failed")
+    return features
+
+
+if __name__ == "__main__":
+    asyncio.run(run_pipeline())
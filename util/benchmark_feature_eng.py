@@ -0,0 +1,110 @@
+import os
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from helper import ChampionConverter, process_kda_perfect
+from feature_eng import compute_champion_scores, _reference_champion_scores
+
+# Row counts compared by default
+BENCHMARK_SIZES = [1000, 10000, 100000]
+
+
+def build_benchmark_data(n_rows, source_file=None, seed=0):
+    """
+    Build a synthetic merged player stats DataFrame of n_rows by resampling real rows.
+    Team and opponent champions are shuffled across rows so drafts vary.
+    """
+    if source_file is None:
+        source_file = os.path.join("util", "data", "player_stats_merged_2025-01-11.csv")
+
+    source = process_kda_perfect(pd.read_csv(source_file, low_memory=False))
+    rng = np.random.default_rng(seed)
+
+    df = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+    draft_cols = [f'team_champ{i}' for i in range(1, 5)] + [f'opp_champ{i}' for i in range(1, 6)]
+    for col in draft_cols:
+        if col in df.columns:
+            df[col] = df[col].to_numpy()[rng.permutation(n_rows)]
+
+    return df
+
+
+def time_vectorized(df, meta_stats, weekly_meta, champions):
+    start = time.perf_counter()
+    scores, _ = compute_champion_scores(df, meta_stats, weekly_meta, champions=champions)
+    return time.perf_counter() - start, scores
+
+
+def time_reference(df, meta_stats, weekly_meta, champions):
+    feature_dict = {}
+    start = time.perf_counter()
+    # Silence the per-batch progress prints of the reference loop
+    with contextlib.redirect_stdout(io.StringIO()):
+        _reference_champion_scores(
+            df, meta_stats, weekly_meta, champions, feature_dict, df.columns.tolist()
+        )
+    elapsed = time.perf_counter() - start
+    return elapsed, np.column_stack([feature_dict[champion] for champion in champions])
+
+
+def run_benchmark(sizes=None, reference_limit=1000, meta_stats=None, weekly_meta=None):
+    """
+    Compare the vectorized and reference champion scoring engines.
+
+    The reference loop takes roughly 0.1s per row, so above reference_limit rows it is
+    timed on the first reference_limit rows and extrapolated linearly (marked with *).
+    Scores are checked for exact equality on the rows both engines scored.
+    """
+    if sizes is None:
+        sizes = BENCHMARK_SIZES
+
+    if meta_stats is None:
+        meta_stats = pd.read_csv(os.path.join("util", "data", "meta_stats.csv"))
+    if weekly_meta is None:
+        weekly_meta = pd.read_csv(os.path.join("util", "data", "weekly_meta_stats.csv"))
+
+    champions = ChampionConverter().champions
+    results = []
+
+    for n_rows in sizes:
+        df = build_benchmark_data(n_rows)
+
+        vectorized_time, vectorized_scores = time_vectorized(df, meta_stats, weekly_meta, champions)
+
+        reference_rows = min(n_rows, reference_limit)
+        reference_time, reference_scores = time_reference(df.head(reference_rows), meta_stats, weekly_meta, champions)
+        extrapolated = reference_rows < n_rows
+        if extrapolated:
+            reference_time = reference_time * n_rows / reference_rows
+
+        identical = np.array_equal(vectorized_scores[:reference_rows], reference_scores, equal_nan=True)
+
+        results.append({
+            'rows': n_rows,
+            'reference_s': round(reference_time, 3),
+            'reference_extrapolated': extrapolated,
+            'vectorized_s': round(vectorized_time, 3),
+            'speedup': round(reference_time / vectorized_time, 1),
+            'identical': identical
+        })
+        print(f"{n_rows:>7} rows | reference {reference_time:>10.2f}s{'*' if extrapolated else ' '} | "
+              f"vectorized {vectorized_time:>7.3f}s | speedup {reference_time / vectorized_time:>8.1f}x | "
+              f"identical: {identical}")
+
+    if any(result['reference_extrapolated'] for result in results):
+        print(f"* reference timed on the first {reference_limit} rows and extrapolated linearly")
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark champion feature scoring engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES)
+    parser.add_argument("--reference-limit", type=int, default=1000,
+                        help="max rows scored by the reference loop before extrapolating")
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.reference_limit)
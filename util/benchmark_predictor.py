@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import argparse
+import threading
+import http.client
+from http.server import ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from predictor_service import ChampionPredictor, BatchingPredictor, make_handler
+
+# Request rates (per second) offered to the batcher by default
+BENCHMARK_RATES = [100, 200, 400, 800]
+# Seconds each rate is offered for
+DURATION = 10.0
+# Concurrent HTTP clients
+HTTP_CLIENTS = 8
+
+
+def build_requests(predictor, n_requests, source_file=None, seed=0):
+    """
+    n_requests single-draft requests: real player rows with random teammates and opponents.
+    Returns a list of (profile, draft, model input row as a 1 x features matrix).
+    """
+    if source_file is None:
+        source_file = os.path.join("util", "data", "player_stats_merged_2025-01-11.csv")
+
+    records = pd.read_csv(source_file, low_memory=False).to_dict('records')
+    champions = predictor.feature_builder.champions
+    rng = np.random.default_rng(seed)
+
+    player_of_request = rng.integers(0, len(records), n_requests)
+    requests = [None] * n_requests
+    for player in np.unique(player_of_request):
+        idx = np.flatnonzero(player_of_request == player)
+        drafts = []
+        for _ in idx:
+            picks = rng.choice(champions, 9, replace=False).tolist()
+            drafts.append((picks[:4], picks[4:]))
+        # One player state per player, one row per draft
+        matrix = predictor.draft_matrix(records[player], drafts)
+        for row, request_idx in enumerate(idx):
+            requests[request_idx] = (records[player], drafts[row], matrix[row:row + 1])
+    return requests
+
+
+def percentiles(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'max_ms': round(float(latencies.max()), 2)
+    }
+
+
+def time_direct(predictor, requests, k=5):
+    """One caller, one predict call per request (no batching)"""
+    latencies = []
+    for _, _, matrix in requests:
+        start = time.perf_counter()
+        predictor.predict(matrix, k)
+        latencies.append(time.perf_counter() - start)
+    return {'mode': 'direct', 'offered_rps': None,
+            'achieved_rps': round(len(requests) / sum(latencies), 1), **percentiles(latencies), 'mean_batch': 1.0}
+
+
+def time_batched(predictor, requests, rate, duration=DURATION, max_batch_size=None, max_wait_ms=None, k=5):
+    """
+    Offer `rate` requests per second to a BatchingPredictor for `duration` seconds.
+
+    Requests are submitted on a fixed schedule whether or not earlier ones completed (open
+    loop), and latency is measured from the scheduled time, so queueing delay is included
+    when the batcher falls behind.
+    """
+    n_requests = int(rate * duration)
+    batcher = BatchingPredictor(predictor, max_batch_size, max_wait_ms)
+
+    # Count the booster calls to report the mean batch size
+    calls = [0]
+    predict_proba = predictor.predict_proba
+
+    def counted_predict_proba(rows):
+        calls[0] += 1
+        return predict_proba(rows)
+
+    predictor.predict_proba = counted_predict_proba
+
+    latencies = [None] * n_requests
+    done = threading.Event()
+    remaining = [n_requests]
+    lock = threading.Lock()
+
+    def on_done(i, scheduled):
+        def callback(future):
+            latencies[i] = time.perf_counter() - scheduled
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+        return callback
+
+    try:
+        start = time.perf_counter()
+        for i in range(n_requests):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            batcher.submit(requests[i % len(requests)][2], k).add_done_callback(on_done(i, scheduled))
+        done.wait()
+        elapsed = time.perf_counter() - start
+    finally:
+        batcher.close()
+        del predictor.predict_proba
+
+    return {'mode': 'batched', 'offered_rps': rate, 'achieved_rps': round(n_requests / elapsed, 1),
+            **percentiles(latencies), 'mean_batch': round(n_requests / max(calls[0], 1), 1)}
+
+
+def time_http(predictor, requests, clients=HTTP_CLIENTS, duration=DURATION, max_batch_size=None, max_wait_ms=None, k=5):
+    """
+    POST /what_if (profile and one draft) to an in-process server from `clients` keep-alive
+    connections, each sending its next request as soon as the previous one is answered
+    (closed loop)
+    """
+    batcher = BatchingPredictor(predictor, max_batch_size, max_wait_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher))
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    port = server.server_address[1]
+
+    bodies = [
+        json.dumps({
+            'profile': {key: None if pd.isna(value) else value for key, value in profile.items()},
+            'drafts': [{'team': team, 'opp': opp}], 'k': k
+        }).encode("utf-8")
+        for profile, (team, opp), _ in requests
+    ]
+    latencies = [[] for _ in range(clients)]
+    deadline = time.perf_counter() + duration
+
+    def client(idx):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        i = idx
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            conn.request("POST", "/what_if", body=bodies[i % len(bodies)], headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            latencies[idx].append(time.perf_counter() - start)
+            i += clients
+        conn.close()
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(idx,)) for idx in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+    all_latencies = [latency for client_latencies in latencies for latency in client_latencies]
+    return {'mode': f'http x{clients}', 'offered_rps': None,
+            'achieved_rps': round(len(all_latencies) / elapsed, 1), **percentiles(all_latencies), 'mean_batch': None}
+
+
+def run_benchmark(model_dir=None, rates=None, duration=DURATION, http_clients=HTTP_CLIENTS,
+                  max_batch_size=None, max_wait_ms=None, n_requests=2000):
+    """
+    Latency and throughput of the champion predictor service.
+
+    direct: one caller without batching, the service time of a single request.
+    batched: open-loop load at each rate through BatchingPredictor.
+    http: closed-loop clients against the HTTP handler (0 clients skips it).
+    """
+    if rates is None:
+        rates = BENCHMARK_RATES
+
+    predictor = ChampionPredictor(model_dir)
+    print(f"Model: {len(predictor.feature_names)} features, {len(predictor.class_names)} classes, "
+          f"{predictor.booster.num_boosted_rounds()} rounds")
+    requests = build_requests(predictor, n_requests)
+    # Warm up the booster and the code paths
+    for _, _, matrix in requests[:50]:
+        predictor.predict(matrix)
+
+    results = [time_direct(predictor, requests[:500])]
+    for rate in rates:
+        results.append(time_batched(predictor, requests, rate, duration, max_batch_size, max_wait_ms))
+    if http_clients:
+        results.append(time_http(predictor, requests, http_clients, duration, max_batch_size, max_wait_ms))
+
+    for result in results:
+        offered = f"{result['offered_rps']:>5} rps" if result['offered_rps'] else " " * 9
+        batch = f"{result['mean_batch']:>6}" if result['mean_batch'] is not None else "     -"
+        print(f"{result['mode']:>8} | offered {offered} | achieved {result['achieved_rps']:>7.1f} rps | "
+              f"p50 {result['p50_ms']:>7.2f} ms | p95 {result['p95_ms']:>7.2f} ms | "
+              f"p99 {result['p99_ms']:>7.2f} ms | mean batch {batch}")
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the champion predictor service")
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--rates", type=int, nargs="+", default=BENCHMARK_RATES)
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per rate")
+    parser.add_argument("--http-clients", type=int, default=HTTP_CLIENTS, help="0 skips the HTTP run")
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    run_benchmark(args.model_dir, args.rates, args.duration, args.http_clients, args.max_batch_size, args.max_wait_ms)
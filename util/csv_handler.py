@@ -2,18 +2,22 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import os
+from helper import parse_opgg_dates
 
 def append_and_deduplicate(filepath):
     """
     Handles appending and deduplication of CSV files using existing date column.
     Assumes date format like "Sat, Jan 4, 2025 12:20 AM"
+
+    The historical file keeps the parsed 'datetime' column, so its dates are
+    only parsed once; older historical files without it are parsed on first use.
     """
     try:
         # Get the newly saved data
         new_df = pd.read_csv(filepath)
         
         # Convert the date strings to datetime objects for proper sorting
-        new_df['datetime'] = pd.to_datetime(new_df['date'], format='%a, %b %d, %Y %I:%M %p')
+        new_df['datetime'] = parse_opgg_dates(new_df['date'])
         
         # Create a temporary file path
         temp_filepath = filepath + '.temp'
@@ -28,8 +32,14 @@ def append_and_deduplicate(filepath):
             # Read historical data
             historical_df = pd.read_csv(historical_filepath)
             
-            # Convert historical dates to datetime for consistent comparison
-            historical_df['datetime'] = pd.to_datetime(historical_df['date'], format='%a, %b %d, %Y %I:%M %p')
+            # Reuse the stored timestamps, only parse dates that do not have one yet
+            if 'datetime' in historical_df.columns:
+                historical_df['datetime'] = pd.to_datetime(historical_df['datetime'], format='ISO8601', errors='coerce')
+                missing = historical_df['datetime'].isna()
+                if missing.any():
+                    historical_df.loc[missing, 'datetime'] = parse_opgg_dates(historical_df.loc[missing, 'date'])
+            else:
+                historical_df['datetime'] = parse_opgg_dates(historical_df['date'])
             
             # Append new data
             merged_df = pd.concat([historical_df, new_df], ignore_index=True)
@@ -45,14 +55,10 @@ def append_and_deduplicate(filepath):
             # Sort by datetime
             merged_df = merged_df.sort_values('datetime', ascending=False)
             
-            # Drop the temporary datetime column before saving
-            merged_df = merged_df.drop('datetime', axis=1)
-            
-            # Save merged data
+            # Save merged data, keeping the parsed datetime column
             merged_df.to_csv(historical_filepath, index=False)
         else:
-            # If no historical file exists, create it with the new data
-            new_df = new_df.drop('datetime', axis=1)  # Remove temporary datetime column
+            # If no historical file exists, create it with the new data and its parsed dates
             new_df.to_csv(historical_filepath, index=False)
             
         # Clean up temp file
@@ -0,0 +1,440 @@
+import json
+import numpy as np
+import pandas as pd
+from helper import MetaScoreTable, DraftPenaltyTable, champion_loyalty_arrays
+from feature_eng import SCORE_WEIGHTS
+
+# Number of top scored champions turned into 1_champ_name..TOP_N_champ_name
+TOP_N = 5
+
+# Model input columns, in the order the batch pipeline (create_champion_features ->
+# convert_df -> apply_feature_engineering, then dropping champion and region) leaves them
+MODEL_FEATURES = (
+    [f'team_champ{i}' for i in range(1, 5)] +
+    [f'opp_champ{i}' for i in range(1, 6)] +
+    ['avg_kills', 'avg_deaths', 'avg_assists', 'kda_ratio_profile', 'kill_participation_profile',
+     'most_champ_1', 'most_champ_2', 'most_role_1', 'most_role_2', 'most_role_1_value', 'most_role_2_value',
+     'season_champ_1', 'season_champ_2', 'season_champ_3',
+     'champ_variety_score', 'playstyle', 'most_role_3', 'most_role_3_value', 'role_specialization',
+     'champion_loyalty_score', 'loyalty_confidence_score', 'recent_champ_1_loyal', 'recent_champ_2_loyal'] +
+    [f'{i}_champ_name' for i in range(1, TOP_N + 1)]
+)
+
+# Category optimize_feature_dtypes gives missing values of a categorical feature
+UNKNOWN_CATEGORY = 'Unknown'
+
+# Same role numbers as convert_role_columns / get_most_role_3
+ROLE_MAPPING = {
+    'TOP': 1,
+    'MID': 2,
+    'ADC': 3,
+    'JUNGLE': 4,
+    'SUPPORT': 5
+}
+ROLES = ['TOP', 'JUNGLE', 'MID', 'ADC', 'SUPPORT']
+
+# Profile columns that are suffixed with _profile in player_stats_merged
+PROFILE_SUFFIXED = ['kda_ratio', 'kill_participation']
+
+
+def pad_draft(team_champs, opp_champs):
+    """Draft as 4 teammate and 5 opponent slots, slots not locked in yet are None"""
+    team = (list(team_champs) if team_champs is not None else [])[:4]
+    opp = (list(opp_champs) if opp_champs is not None else [])[:5]
+    return team + [None] * (4 - len(team)), opp + [None] * (5 - len(opp))
+
+
+def _number(value, default=np.nan):
+    """Scalar as float like pd.to_numeric(errors='coerce'), missing/unparseable -> default"""
+    if value is None:
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if value != value else value
+
+
+def _kda(value, kills, assists):
+    """kda_ssn / kda_ratio value as process_kda_perfect leaves it: 'Perfect' -> kills + assists"""
+    if isinstance(value, str) and 'perfect' in value.lower():
+        return _number(kills) + _number(assists)
+    return _number(value)
+
+
+def _recent_kda(value):
+    """KDA_1..3 value as process_kda_perfect leaves it: 'Perfect' -> 6"""
+    if isinstance(value, str) and value.lower() == 'perfect':
+        return 6.0
+    return _number(value)
+
+
+def _divide(a, b):
+    """a / b with NumPy semantics for a zero divisor (inf or nan instead of an exception)"""
+    if b == 0:
+        return np.nan if a == 0 or a != a else np.copysign(np.inf, a) * np.copysign(1, b)
+    return a / b
+
+
+def _adjust_quality(quality, games):
+    """Experienced (5+ games) low/high performances are scaled down/up"""
+    if games >= 5:
+        if quality < 0.4:
+            return quality * 0.8
+        if quality > 0.7:
+            return quality * 1.2
+    return quality
+
+
+class DraftFeatureBuilder:
+    """
+    Model input vector for one player in one draft, built with NumPy and plain dicts.
+
+    Gives the same values as running a one-row frame through create_champion_features,
+    convert_df and apply_feature_engineering, without their per-call pandas overhead.
+    The profile is a get_player_stats record (a player_stats_merged row works too).
+    Everything that only depends on the player is computed once by player_state, a
+    draft then only adds the teammate/opponent penalties, the top champions and the
+    draft columns. Columns follow MODEL_FEATURES.
+
+    Categorical features (most_role_1..3, champ_variety_score, playstyle,
+    role_specialization, recent_champ_1/2_loyal) are emitted as their raw values: role
+    numbers, counts and 0/1 flags as float32, i.e. the values of the categoricals
+    apply_feature_engineering returns, not their codes. The booster was trained on the
+    codes, so rows are encoded with the training categories (CategoryEncoder) before
+    prediction.
+    """
+
+    def __init__(self, meta_stats=None, weekly_meta=None):
+        self.penalty_table = DraftPenaltyTable.ensure(meta_stats)
+        self.meta_table = MetaScoreTable.ensure(weekly_meta)
+        self.converter = self.penalty_table.converter
+        self.champions = self.converter.champions
+        self.champion_index = {champion: i for i, champion in enumerate(self.champions)}
+        self.champion_ids = np.arange(1, len(self.champions) + 1)
+        self.meta_scores = self.meta_table.scores_for(self.champions)
+        self.feature_index = {name: i for i, name in enumerate(MODEL_FEATURES)}
+        self.team_slots = [self.feature_index[f'team_champ{i}'] for i in range(1, 5)]
+        self.opp_slots = [self.feature_index[f'opp_champ{i}'] for i in range(1, 6)]
+        self.top_slots = [self.feature_index[f'{i}_champ_name'] for i in range(1, TOP_N + 1)]
+
+    def _champion_idx(self, name):
+        """Score column of a champion name, None for missing/unknown names"""
+        return self.champion_index.get(name) if isinstance(name, str) else None
+
+    def _champion_number(self, name):
+        """Champion number as a float, NaN for missing/unknown names"""
+        idx = self._champion_idx(name)
+        return np.nan if idx is None else float(idx + 1)
+
+    def _base_scores(self, profile):
+        """Pre-penalty score of every champion (same formulas as compute_champion_scores)"""
+        get = profile.get
+        n_champions = len(self.champions)
+        recent = np.zeros(n_champions)
+        weekly = np.zeros(n_champions)
+        season = np.zeros(n_champions)
+        mastery = np.zeros(n_champions)
+
+        # Recent performance, the first slot listing a champion wins
+        total_games = _number(get('total_games'), 20)
+        seen = set()
+        for i in range(1, 4):
+            idx = self._champion_idx(get(f'most_champ_{i}'))
+            if idx is None or idx in seen:
+                continue
+            seen.add(idx)
+            wr = _number(get(f'WR_{i}'), 0)
+            kda = _number(_recent_kda(get(f'KDA_{i}')), 0)
+            games = _number(get(f'W_{i}'), 0) + _number(get(f'L_{i}'), 0)
+
+            performance_quality = _adjust_quality((wr * 0.7) + (min(kda, 10) / 10 * 0.3), games)
+            games_factor = min(games / 5, 1.0)
+            games_ratio = _divide(games, total_games)
+            recent[idx] = (
+                performance_quality * (0.7 + (0.3 * games_factor))
+            ) * (1 + games_ratio * 0.2)
+
+        # Weekly performance, only slots with weekly games count
+        profile_wr = _number(get('win_rate'), 0.5)
+        seen = set()
+        for i in range(1, 4):
+            idx = self._champion_idx(get(f'7d_champ_{i}'))
+            weekly_games = _number(get(f'7d_total_{i}'), 0)
+            if idx is None or idx in seen or not weekly_games > 0:
+                continue
+            seen.add(idx)
+            weekly_wins = _number(get(f'7d_W_{i}'), 0)
+            weekly_wr = _number(get(f'7d_WR_{i}'), 0)
+
+            wr_trend = (weekly_wr - profile_wr) / profile_wr if profile_wr > 0 else 0
+            win_ratio = weekly_wins / weekly_games
+            weekly_intensity = min(weekly_games / 10, 1.0)
+            weekly_performance = _adjust_quality(
+                (weekly_wr * 0.4) +
+                (max(min(wr_trend, 1), -1) * 0.2) +
+                (weekly_intensity * 0.2) +
+                (win_ratio * 0.2),
+                weekly_games
+            )
+            weekly[idx] = weekly_performance * (
+                0.7 + (0.3 * min(weekly_games / 5, 1.0))
+            )
+
+        # Season performance
+        seen = set()
+        for i in range(1, 8):
+            idx = self._champion_idx(get(f'season_champ_{i}'))
+            if idx is None or idx in seen:
+                continue
+            seen.add(idx)
+            wr = _number(get(f'wr_ssn_{i}'), 0)
+            games = _number(get(f'games_ssn_{i}'), 0)
+            kda = _number(_kda(get(f'kda_ssn_{i}'), get(f'k_ssn_{i}'), get(f'a_ssn_{i}')), 0)
+            season[idx] = (
+                wr * 0.7 +
+                (kda / 10) * 0.3
+            ) * (games / 100)
+
+        # Mastery
+        seen = set()
+        for i in range(1, 17):
+            idx = self._champion_idx(get(f'mastery_champ_{i}'))
+            if idx is None or idx in seen:
+                continue
+            seen.add(idx)
+            mastery[idx] = _number(get(f'm_lv_{i}'), 0) / 7
+
+        return (
+            recent * SCORE_WEIGHTS['recent'] +
+            weekly * SCORE_WEIGHTS['weekly'] +
+            self.meta_scores * SCORE_WEIGHTS['meta'] +
+            season * SCORE_WEIGHTS['season'] +
+            mastery * SCORE_WEIGHTS['mastery']
+        )
+
+    def player_state(self, profile):
+        """
+        Draft independent part of the features of one player:
+        {'base_scores': pre-penalty champion scores, 'vector': features with NaN draft columns}
+        """
+        # A get_player_stats record has kda_ratio/kill_participation without the merge suffix
+        profile = {
+            **profile,
+            **{f'{col}_profile': profile.get(col) for col in PROFILE_SUFFIXED if f'{col}_profile' not in profile}
+        }
+        get = profile.get
+        features = {}
+
+        avg_kills = _number(get('avg_kills'))
+        avg_deaths = _number(get('avg_deaths'))
+        avg_assists = _number(get('avg_assists'))
+        kda_ratio = _kda(get('kda_ratio_profile'), avg_kills, avg_assists)
+        kill_participation = _number(get('kill_participation_profile'))
+        features.update({
+            'avg_kills': avg_kills,
+            'avg_deaths': avg_deaths,
+            'avg_assists': avg_assists,
+            'kda_ratio_profile': kda_ratio,
+            'kill_participation_profile': kill_participation
+        })
+
+        most_champs = [self._champion_number(get(f'most_champ_{i}')) for i in range(1, 4)]
+        season_champs = [self._champion_number(get(f'season_champ_{i}')) for i in range(1, 8)]
+        weekly_champs = [self._champion_number(get(f'7d_champ_{i}')) for i in range(1, 4)]
+        features.update({
+            'most_champ_1': most_champs[0],
+            'most_champ_2': most_champs[1],
+            'season_champ_1': season_champs[0],
+            'season_champ_2': season_champs[1],
+            'season_champ_3': season_champs[2]
+        })
+
+        # Roles are numbers by the time get_most_role_3 runs, so no role is excluded
+        role_1_value = _number(get('most_role_1_value'))
+        role_2_value = _number(get('most_role_2_value'))
+        most_role_3, role_3_value = 0, 0.0
+        for position, role in enumerate(ROLES):
+            value = _number(get(role))
+            if position == 0 or value > role_3_value:
+                most_role_3, role_3_value = ROLE_MAPPING[role], value
+        features.update({
+            'most_role_1': ROLE_MAPPING.get(get('most_role_1'), np.nan),
+            'most_role_2': ROLE_MAPPING.get(get('most_role_2'), np.nan),
+            'most_role_1_value': role_1_value,
+            'most_role_2_value': role_2_value,
+            'most_role_3': most_role_3,
+            'most_role_3_value': role_3_value
+        })
+
+        # Distinct known champions among the recent and weekly slots
+        features['champ_variety_score'] = len({
+            number for number in most_champs + weekly_champs if number == number
+        })
+
+        playstyle_conditions = [
+            (avg_kills > avg_assists) and (kda_ratio > 3) and (kill_participation > 0.6),
+            (avg_assists > avg_kills) and (kda_ratio > 2.5) and (kill_participation > 0.55),
+            (avg_deaths > 3) and (avg_assists > avg_kills) and (kill_participation > 0.5),
+            (kill_participation < 0.5) and (kda_ratio > 2),
+            (avg_kills > 3) and (avg_deaths > 4) and (kill_participation > 0.55)
+        ]
+        features['playstyle'] = next((style for style, hit in enumerate(playstyle_conditions) if hit), 5)
+
+        specialization_conditions = [
+            role_1_value > 0.6,
+            (role_1_value <= 0.6) and (role_2_value >= 0.3),
+            (role_1_value <= 0.6) and (role_2_value < 0.3) and (role_1_value > 0.3) and (role_3_value > 0.1),
+            (role_1_value <= 0.6) and (role_2_value < 0.3) and (role_1_value > 0.3) and (role_3_value <= 0.1),
+            (role_1_value <= 0.3) and (role_1_value > 0) and (role_3_value >= 0.15)
+        ]
+        features['role_specialization'] = next(
+            (category for category, hit in enumerate(specialization_conditions) if hit), 5
+        )
+
+        loyalty_score, confidence_score, loyal_flags, _, _, _ = champion_loyalty_arrays(
+            np.array([most_champs[:2]]),
+            np.array([[_number(get('W_1')), _number(get('W_2'))]]),
+            np.array([[_number(get('L_1')), _number(get('L_2'))]]),
+            np.array([season_champs]),
+            np.array([[_number(get(f'games_ssn_{i}')) for i in range(1, 8)]])
+        )
+        features.update({
+            'champion_loyalty_score': loyalty_score[0],
+            'loyalty_confidence_score': confidence_score[0],
+            'recent_champ_1_loyal': loyal_flags[0][0],
+            'recent_champ_2_loyal': loyal_flags[1][0]
+        })
+
+        vector = np.full(len(MODEL_FEATURES), np.nan, dtype=np.float32)
+        for name, value in features.items():
+            vector[self.feature_index[name]] = value
+
+        return {'base_scores': self._base_scores(profile), 'vector': vector}
+
+    def drafts_features(self, state, drafts):
+        """
+        Feature matrix (drafts x MODEL_FEATURES, float32) of a player_state in several drafts.
+
+        drafts: list of (team_champs, opp_champs) pairs of champion names; shorter lists
+        (drafts still being locked in) leave the remaining slots empty. The player's base
+        scores are shared, only the teammate/opponent penalties are applied per draft.
+        """
+        drafts = [pad_draft(team, opp) for team, opp in drafts]
+        teams = [team for team, _ in drafts]
+        opps = [opp for _, opp in drafts]
+        if not drafts:
+            return np.zeros((0, len(MODEL_FEATURES)), dtype=np.float32)
+
+        scores = self.penalty_table.apply(
+            np.broadcast_to(state['base_scores'], (len(drafts), len(self.champions))),
+            self.penalty_table.encode_team(teams),
+            self.penalty_table.encode_opponents(opps),
+            champion_ids=self.champion_ids
+        )
+        # Clipped like compute_champion_scores and ranked in the float32 the batch path stores
+        scores = np.maximum(scores, 0).astype(np.float32)
+        if np.isnan(scores).any():
+            scores = np.nan_to_num(scores, nan=0.0)
+
+        matrix = np.repeat(state['vector'][None, :], len(drafts), axis=0)
+        matrix[:, self.team_slots] = [[self._champion_number(champ) for champ in team] for team in teams]
+        matrix[:, self.opp_slots] = [[self._champion_number(champ) for champ in opp] for opp in opps]
+        # Largest first, equal scores in column order, as top_n_indices ranks them
+        matrix[:, self.top_slots] = self.champion_ids[np.argsort(-scores, axis=1, kind='stable')[:, :TOP_N]]
+        return matrix
+
+    def draft_features(self, state, team_champs=None, opp_champs=None):
+        """Feature vector (float32, MODEL_FEATURES order) of a player_state in one draft"""
+        return self.drafts_features(state, [(team_champs, opp_champs)])[0]
+
+    def build(self, profile, team_champs=None, opp_champs=None):
+        """Feature vector (float32, MODEL_FEATURES order) of one player in one draft"""
+        return self.draft_features(self.player_state(profile), team_champs, opp_champs)
+
+    def as_dict(self, vector):
+        """Feature vector as {feature name: value}"""
+        return dict(zip(MODEL_FEATURES, vector.tolist()))
+
+
+def lock_in_sequence(team_champs, opp_champs):
+    """
+    What-if drafts for opponents locking in one at a time: the draft with the full team
+    and no opponents, then with opp_champs[:1], opp_champs[:2], ... up to all of them
+    """
+    team_champs = list(team_champs) if team_champs is not None else []
+    opp_champs = list(opp_champs) if opp_champs is not None else []
+    return [(team_champs, opp_champs[:count]) for count in range(len(opp_champs) + 1)]
+
+
+class CategoryEncoder:
+    """
+    Category codes of the categorical model features.
+
+    apply_feature_engineering (optimize_feature_dtypes) turns role numbers, counts and
+    flags into pandas categoricals whose categories are the values present in the frame,
+    with missing values as an 'Unknown' category. XGBoost trained with
+    enable_categorical=True split on their codes, not on the values, so the categories of
+    the training frame are saved next to the model and raw values are encoded with them
+    before prediction. Missing values get the 'Unknown' code where training had that
+    category; values training never saw become missing.
+    """
+
+    def __init__(self, categories):
+        # Feature name -> category values, in code order
+        self.categories = {name: list(values) for name, values in categories.items()}
+        self._lookups = {}
+        for name, values in self.categories.items():
+            numbers, codes, unknown = [], [], np.nan
+            for code, value in enumerate(values):
+                number = _number(value)
+                if number == number:
+                    numbers.append(number)
+                    codes.append(code)
+                elif value == UNKNOWN_CATEGORY:
+                    unknown = code
+            order = np.argsort(numbers, kind='stable')
+            self._lookups[name] = (
+                np.asarray(numbers, dtype=np.float64)[order], np.asarray(codes, dtype=np.float32)[order], np.float32(unknown)
+            )
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Categories of every categorical column of a training frame"""
+        return cls({
+            col: [value.item() if isinstance(value, np.generic) else value for value in frame[col].cat.categories]
+            for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)
+        })
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.categories, f, indent=2)
+
+    def codes(self, name, values):
+        """Category codes (float32, NaN for missing) of the raw values of one feature"""
+        numbers, codes, unknown = self._lookups[name]
+        values = np.asarray(values, dtype=np.float64)
+        encoded = np.full(len(values), np.nan, dtype=np.float32)
+        encoded[np.isnan(values)] = unknown
+        if len(numbers):
+            idx = np.minimum(np.searchsorted(numbers, values), len(numbers) - 1)
+            hit = numbers[idx] == values
+            encoded[hit] = codes[idx[hit]]
+        return encoded
+
+    def encode(self, matrix, feature_names=None):
+        """
+        Copy of a raw feature matrix (rows x feature_names, MODEL_FEATURES by default)
+        with the categorical columns replaced by their category codes
+        """
+        feature_names = feature_names if feature_names is not None else MODEL_FEATURES
+        matrix = np.array(matrix, dtype=np.float32)
+        for col, name in enumerate(feature_names):
+            if name in self._lookups:
+                matrix[:, col] = self.codes(name, matrix[:, col])
+        return matrix
@@ -0,0 +1,204 @@
+import queue
+import threading
+import atexit
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Browsers launched per pool and pages a browser serves before it is replaced
+POOL_SIZE = 1
+MAX_PAGES = 100
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+CHROME_ARGUMENTS = [
+    "--headless", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu",
+    "--disable-extensions", "--disable-logging", "--log-level=3", "--silent",
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def chromedriver_path():
+    """Install chromedriver once per process and return its path"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def chrome_options(page_load_strategy='eager', block_images=False, window_size=None):
+    """Headless Chrome options shared by the scrapers"""
+    options = Options()
+    for arg in CHROME_ARGUMENTS:
+        options.add_argument(arg)
+    if window_size:
+        options.add_argument(f"--window-size={window_size}")
+    if block_images:
+        options.add_experimental_option('prefs', {
+            'profile.default_content_setting_values': {'notifications': 2},
+            'profile.managed_default_content_settings': {'images': 2}
+        })
+    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    options.page_load_strategy = page_load_strategy
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return options
+
+
+class PooledDriver:
+    """
+    Chrome WebDriver handed out by a DriverPool.
+
+    Behaves like the wrapped driver and counts the pages loaded through get(),
+    so the pool can replace the browser after max_pages.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+    def get(self, url):
+        self.pages += 1
+        return self.driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def reset(self):
+        """Drop cookies, storage and extra tabs left behind by the last task"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        try:
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass  # Pages without storage access (about:blank, error pages)
+        self.driver.delete_all_cookies()
+        self.driver.get("about:blank")
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+
+
+class DriverPool:
+    """
+    Fixed set of headless Chrome browsers shared by the scrapers.
+
+    Browsers are launched up front and leased per task with `with pool.driver() as driver:`.
+    On return a browser is reset (cookies, storage, extra tabs); it is replaced when the
+    reset fails (crashed or hung browser) or after max_pages page loads. Empty slots
+    are relaunched by the next lease, so a failed launch does not shrink the pool.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, options=None, lease_timeout=None):
+        self.size = 0
+        self.max_pages = max_pages
+        self.options = options if options is not None else chrome_options()
+        self.lease_timeout = lease_timeout
+        self.launched = 0
+        self.closed = False
+        self._slots = queue.Queue()
+        self._lock = threading.Lock()
+        self.grow(size)
+
+    def _launch(self):
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=self.options)
+        with self._lock:
+            self.launched += 1
+        return PooledDriver(driver)
+
+    def grow(self, size):
+        """Launch browsers until the pool holds `size` of them"""
+        while self.size < size:
+            try:
+                slot = self._launch()
+            except Exception as e:
+                print(f"Error launching browser: {e}")
+                slot = None
+            self.size += 1
+            self._slots.put(slot)
+
+    @contextmanager
+    def driver(self):
+        """Lease a browser for one task, blocks while all browsers are busy"""
+        if self.closed:
+            raise RuntimeError("Driver pool is closed")
+        slot = self._slots.get(timeout=self.lease_timeout)
+        if slot is None:
+            try:
+                slot = self._launch()
+            except Exception:
+                self._slots.put(None)
+                raise
+        try:
+            yield slot
+        finally:
+            self._release(slot)
+
+    def _release(self, slot):
+        if self.closed:
+            slot.quit()
+            return
+        if slot.pages >= self.max_pages:
+            slot.quit()
+            self._slots.put(None)
+            return
+        try:
+            slot.reset()
+        except Exception as e:
+            print(f"Replacing browser after failed reset: {e}")
+            slot.quit()
+            slot = None
+        self._slots.put(slot)
+
+    def close(self):
+        """Quit idle browsers, leased ones are quit when returned"""
+        self.closed = True
+        while True:
+            try:
+                slot = self._slots.get_nowait()
+            except queue.Empty:
+                break
+            if slot is not None:
+                slot.quit()
+
+
+def get_pool(name="default", size=None, max_pages=MAX_PAGES, **option_kwargs):
+    """
+    Shared DriverPool registered under `name`, created on first use.
+
+    option_kwargs are passed to chrome_options() when the pool is created. Asking for a
+    larger size than an existing pool has launches the extra browsers.
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None or pool.closed:
+            pool = DriverPool(size=size or POOL_SIZE, max_pages=max_pages, options=chrome_options(**option_kwargs))
+            _pools[name] = pool
+        elif size is not None and size > pool.size:
+            pool.grow(size)
+        return pool
+
+
+def close_pools():
+    """Quit the browsers of every shared pool"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_pools)
@@ -0,0 +1,97 @@
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+
+# Default location of the champion feature checkpoint
+CHECKPOINT_DIR = os.path.join("util", "data", "feature_eng_checkpoint")
+MANIFEST_FILE = "manifest.json"
+SHARD_PATTERN = re.compile(r"batch_\d{9}\.parquet")
+
+
+class FeatureCheckpoint:
+    """
+    Append-only checkpoint for champion score batches.
+
+    Each completed batch is written once as a Parquet shard holding only the
+    (rows x champions) score block, then recorded in a small JSON manifest.
+    The manifest is replaced atomically after the shard is on disk, so a crashed
+    run resumes from the last completed batch. A manifest whose fingerprint does
+    not match the current input/meta/settings is discarded and the run starts over.
+    """
+
+    def __init__(self, checkpoint_dir=None, fingerprint=None, batch_size=None, total_rows=None, columns=None):
+        self.checkpoint_dir = checkpoint_dir if checkpoint_dir is not None else CHECKPOINT_DIR
+        self.manifest_path = os.path.join(self.checkpoint_dir, MANIFEST_FILE)
+        self.columns = list(columns) if columns is not None else []
+
+        expected = {
+            'fingerprint': fingerprint,
+            'batch_size': batch_size,
+            'total_rows': total_rows,
+            'columns': self.columns
+        }
+
+        manifest = self._read_manifest()
+        if manifest is not None and all(manifest.get(key) == value for key, value in expected.items()):
+            self.manifest = manifest
+            if self.manifest['batches']:
+                print(f"Resuming from checkpoint: {len(self.manifest['batches'])} batches already completed")
+        else:
+            if manifest is not None:
+                print("Checkpoint does not match current input, starting over")
+            self.clear()
+            self.manifest = {**expected, 'batches': {}}
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading checkpoint manifest: {e}")
+            return None
+
+    def _write_manifest(self):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def has_batch(self, batch_start):
+        return str(batch_start) in self.manifest['batches']
+
+    def write_batch(self, batch_start, batch_end, scores):
+        """Write one completed batch of scores (batch rows x columns) as a new shard"""
+        shard_file = f"batch_{batch_start:09d}.parquet"  # Matches SHARD_PATTERN
+        shard_path = os.path.join(self.checkpoint_dir, shard_file)
+        pd.DataFrame(np.asarray(scores), columns=self.columns).to_parquet(shard_path, index=False)
+
+        self.manifest['batches'][str(batch_start)] = {'end': batch_end, 'file': shard_file}
+        self._write_manifest()
+
+    def read_batch(self, batch_start):
+        """Scores of a completed batch as a (batch rows x columns) float64 array"""
+        shard_file = self.manifest['batches'][str(batch_start)]['file']
+        shard = pd.read_parquet(os.path.join(self.checkpoint_dir, shard_file), columns=self.columns)
+        return shard.to_numpy(dtype=np.float64)
+
+    def completed_rows(self):
+        return sum(batch['end'] - int(start) for start, batch in self.manifest['batches'].items())
+
+    def clear(self):
+        """
+        Remove the shards and manifest written by this class. Other files in checkpoint_dir
+        are left alone, the directory itself is removed only when nothing else is in it.
+        """
+        if not os.path.isdir(self.checkpoint_dir):
+            return
+        for name in os.listdir(self.checkpoint_dir):
+            if name in (MANIFEST_FILE, MANIFEST_FILE + ".tmp") or SHARD_PATTERN.fullmatch(name):
+                os.remove(os.path.join(self.checkpoint_dir, name))
+        if not os.listdir(self.checkpoint_dir):
+            os.rmdir(self.checkpoint_dir)
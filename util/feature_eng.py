@@ -1,19 +1,694 @@
 import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
-from helper import ChampionConverter, process_kda_perfect
+from helper import (ChampionConverter, MetaScoreTable, DraftPenaltyTable, FeatureStore, TIER_PENALTIES,
+                    process_kda_perfect, snapshot_key)
+from feature_checkpoint import FeatureCheckpoint
+from data_store import load_dataset, save_dataset
+
+# Importance weights of the champion score components
+SCORE_WEIGHTS = {
+    'recent': 0.3,    # Last 20 games
+    'weekly': 0.4,    # Last 7 days
+    'meta': 0.2,      # Only from weekly_stats
+    'season': 0.06,   # Current season
+    'mastery': 0.04   # All-time mastery
+}
+
+# Scoring inputs of the worker processes, set before the pool is created so forked
+# workers inherit them without pickling (spawned workers receive them once each)
+_WORKER_STATE = {}
+
+
+def _numeric_column(df, col, default=0):
+    """Return a column as a float64 array, missing values replaced by default"""
+    return pd.to_numeric(df[col], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+
+
+def _champion_ids(df, col, champion_index):
+    """Map a champion name column to champion indices, -1 where missing or unknown"""
+    if col not in df.columns:
+        return np.full(len(df), -1, dtype=np.int64)
+    return df[col].map(champion_index).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _recent_component(df, champion_index):
+    """Recent performance score matrix from most_champ_1..3"""
+    rows = np.arange(len(df))
+    component = np.zeros((len(df), len(champion_index)))
+
+    # Walk slots backwards so the first matching slot wins, like the reference loop
+    for i in range(3, 0, -1):
+        ids = _champion_ids(df, f'most_champ_{i}', champion_index)
+        hit = ids >= 0
+        if not hit.any():
+            continue
+
+        wr = _numeric_column(df, f'WR_{i}')
+        kda = _numeric_column(df, f'KDA_{i}')
+        games = _numeric_column(df, f'W_{i}') + _numeric_column(df, f'L_{i}')
+        total_games = _numeric_column(df, 'total_games', 20)
+
+        performance_quality = (
+            (wr * 0.7) +
+            (np.minimum(kda, 10) / 10 * 0.3)
+        )
+
+        games_factor = np.minimum(games / 5, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            games_ratio = games / total_games
+
+        experienced = games >= 5
+        performance_quality = np.where(
+            experienced & (performance_quality < 0.4), performance_quality * 0.8,
+            np.where(experienced & (performance_quality > 0.7), performance_quality * 1.2, performance_quality)
+        )
+
+        score = (
+            performance_quality * (0.7 + (0.3 * games_factor))
+        ) * (1 + games_ratio * 0.2)
+        component[rows[hit], ids[hit]] = score[hit]
+
+    return component
+
+
+def _weekly_component(df, champion_index):
+    """Weekly performance score matrix from 7d_champ_1..3"""
+    rows = np.arange(len(df))
+    component = np.zeros((len(df), len(champion_index)))
+
+    for i in range(3, 0, -1):
+        ids = _champion_ids(df, f'7d_champ_{i}', champion_index)
+        if not (ids >= 0).any():
+            continue
+
+        weekly_wins = _numeric_column(df, f'7d_W_{i}')
+        weekly_games = _numeric_column(df, f'7d_total_{i}')
+        weekly_wr = _numeric_column(df, f'7d_WR_{i}')
+        profile_wr = _numeric_column(df, 'win_rate', 0.5)
+
+        # The reference loop only stops at a slot that has weekly games
+        hit = (ids >= 0) & (weekly_games > 0)
+        if not hit.any():
+            continue
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            wr_trend = np.where(profile_wr > 0, (weekly_wr - profile_wr) / profile_wr, 0)
+            win_ratio = np.where(weekly_games > 0, weekly_wins / weekly_games, 0)
+        weekly_intensity = np.minimum(weekly_games / 10, 1.0)
+
+        weekly_performance = (
+            (weekly_wr * 0.4) +
+            (np.clip(wr_trend, -1, 1) * 0.2) +
+            (weekly_intensity * 0.2) +
+            (win_ratio * 0.2)
+        )
+
+        experienced = weekly_games >= 5
+        weekly_performance = np.where(
+            experienced & (weekly_performance < 0.4), weekly_performance * 0.8,
+            np.where(experienced & (weekly_performance > 0.7), weekly_performance * 1.2, weekly_performance)
+        )
+
+        score = weekly_performance * (
+            0.7 + (0.3 * np.minimum(weekly_games / 5, 1.0))
+        )
+        component[rows[hit], ids[hit]] = score[hit]
+
+    return component
+
+
+def _season_component(df, champion_index):
+    """Season performance score matrix from season_champ_1..7"""
+    rows = np.arange(len(df))
+    component = np.zeros((len(df), len(champion_index)))
+
+    for i in range(7, 0, -1):
+        ids = _champion_ids(df, f'season_champ_{i}', champion_index)
+        hit = ids >= 0
+        if not hit.any():
+            continue
+
+        wr = _numeric_column(df, f'wr_ssn_{i}')
+        games = _numeric_column(df, f'games_ssn_{i}')
+        kda = _numeric_column(df, f'kda_ssn_{i}')
+
+        score = (
+            wr * 0.7 +
+            (kda / 10) * 0.3
+        ) * (games / 100)
+        component[rows[hit], ids[hit]] = score[hit]
+
+    return component
+
+
+def _mastery_component(df, champion_index):
+    """Mastery score matrix from mastery_champ_1..16"""
+    rows = np.arange(len(df))
+    component = np.zeros((len(df), len(champion_index)))
+
+    for i in range(16, 0, -1):
+        ids = _champion_ids(df, f'mastery_champ_{i}', champion_index)
+        hit = ids >= 0
+        if not hit.any():
+            continue
+
+        mastery = _numeric_column(df, f'm_lv_{i}')
+        component[rows[hit], ids[hit]] = mastery[hit] / 7
+
+    return component
+
+
+def _draft_columns(df, prefix, n_slots):
+    """Draft champion names (rows x slots); missing columns count as empty slots"""
+    return pd.DataFrame({
+        i: df[f'{prefix}{i}'] if f'{prefix}{i}' in df.columns else pd.Series(np.nan, index=df.index)
+        for i in range(1, n_slots + 1)
+    })
+
+
+def _score_chunk(chunk, champion_index, meta_scores, penalty_table, champion_ids, consider_team_comp):
+    """Score one chunk of rows, returns (clamped scores, component matrices)"""
+    recent = _recent_component(chunk, champion_index)
+    weekly = _weekly_component(chunk, champion_index)
+    season = _season_component(chunk, champion_index)
+    mastery = _mastery_component(chunk, champion_index)
+
+    base_score = (
+        recent * SCORE_WEIGHTS['recent'] +
+        weekly * SCORE_WEIGHTS['weekly'] +
+        meta_scores * SCORE_WEIGHTS['meta'] +
+        season * SCORE_WEIGHTS['season'] +
+        mastery * SCORE_WEIGHTS['mastery']
+    )
+
+    team_ids = opp_ids = None
+    if consider_team_comp:
+        team_ids = penalty_table.encode_team(_draft_columns(chunk, 'team_champ', 4))
+        opp_ids = penalty_table.encode_opponents(_draft_columns(chunk, 'opp_champ', 5))
+
+    final_score, counter_penalty = penalty_table.apply(
+        base_score, team_ids, opp_ids, champion_ids=champion_ids, return_penalty=True
+    )
+
+    components = {
+        'recent_score': recent,
+        'weekly_score': weekly,
+        'meta_score': np.broadcast_to(meta_scores, recent.shape),
+        'season_score': season,
+        'mastery_score': mastery,
+        'base_score': base_score,
+        'final_score': final_score,
+        'counter_penalty': counter_penalty
+    }
+    return np.maximum(final_score, 0), components
+
+
+def compute_champion_scores(merged_player_stats, meta_stats, weekly_meta, champions=None,
+                            consider_team_comp=True, chunk_size=10000, return_components=False,
+                            checkpoint=None, workers=1, dtype=np.float64):
+    """
+    Vectorized champion scoring engine.
+
+    Builds the recent, weekly, meta, season and mastery components as dense
+    (rows x champions) matrices by scattering over the champion slot columns,
+    then applies tier, teammate/opponent and counter penalties with array operations.
+    Produces the same scores as the reference loop in create_champion_features.
+
+    Parameters:
+    merged_player_stats: DataFrame with KDA values already processed
+    meta_stats: DraftPenaltyTable, or DataFrame with champion tiers and counters
+    weekly_meta: MetaScoreTable, or DataFrame with weekly champion statistics
+    champions: list of champion names, one score column each (defaults to ChampionConverter)
+    consider_team_comp: apply teammate/opponent zeroing and counter penalties
+    chunk_size: number of rows scored at once, bounds memory of the dense matrices
+    return_components: also return the per-component matrices (for debugging)
+    checkpoint: FeatureCheckpoint with batch_size == chunk_size; completed chunks are
+        read back instead of recomputed and new chunks are appended as shards
+    workers: number of processes scoring chunks in parallel (ignored with return_components)
+    dtype: dtype of the returned scores; chunks are scored in float64 and written into one
+        preallocated C-contiguous block, so float32 halves the output without a float64 copy
+
+    Returns:
+    (scores, components): array of shape (rows, champions) and a dict of float64
+    component arrays (None unless return_components is set)
+    """
+    if champions is None:
+        champions = ChampionConverter().champions
+    champion_index = {champion: i for i, champion in enumerate(champions)}
+
+    meta_scores = MetaScoreTable.ensure(weekly_meta).scores_for(champions)
+    penalty_table = DraftPenaltyTable.ensure(meta_stats)
+    champion_ids = [penalty_table.converter.champion_to_number[champion] for champion in champions]
+
+    total_rows = len(merged_player_stats)
+    if workers > 1 and not return_components:
+        state = {
+            'merged_player_stats': merged_player_stats,
+            'champion_index': champion_index,
+            'meta_scores': meta_scores,
+            'penalty_table': penalty_table,
+            'champion_ids': champion_ids,
+            'consider_team_comp': consider_team_comp
+        }
+        scores = _parallel_champion_scores(state, total_rows, len(champions), chunk_size, workers, checkpoint, dtype)
+        return scores, None
+
+    scores = np.zeros((total_rows, len(champions)), dtype=dtype)
+    components = None
+    if return_components:
+        components = {
+            name: np.zeros((total_rows, len(champions)))
+            for name in ['recent_score', 'weekly_score', 'meta_score', 'season_score',
+                         'mastery_score', 'base_score', 'final_score', 'counter_penalty']
+        }
+
+    for chunk_start in range(0, total_rows, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, total_rows)
+        chunk = merged_player_stats.iloc[chunk_start:chunk_end]
+
+        if checkpoint is not None and not return_components and checkpoint.has_batch(chunk_start):
+            scores[chunk_start:chunk_end] = checkpoint.read_batch(chunk_start)
+            continue
+
+        scores[chunk_start:chunk_end], chunk_components = _score_chunk(
+            chunk, champion_index, meta_scores, penalty_table, champion_ids, consider_team_comp
+        )
+
+        if checkpoint is not None:
+            checkpoint.write_batch(chunk_start, chunk_end, scores[chunk_start:chunk_end])
+
+        if return_components:
+            for name, values in chunk_components.items():
+                components[name][chunk_start:chunk_end] = values
+
+    return scores, components
+
+
+def _init_worker(state):
+    """Pool initializer for start methods without fork"""
+    _WORKER_STATE.update(state)
+
+
+def _score_chunk_worker(task):
+    """Score rows [chunk_start, chunk_end) straight into the shared output array"""
+    chunk_start, chunk_end, shm_name, shape, dtype = task
+    state = _WORKER_STATE
+    chunk = state['merged_player_stats'].iloc[chunk_start:chunk_end]
+    chunk_scores, _ = _score_chunk(
+        chunk, state['champion_index'], state['meta_scores'], state['penalty_table'],
+        state['champion_ids'], state['consider_team_comp']
+    )
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        scores = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        scores[chunk_start:chunk_end] = chunk_scores
+        del scores
+    finally:
+        shm.close()
+    return chunk_start, chunk_end
+
+
+def _parallel_champion_scores(state, total_rows, n_champions, chunk_size, workers, checkpoint=None, dtype=np.float64):
+    """
+    Score chunks of rows in a process pool.
+
+    With fork the inputs and lookup tables are inherited by the workers (copy-on-write),
+    otherwise they are sent once per worker through the pool initializer. Only chunk
+    bounds go through the task queue and workers write their scores into one shared
+    memory block, so results are never pickled back. Every chunk is scored exactly as
+    in the serial path, so the output is identical.
+    """
+    shape = (total_rows, n_champions)
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(total_rows * n_champions * dtype.itemsize, 1))
+    try:
+        scores = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        scores[:] = 0
+
+        tasks = []
+        for chunk_start in range(0, total_rows, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, total_rows)
+            if checkpoint is not None and checkpoint.has_batch(chunk_start):
+                scores[chunk_start:chunk_end] = checkpoint.read_batch(chunk_start)
+            else:
+                tasks.append((chunk_start, chunk_end, shm.name, shape, dtype.str))
+
+        if tasks:
+            if "fork" in mp.get_all_start_methods():
+                _WORKER_STATE.update(state)
+                pool = mp.get_context("fork").Pool(min(workers, len(tasks)))
+            else:
+                pool = mp.get_context().Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(state,))
+            try:
+                for chunk_start, chunk_end in pool.imap_unordered(_score_chunk_worker, tasks):
+                    if checkpoint is not None:
+                        checkpoint.write_batch(chunk_start, chunk_end, scores[chunk_start:chunk_end])
+            finally:
+                pool.close()
+                pool.join()
+                _WORKER_STATE.clear()
+
+        result = scores.copy()
+        del scores
+        return result
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _vectorized_debug_rows(merged_player_stats, meta_stats, components, scores, all_champions, debug):
+    """Build reference-style debug rows for a single champion from the score components"""
+    if debug not in all_champions:
+        print(f"Debug champion {debug} not found in champion list")
+        return []
+
+    champ_idx = all_champions.index(debug)
+    champion_index = {champion: i for i, champion in enumerate(all_champions)}
+    countered_by = DraftPenaltyTable.ensure(meta_stats).countered_by(debug)
+    print(f"{debug} is countered by: {countered_by}")
+
+    debug_data = []
+    for row_idx, (_, row) in enumerate(merged_player_stats.iterrows()):
+        counter_list = [
+            row[f'opp_champ{i}'] for i in range(1, 6)
+            if f'opp_champ{i}' in row and pd.notna(row[f'opp_champ{i}']) and row[f'opp_champ{i}'] in countered_by
+        ]
+        played_idx = champion_index.get(row['champion'])
+        debug_data.append({
+            'champion': row['champion'],
+            'recent_score': components['recent_score'][row_idx, champ_idx],
+            'weekly_score': components['weekly_score'][row_idx, champ_idx],
+            'meta_score': components['meta_score'][row_idx, champ_idx],
+            'base_score': components['base_score'][row_idx, champ_idx],
+            'final_score': components['final_score'][row_idx, champ_idx],
+            'counter_penalty': components['counter_penalty'][row_idx, champ_idx],
+            'final_score_actual': scores[row_idx, played_idx] if played_idx is not None else components['final_score'][row_idx, champ_idx],
+            'counter_list_debug': counter_list
+        })
+    return debug_data
+
+
+def _reference_champion_scores(merged_player_stats, meta_stats, weekly_meta, all_champions,
+                               feature_dict, original_columns, debug=None, consider_team_comp=True,
+                               checkpoint=None):
+    """
+    Original row x champion scoring loop, kept as the reference implementation.
+    Fills feature_dict in place and returns the collected debug rows.
+    checkpoint: FeatureCheckpoint with batch_size 100; completed batches are skipped.
+    """
+    debug_data = []
+    meta_table = MetaScoreTable.ensure(weekly_meta)
+    if isinstance(meta_stats, DraftPenaltyTable):
+        meta_stats = meta_stats.meta_stats
+
+    # Get low tier champions and counter information
+    tier_penalties = TIER_PENALTIES
+
+    # Create tier_map as a dictionary of lists
+    tier_map = {}
+    for _, row in meta_stats.iterrows():
+        champ = row['champion']
+        tier = row['tier']
+        if pd.notna(tier):
+            if champ in tier_map:
+                tier_map[champ].append(tier)
+            else:
+                tier_map[champ] = [tier]
+
+    counter_map = {}
+    for _, row in meta_stats.iterrows():
+        if pd.notna(row['counter1']):
+            champ = row['champion']
+            counters = [row['counter1'], row['counter2'], row['counter3']]
+            if champ in counter_map:
+                counter_map[champ].extend([c for c in counters if pd.notna(c)])
+            else:
+                counter_map[champ] = [c for c in counters if pd.notna(c)]
+
+    # Ensure unique counters and remove duplicates
+    for champ, counters in counter_map.items():
+        counter_map[champ] = list(set(counters))
+
+    # Define importance weights
+    weights = SCORE_WEIGHTS
+
+    # Process rows in batches
+    batch_size = 100
+    total_rows = len(merged_player_stats)
+    
+    print(f"Total rows: {total_rows}")
+
+    for batch_start in range(0, total_rows, batch_size):
+        batch_end = min(batch_start + batch_size, total_rows)
+        batch_rows = merged_player_stats.iloc[batch_start:batch_end]
+
+        if checkpoint is not None and checkpoint.has_batch(batch_start):
+            batch_values = checkpoint.read_batch(batch_start)
+            for champ_idx, champion in enumerate(all_champions):
+                if champion not in feature_dict:
+                    feature_dict[champion] = np.zeros(total_rows)
+                feature_dict[champion][batch_start:batch_end] = batch_values[:, champ_idx]
+            continue
+
+        print(f"\nProcessing rows {batch_start} to {batch_end} ({batch_start/total_rows*100:.2f}% complete)")
+
+        # Initialize batch scores dictionary
+        batch_scores = {champion: np.zeros(len(batch_rows)) for champion in all_champions}
+        
+        # Process each row in this batch
+        for batch_idx, (idx, row) in enumerate(batch_rows.iterrows()):
+            # Process each champion for this row
+            for champion in all_champions:
+                # Initialize scores for this champion and row
+                champion_scores = {
+                    'recent_score': 0,
+                    'weekly_score': 0,
+                    'meta_score': 0,
+                    'season_score': 0,
+                    'mastery_score': 0
+                }
+
+                # Store debug info if needed
+                base_score_before_penalty = 0
+                counter_penalty = 0
+                counter_debug = []
+
+                # 1. Recent Performance
+                for i in range(1, 4):
+                    if row.get(f'most_champ_{i}') == champion:
+                        wr = float(row[f'WR_{i}']) if pd.notna(row[f'WR_{i}']) else 0
+                        kda = float(row[f'KDA_{i}']) if pd.notna(row[f'KDA_{i}']) else 0
+                        wins = float(row[f'W_{i}']) if pd.notna(row[f'W_{i}']) else 0
+                        losses = float(row[f'L_{i}']) if pd.notna(row[f'L_{i}']) else 0
+                        games = wins + losses
+                        total_games = float(row['total_games']) if pd.notna(row['total_games']) else 20
+                        
+                        performance_quality = (
+                            (wr * 0.7) +
+                            (min(kda, 10) / 10 * 0.3)
+                        )
+                        
+                        games_factor = min(games / 5, 1.0)
+                        games_ratio = games / total_games
+                        
+                        if games >= 5:
+                            if performance_quality < 0.4:
+                                performance_quality *= 0.8
+                            elif performance_quality > 0.7:
+                                performance_quality *= 1.2
+                        
+                        champion_scores['recent_score'] = (
+                            performance_quality * (0.7 + (0.3 * games_factor))
+                        ) * (1 + games_ratio * 0.2)
+                        break  # Exit loop once found
+                
+                # 2. Weekly Performance
+                for i in range(1, 4):
+                    if row.get(f'7d_champ_{i}') == champion:
+                        weekly_wins = float(row[f'7d_W_{i}']) if pd.notna(row[f'7d_W_{i}']) else 0
+                        weekly_losses = float(row[f'7d_L_{i}']) if pd.notna(row[f'7d_L_{i}']) else 0
+                        weekly_games = float(row[f'7d_total_{i}']) if pd.notna(row[f'7d_total_{i}']) else 0
+                        weekly_wr = float(row[f'7d_WR_{i}']) if pd.notna(row[f'7d_WR_{i}']) else 0
+                        profile_wr = float(row['win_rate']) if pd.notna(row['win_rate']) else 0.5
+                        
+                        if weekly_games > 0:
+                            wr_trend = (weekly_wr - profile_wr) / profile_wr if profile_wr > 0 else 0
+                            weekly_intensity = min(weekly_games / 10, 1.0)
+                            win_ratio = weekly_wins / weekly_games if weekly_games > 0 else 0
+                            
+                            weekly_performance = (
+                                (weekly_wr * 0.4) +
+                                (max(min(wr_trend, 1), -1) * 0.2) +
+                                (weekly_intensity * 0.2) +
+                                (win_ratio * 0.2)
+                            )
+                            
+                            if weekly_games >= 5:
+                                if weekly_performance < 0.4:
+                                    weekly_performance *= 0.8
+                                elif weekly_performance > 0.7:
+                                    weekly_performance *= 1.2
+                            
+                            champion_scores['weekly_score'] = weekly_performance * (
+                                0.7 + (0.3 * min(weekly_games / 5, 1.0))
+                            )
+                            break  # Exit loop once found
+
+                # 3. Meta Score
+                champion_scores['meta_score'] = meta_table.score(champion)
+
+                # 4. Season Performance
+                for i in range(1, 8):
+                    if row.get(f'season_champ_{i}') == champion:
+                        wr = float(row[f'wr_ssn_{i}']) if pd.notna(row[f'wr_ssn_{i}']) else 0
+                        games = float(row[f'games_ssn_{i}']) if pd.notna(row[f'games_ssn_{i}']) else 0
+                        kda = float(row[f'kda_ssn_{i}']) if pd.notna(row[f'kda_ssn_{i}']) else 0
+                        
+                        champion_scores['season_score'] = (
+                            wr * 0.7 +
+                            (kda / 10) * 0.3 
+                        ) * (games / 100)
+                        break  # Exit loop once found
+                
+                # 5. Mastery Score
+                for i in range(1, 17):
+                    if row.get(f'mastery_champ_{i}') == champion:
+                        mastery = float(row[f'm_lv_{i}']) if pd.notna(row[f'm_lv_{i}']) else 0            
+                        champion_scores['mastery_score'] = mastery / 7
+                        break  # Exit loop once found
+
+                # Calculate base score for this champion and row
+                base_score = (
+                    champion_scores['recent_score'] * weights['recent'] +
+                    champion_scores['weekly_score'] * weights['weekly'] +
+                    champion_scores['meta_score'] * weights['meta'] +
+                    champion_scores['season_score'] * weights['season'] +
+                    champion_scores['mastery_score'] * weights['mastery']
+                )
+
+                
+                # Store the pre-penalty score for debugging
+                base_score_before_penalty = base_score
+
+                # Apply tier penalties
+                if champion in tier_map:
+                    highest_tier = min(tier_map[champion])
+                    if highest_tier in tier_penalties:
+                        base_score *= tier_penalties[highest_tier]
+
+                # Process team composition and counter penalties
+                if consider_team_comp:
+                    # Check team champions
+                    for i in range(1, 5):
+                        team_col = f'team_champ{i}'
+                        if team_col in row and pd.notna(row[team_col]):
+                            if row[team_col] == champion:
+                                base_score = 0
+                                break
+                    
+                    # Only check opponents if base_score isn't already 0
+                    if base_score != 0:
+                        counter_penalty = 0
+                        counter_debug = []  # For debug information
+                        
+                        for i in range(1, 6):
+                            opp_col = f'opp_champ{i}'
+                            if opp_col in row and pd.notna(row[opp_col]):
+                                opp_champ = row[opp_col]
+                                if opp_champ == champion:
+                                    base_score = 0
+                                    break
+                                if champion in counter_map and opp_champ in counter_map[champion]:
+                                    counter_penalty += 0.1
+                                    counter_debug.append(opp_champ)
+                        
+                        if counter_penalty > 0:
+                            base_score = base_score * (1 - counter_penalty)
+
+                # Store the final score for this champion and row
+                batch_scores[champion][batch_idx] = max(base_score, 0)
+
+                # Collect debug data if this is the debug champion
+                if debug == champion:
+                    counter_list = []
+                    for i in range(1, 6):
+                        opp_col = f'opp_champ{i}'
+                        if opp_col in row and pd.notna(row[opp_col]):
+                            if champion in counter_map and row[opp_col] in counter_map[champion]:
+                                counter_list.append(row[opp_col])
+
+                    debug_row = {
+                        'champion': row['champion'],
+                        'recent_score': champion_scores['recent_score'],
+                        'weekly_score': champion_scores['weekly_score'],
+                        'meta_score': champion_scores['meta_score'],
+                        'base_score': base_score_before_penalty,
+                        'final_score': base_score,
+                        'counter_penalty': counter_penalty if consider_team_comp else 0,
+                        'final_score_actual': feature_dict[row['champion']][idx] if row['champion'] in feature_dict else base_score,
+                        'counter_list_debug': counter_list
+                    }
+                    debug_data.append(debug_row)
+
+        # Update feature_dict with batch results
+        for champion in batch_scores:
+            if champion not in feature_dict:
+                feature_dict[champion] = np.zeros(total_rows)
+            feature_dict[champion][batch_start:batch_end] = batch_scores[champion]
+
+        # Append this batch as a checkpoint shard instead of rewriting the whole CSV
+        if checkpoint is not None:
+            checkpoint.write_batch(
+                batch_start, batch_end,
+                np.column_stack([batch_scores[champion] for champion in all_champions])
+            )
+
+        if debug:
+            print(f"{debug} is countered by: {counter_map[debug]}")
+
+    return debug_data
+
 
-def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_meta=None, debug=None, consider_team_comp=True, test_mode=False):
+def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_meta=None, debug=None, consider_team_comp=True, test_mode=False, engine="vectorized",
+                             checkpoint_dir=None, use_checkpoint=True, workers=1, incremental=False, feature_store=None,
+                             score_dtype=np.float32, sparse_scores=False, save=True):
     """
     Create features for champion prediction using player data.
     Champion names will be used as column headers.
     Uses pd.concat to avoid DataFrame fragmentation.
+
+    engine="vectorized" scores all rows with compute_champion_scores;
+    engine="reference" runs the original row x champion loop (slow, kept for parity checks).
+
+    Completed batches are appended as Parquet shards under checkpoint_dir
+    (default util/data/feature_eng_checkpoint), so an interrupted run resumes from the
+    last completed batch. feature_eng_stats (Parquet plus CSV export) is written once at the end and the
+    checkpoint is removed. use_checkpoint=False disables the shards.
+
+    workers > 1 scores chunks of rows in a process pool (vectorized engine only), with
+    the same output as the serial run. On platforms without fork (Windows) the calling
+    script must be guarded by if __name__ == "__main__".
+
+    incremental=True (vectorized engine, no debug) reuses champion scores stored in the
+    FeatureStore (cache/feature_store.db by default) for rows already scored against the
+    same meta snapshot; only new or changed rows are scored, all rows after a meta change.
+
+    The champion scores are emitted as one C-contiguous (rows x champions) score_dtype block
+    (float32 by default) placed in the returned frame without copying the original columns.
+    sparse_scores=True stores them as pandas sparse columns (fill value 0) instead, which only
+    saves memory when most scores are zero (e.g. heavy team comp zeroing).
+
+    save=False returns the features without writing feature_eng_stats, for callers that
+    stream small batches of players and save the combined result themselves.
     """
     try:
         if merged_player_stats is None:
             print("Loading merged player stats...")
-            input_file = os.path.join("util", "data", "player_stats_merged.csv")
-            merged_player_stats = pd.read_csv(input_file, low_memory=False)
+            merged_player_stats = load_dataset('player_stats_merged', compact=True)
             
         #processing kda value
         merged_player_stats = process_kda_perfect(merged_player_stats)
@@ -25,24 +700,25 @@ def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_m
         
         if meta_stats is None:
             print("Loading meta stats...")
-            meta_file = os.path.join("util", "data", "meta_stats.csv")
-            meta_stats = pd.read_csv(meta_file, low_memory=False)
+            meta_stats = DraftPenaltyTable.from_csv()
+        else:
+            # Build the tier/counter lookups once per meta snapshot
+            meta_stats = DraftPenaltyTable.ensure(meta_stats)
 
         if weekly_meta is None:
             print("Loading weekly meta stats...")
-            weekly_file = os.path.join("util", "data", "weekly_meta_stats.csv")
-            weekly_meta = pd.read_csv(weekly_file, low_memory=False)
+            weekly_meta = MetaScoreTable.from_csv()
+        else:
+            # Build the meta lookup once, shared by every row and champion
+            weekly_meta = MetaScoreTable.ensure(weekly_meta)
         
         
         # Initialize variables
         debug_data = []
         original_columns = merged_player_stats.columns.tolist()
+        # Champion score columns of the reference engine
         feature_dict = {}
 
-        # Copy original columns
-        for col in merged_player_stats.columns:
-            feature_dict[col] = merged_player_stats[col].values.copy()
-
 
         # Initialize the champion converter
         converter = ChampionConverter()
@@ -51,268 +727,75 @@ def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_m
         
             
 
-        # Get low tier champions and counter information
-        tier_penalties = {3: 0.9, 4: 0.85, 5: 0.8}
-
-        # Create tier_map as a dictionary of lists
-        tier_map = {}
-        for _, row in meta_stats.iterrows():
-            champ = row['champion']
-            tier = row['tier']
-            if pd.notna(tier):
-                if champ in tier_map:
-                    tier_map[champ].append(tier)
-                else:
-                    tier_map[champ] = [tier]
-
-        counter_map = {}
-        for _, row in meta_stats.iterrows():
-            if pd.notna(row['counter1']):
-                champ = row['champion']
-                counters = [row['counter1'], row['counter2'], row['counter3']]
-                if champ in counter_map:
-                    counter_map[champ].extend([c for c in counters if pd.notna(c)])
-                else:
-                    counter_map[champ] = [c for c in counters if pd.notna(c)]
-
-        # Ensure unique counters and remove duplicates
-        for champ, counters in counter_map.items():
-            counter_map[champ] = list(set(counters))
-
         # Move 'champion' column to the first position
         cols = ['champion'] + [col for col in merged_player_stats if col != 'champion']
         merged_player_stats = merged_player_stats[cols]
 
-        # Define importance weights
-        weights = {
-            'recent': 0.3,    # Last 20 games
-            'weekly': 0.4,    # Last 7 days
-            'meta': 0.2,      # Only from weekly_stats
-            'season': 0.06,   # Current season
-            'mastery': 0.04   # All-time mastery
-        }
-
-        # Process rows in batches
-        batch_size = 100
-        total_rows = len(merged_player_stats)
-        
-        print(f"Total rows: {total_rows}")
-
-        for batch_start in range(0, total_rows, batch_size):
-            batch_end = min(batch_start + batch_size, total_rows)
-            batch_rows = merged_player_stats.iloc[batch_start:batch_end]
-            print(f"\nProcessing rows {batch_start} to {batch_end} ({batch_start/total_rows*100:.2f}% complete)")
-
-            # Initialize batch scores dictionary
-            batch_scores = {champion: np.zeros(len(batch_rows)) for champion in all_champions}
-            
-            # Process each row in this batch
-            for batch_idx, (idx, row) in enumerate(batch_rows.iterrows()):
-                # Process each champion for this row
-                for champion in all_champions:
-                    # Initialize scores for this champion and row
-                    champion_scores = {
-                        'recent_score': 0,
-                        'weekly_score': 0,
-                        'meta_score': 0,
-                        'season_score': 0,
-                        'mastery_score': 0
-                    }
-
-                    # Store debug info if needed
-                    base_score_before_penalty = 0
-                    counter_penalty = 0
-                    counter_debug = []
-
-                    # 1. Recent Performance
-                    for i in range(1, 4):
-                        if row.get(f'most_champ_{i}') == champion:
-                            wr = float(row[f'WR_{i}']) if pd.notna(row[f'WR_{i}']) else 0
-                            kda = float(row[f'KDA_{i}']) if pd.notna(row[f'KDA_{i}']) else 0
-                            wins = float(row[f'W_{i}']) if pd.notna(row[f'W_{i}']) else 0
-                            losses = float(row[f'L_{i}']) if pd.notna(row[f'L_{i}']) else 0
-                            games = wins + losses
-                            total_games = float(row['total_games']) if pd.notna(row['total_games']) else 20
-                            
-                            performance_quality = (
-                                (wr * 0.7) +
-                                (min(kda, 10) / 10 * 0.3)
-                            )
-                            
-                            games_factor = min(games / 5, 1.0)
-                            games_ratio = games / total_games
-                            
-                            if games >= 5:
-                                if performance_quality < 0.4:
-                                    performance_quality *= 0.8
-                                elif performance_quality > 0.7:
-                                    performance_quality *= 1.2
-                            
-                            champion_scores['recent_score'] = (
-                                performance_quality * (0.7 + (0.3 * games_factor))
-                            ) * (1 + games_ratio * 0.2)
-                            break  # Exit loop once found
-                    
-                    # 2. Weekly Performance
-                    for i in range(1, 4):
-                        if row.get(f'7d_champ_{i}') == champion:
-                            weekly_wins = float(row[f'7d_W_{i}']) if pd.notna(row[f'7d_W_{i}']) else 0
-                            weekly_losses = float(row[f'7d_L_{i}']) if pd.notna(row[f'7d_L_{i}']) else 0
-                            weekly_games = float(row[f'7d_total_{i}']) if pd.notna(row[f'7d_total_{i}']) else 0
-                            weekly_wr = float(row[f'7d_WR_{i}']) if pd.notna(row[f'7d_WR_{i}']) else 0
-                            profile_wr = float(row['win_rate']) if pd.notna(row['win_rate']) else 0.5
-                            
-                            if weekly_games > 0:
-                                wr_trend = (weekly_wr - profile_wr) / profile_wr if profile_wr > 0 else 0
-                                weekly_intensity = min(weekly_games / 10, 1.0)
-                                win_ratio = weekly_wins / weekly_games if weekly_games > 0 else 0
-                                
-                                weekly_performance = (
-                                    (weekly_wr * 0.4) +
-                                    (max(min(wr_trend, 1), -1) * 0.2) +
-                                    (weekly_intensity * 0.2) +
-                                    (win_ratio * 0.2)
-                                )
-                                
-                                if weekly_games >= 5:
-                                    if weekly_performance < 0.4:
-                                        weekly_performance *= 0.8
-                                    elif weekly_performance > 0.7:
-                                        weekly_performance *= 1.2
-                                
-                                champion_scores['weekly_score'] = weekly_performance * (
-                                    0.7 + (0.3 * min(weekly_games / 5, 1.0))
-                                )
-                                break  # Exit loop once found
-
-                    # 3. Meta Score
-                    if champion in weekly_meta['champion'].values:
-                        weekly_row = weekly_meta[weekly_meta['champion'] == champion].iloc[0]
-                        rank = weekly_row['rank']
-                        games = weekly_row['games']
-                        pick_rate = weekly_row['pick']
-                        ban_rate = weekly_row['ban']
-                        
-                        weight = (
-                            1 / rank * 0.5 +
-                            games / 100 * 0.3 +
-                            pick_rate * 0.1 -
-                            ban_rate * 0.1
-                        )
-                        
-                        champion_scores['meta_score'] = weight
-
-                    # 4. Season Performance
-                    for i in range(1, 8):
-                        if row.get(f'season_champ_{i}') == champion:
-                            wr = float(row[f'wr_ssn_{i}']) if pd.notna(row[f'wr_ssn_{i}']) else 0
-                            games = float(row[f'games_ssn_{i}']) if pd.notna(row[f'games_ssn_{i}']) else 0
-                            kda = float(row[f'kda_ssn_{i}']) if pd.notna(row[f'kda_ssn_{i}']) else 0
-                            
-                            champion_scores['season_score'] = (
-                                wr * 0.7 +
-                                (kda / 10) * 0.3 
-                            ) * (games / 100)
-                            break  # Exit loop once found
-                    
-                    # 5. Mastery Score
-                    for i in range(1, 17):
-                        if row.get(f'mastery_champ_{i}') == champion:
-                            mastery = float(row[f'm_lv_{i}']) if pd.notna(row[f'm_lv_{i}']) else 0            
-                            champion_scores['mastery_score'] = mastery / 7
-                            break  # Exit loop once found
-
-                    # Calculate base score for this champion and row
-                    base_score = (
-                        champion_scores['recent_score'] * weights['recent'] +
-                        champion_scores['weekly_score'] * weights['weekly'] +
-                        champion_scores['meta_score'] * weights['meta'] +
-                        champion_scores['season_score'] * weights['season'] +
-                        champion_scores['mastery_score'] * weights['mastery']
-                    )
-
-                    
-                    # Store the pre-penalty score for debugging
-                    base_score_before_penalty = base_score
-
-                    # Apply tier penalties
-                    if champion in tier_map:
-                        highest_tier = min(tier_map[champion])
-                        if highest_tier in tier_penalties:
-                            base_score *= tier_penalties[highest_tier]
-
-                    # Process team composition and counter penalties
-                    if consider_team_comp:
-                        # Check team champions
-                        for i in range(1, 5):
-                            team_col = f'team_champ{i}'
-                            if team_col in row and pd.notna(row[team_col]):
-                                if row[team_col] == champion:
-                                    base_score = 0
-                                    break
-                        
-                        # Only check opponents if base_score isn't already 0
-                        if base_score != 0:
-                            counter_penalty = 0
-                            counter_debug = []  # For debug information
-                            
-                            for i in range(1, 6):
-                                opp_col = f'opp_champ{i}'
-                                if opp_col in row and pd.notna(row[opp_col]):
-                                    opp_champ = row[opp_col]
-                                    if opp_champ == champion:
-                                        base_score = 0
-                                        break
-                                    if champion in counter_map and opp_champ in counter_map[champion]:
-                                        counter_penalty += 0.1
-                                        counter_debug.append(opp_champ)
-                            
-                            if counter_penalty > 0:
-                                base_score = base_score * (1 - counter_penalty)
-
-                    # Store the final score for this champion and row
-                    batch_scores[champion][batch_idx] = max(base_score, 0)
-
-                    # Collect debug data if this is the debug champion
-                    if debug == champion:
-                        counter_list = []
-                        for i in range(1, 6):
-                            opp_col = f'opp_champ{i}'
-                            if opp_col in row and pd.notna(row[opp_col]):
-                                if champion in counter_map and row[opp_col] in counter_map[champion]:
-                                    counter_list.append(row[opp_col])
-
-                        debug_row = {
-                            'champion': row['champion'],
-                            'recent_score': champion_scores['recent_score'],
-                            'weekly_score': champion_scores['weekly_score'],
-                            'meta_score': champion_scores['meta_score'],
-                            'base_score': base_score_before_penalty,
-                            'final_score': base_score,
-                            'counter_penalty': counter_penalty if consider_team_comp else 0,
-                            'final_score_actual': feature_dict[row['champion']][idx] if row['champion'] in feature_dict else base_score,
-                            'counter_list_debug': counter_list
-                        }
-                        debug_data.append(debug_row)
-
-            # Update feature_dict with batch results
-            for champion in batch_scores:
-                if champion not in feature_dict:
-                    feature_dict[champion] = np.zeros(total_rows)
-                feature_dict[champion][batch_start:batch_end] = batch_scores[champion]
-
-            # Save after each batch with timestamp
-            temp_df = pd.DataFrame({
-                **{col: feature_dict[col] for col in original_columns},  # Original columns first
-                **{champion: feature_dict[champion] for champion in all_champions}  # Then champion columns
-            })
-            
-            batch_save_file = os.path.join("util", "data", f"feature_eng_stats.csv")
-            temp_df.to_csv(batch_save_file, index=False)
-            print(f"Saved batch progress to {batch_save_file}")
+        if engine not in ("reference", "vectorized"):
+            raise ValueError(f"Unknown engine '{engine}', expected 'vectorized' or 'reference'")
+
+        # Rows already scored against this meta snapshot come from the feature store
+        store = None
+        rows_to_score = merged_player_stats
+        if incremental and engine == "vectorized" and not debug:
+            store = feature_store if feature_store is not None else FeatureStore()
+            snapshot = snapshot_key(
+                meta_stats.meta_stats, weekly_meta.weekly_meta, consider_team_comp,
+                list(merged_player_stats.columns), all_champions
+            )
+            row_keys = FeatureStore.row_keys(merged_player_stats)
+            found, stored_scores = store.lookup('champion_scores', row_keys, snapshot)
+            rows_to_score = merged_player_stats[~found]
+            print(f"Feature store: {found.sum()} rows cached, {len(rows_to_score)} rows to score")
+
+        # Smaller chunks when running in parallel so every worker gets several
+        chunk_size = 10000
+        if workers > 1:
+            chunk_size = int(min(chunk_size, max(1000, np.ceil(len(rows_to_score) / (workers * 4)))))
+
+        checkpoint = None
+        if use_checkpoint:
+            batch_size = 100 if engine == "reference" else chunk_size
+            fingerprint = snapshot_key(
+                rows_to_score, meta_stats.meta_stats, weekly_meta.weekly_meta,
+                engine, consider_team_comp, np.dtype(score_dtype).name
+            )
+            checkpoint = FeatureCheckpoint(
+                checkpoint_dir, fingerprint=fingerprint, batch_size=batch_size,
+                total_rows=len(rows_to_score), columns=all_champions
+            )
+
+        if engine == "reference":
+            debug_data = _reference_champion_scores(
+                merged_player_stats, meta_stats, weekly_meta, all_champions,
+                feature_dict, original_columns, debug=debug, consider_team_comp=consider_team_comp,
+                checkpoint=checkpoint
+            )
+        elif engine == "vectorized":
+            print(f"Total rows: {len(merged_player_stats)}")
+            scores, components = compute_champion_scores(
+                rows_to_score, meta_stats, weekly_meta,
+                champions=all_champions,
+                consider_team_comp=consider_team_comp,
+                chunk_size=chunk_size,
+                return_components=bool(debug),
+                checkpoint=checkpoint,
+                workers=workers,
+                dtype=score_dtype
+            )
+
+            if store is not None:
+                store.save('champion_scores', row_keys[~found], snapshot, scores,
+                           {champion: np.dtype(score_dtype).name for champion in all_champions})
+                if stored_scores is None:
+                    stored_scores = np.zeros((len(merged_player_stats), len(all_champions)), dtype=score_dtype)
+                else:
+                    stored_scores = stored_scores.astype(score_dtype, copy=False)
+                stored_scores[~found] = scores
+                scores = stored_scores
 
             if debug:
-                print(f"{debug} is countered by: {counter_map[debug]}")
+                debug_data = _vectorized_debug_rows(merged_player_stats, meta_stats, components, scores, all_champions, debug)
 
         # Process debug data if any
         if debug:
@@ -320,27 +803,36 @@ def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_m
             print("\nDebug Data:")
             print(debug_df)
 
-        # Create final DataFrame
-        champion_features = pd.DataFrame(feature_dict)
-
-        # Create the final DataFrame by combining original data with new features
-        features = pd.concat([
-            merged_player_stats[original_columns],  # Keep all original columns
-            champion_features[[col for col in champion_features.columns if col not in original_columns]]  # Only new champion columns
-        ], axis=1)
+        if engine == "reference":
+            scores = np.column_stack([
+                feature_dict.get(champion, np.zeros(len(merged_player_stats))) for champion in all_champions
+            ]).astype(score_dtype)
+
+        # Only champions that are not already original columns become new score columns
+        new_idx = [idx for idx, champion in enumerate(all_champions) if champion not in original_columns]
+        if len(new_idx) < len(all_champions):
+            scores = scores[:, new_idx]
+        score_block = np.ascontiguousarray(scores, dtype=score_dtype)
+        champion_features = pd.DataFrame(
+            score_block, index=merged_player_stats.index,
+            columns=[all_champions[idx] for idx in new_idx], copy=False
+        )
+        if sparse_scores:
+            champion_features = champion_features.astype(pd.SparseDtype(score_dtype, 0))
 
-        # Move the champion column to be the first column
-        if 'champion' in features.columns:
-            columns = ['champion'] + [col for col in features.columns if col != 'champion']
-            features = features[columns]
-        
-        # Save to CSV with current date in filename
-        output_file = os.path.join("util", "data", f"feature_eng_stats.csv")
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        features.to_csv(output_file, index=False)
+        # Original columns (champion already first) followed by the score block, without copying either
+        features = pd.concat([merged_player_stats, champion_features], axis=1, copy=False)
         
-        # Print confirmation message
-        print(f"Saved features to {output_file}")
+        if save:
+            # Save to Parquet plus the CSV export
+            output_file = save_dataset(features, 'feature_eng_stats')
+
+            # Print confirmation message
+            print(f"Saved features to {output_file}")
+
+        # The shards are only needed to resume an unfinished run
+        if checkpoint is not None:
+            checkpoint.clear()
             
         return features
 
@@ -350,8 +842,7 @@ def create_champion_features(merged_player_stats=None, meta_stats=None, weekly_m
 
 if __name__ == "__main__":
     try:
-        input_file = os.path.join("util", "data", f"player_stats_merged_2025-01-05.csv")              
-        merged_stats = pd.read_csv(input_file)
+        merged_stats = load_dataset('player_stats_merged', filename="player_stats_merged_2025-01-05")
 
         features = create_champion_features(
             merged_player_stats=merged_stats,
@@ -0,0 +1,297 @@
+import os
+import html
+import threading
+from functools import lru_cache
+from urllib.parse import quote
+import requests
+import lxml.html
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cssselect import HTMLTranslator
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+from helper import coerce_scraped
+from data_store import save_dataset
+from driver_pool import USER_AGENT
+from scrape_executor import RateLimitedError
+import Player_scrapper
+import Recent_match_scrapper
+import Meta_scrapper
+from Player_scrapper import BASE_URL, MASTERY_URL, extract_profile, get_mastery_data, build_player_frames
+from Recent_match_scrapper import extract_matches
+from Meta_scrapper import ROLES, TABLE_SELECTOR, extract_champion_table
+
+# Keep-alive connections per host and seconds to wait for a page
+HTTP_POOL_SIZE = 8
+HTTP_TIMEOUT = 20
+
+# Saved pages for offline runs, see FixtureClient. The committed pages are written from the
+# selectors the scrapers use, OpggClient(record_dir=FIXTURE_DIR) replaces them with live pages
+FIXTURE_DIR = os.path.join("util", "data", "fixtures")
+
+META_URL = Meta_scrapper.BASE_URL
+
+# Tags that start a new line in WebElement.text, tags whose text is never shown
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'tfoot', 'thead', 'tr', 'ul',
+])
+CELL_TAGS = frozenset(['td', 'th'])
+HIDDEN_TAGS = frozenset(['head', 'noscript', 'script', 'style', 'template', 'title'])
+
+# Attributes a server-rendered time stamp may carry the full match date in
+DATE_ATTRIBUTES = ['data-tooltip-content', 'data-tip', 'title', 'aria-label']
+
+
+@lru_cache(maxsize=256)
+def _css_to_xpath(selector):
+    # Descendants only, like WebElement.find_elements
+    return HTMLTranslator().css_to_xpath(selector, prefix='descendant::')
+
+
+def element_text(element):
+    """Text of an lxml element laid out like Selenium's WebElement.text (one line per block element)"""
+    lines, line = [], []
+
+    def newline():
+        text = ' '.join(''.join(line).split())
+        if text:
+            lines.append(text)
+        line.clear()
+
+    def walk(node):
+        if not isinstance(node.tag, str) or node.tag in HIDDEN_TAGS:
+            return  # Comments, scripts, styles
+        block = node.tag in BLOCK_TAGS
+        if block:
+            newline()
+        elif node.tag in CELL_TAGS:
+            line.append(' ')
+        if node.text:
+            line.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                line.append(child.tail)
+        if block:
+            newline()
+
+    walk(element)
+    newline()
+    return '\n'.join(lines)
+
+
+class HtmlElement:
+    """
+    Element of a static HTML page with the WebElement calls the scrapers use.
+
+    find_element(s) with By.CSS_SELECTOR, By.TAG_NAME or By.XPATH, .text and
+    get_attribute(), so the Selenium extraction functions run on fetched pages unchanged.
+    """
+
+    def __init__(self, element):
+        self.element = element
+
+    def find_elements(self, by, value):
+        if by == By.XPATH:
+            nodes = self.element.xpath(value)
+        elif by == By.TAG_NAME:
+            nodes = self.element.iterdescendants(value)
+        else:
+            nodes = self.element.xpath(_css_to_xpath(value))
+        return [HtmlElement(node) for node in nodes if isinstance(getattr(node, 'tag', None), str)]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matches {by} {value!r}")
+        return elements[0]
+
+    @property
+    def text(self):
+        return element_text(self.element)
+
+    @property
+    def tag_name(self):
+        return self.element.tag
+
+    def get_attribute(self, name):
+        if name == 'innerHTML':
+            inner = html.escape(self.element.text or '', quote=False)
+            return inner + ''.join(lxml.html.tostring(child, encoding='unicode') for child in self.element)
+        if name == 'outerHTML':
+            return lxml.html.tostring(self.element, encoding='unicode', with_tail=False)
+        if name in ('textContent', 'innerText'):
+            return self.element.text_content()
+        return self.element.get(name)
+
+
+def parse_html(page_html):
+    """Parse a fetched or saved page into an HtmlElement"""
+    return HtmlElement(lxml.html.fromstring(page_html))
+
+
+def static_match_date(page, element):
+    """Match date of a server-rendered time stamp, None when the page only has the relative time"""
+    for name in DATE_ATTRIBUTES:
+        value = element.get_attribute(name)
+        if value:
+            return value.strip()
+    return None
+
+
+def fixture_path(url, fixture_dir=None):
+    """File a page is saved under by OpggClient(record_dir=...) and read from by FixtureClient"""
+    return os.path.join(fixture_dir if fixture_dir is not None else FIXTURE_DIR, quote(url, safe='') + ".html")
+
+
+class OpggClient:
+    """
+    Keep-alive HTTP client for OP.GG pages.
+
+    One requests.Session with a pooled connection adapter is shared by every worker thread.
+    A 429 response raises RateLimitedError so the scrape executor backs off the host.
+    record_dir saves every fetched page as a fixture for FixtureClient.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, record_dir=None):
+        self.timeout = timeout
+        self.record_dir = record_dir
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'en-US,en;q=0.9'})
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code == 429:
+            raise RateLimitedError(f"429 Too Many Requests from {url}")
+        response.raise_for_status()
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            with open(fixture_path(url, self.record_dir), "w", encoding="utf-8") as f:
+                f.write(response.text)
+        return response.text
+
+    def page(self, url):
+        return parse_html(self.fetch(url))
+
+    def close(self):
+        self.session.close()
+
+
+class FixtureClient:
+    """Serves pages saved under fixture_dir instead of fetching them, for offline runs and checks"""
+
+    def __init__(self, fixture_dir=None):
+        self.fixture_dir = fixture_dir if fixture_dir is not None else FIXTURE_DIR
+
+    def fetch(self, url):
+        with open(fixture_path(url, self.fixture_dir), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def page(self, url):
+        return parse_html(self.fetch(url))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def default_client():
+    """OpggClient shared by the module functions, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpggClient()
+        return _client
+
+
+def get_player_stats(region, username, client=None, fallback=True):
+    """
+    get_player_stats over HTTP: returns (merged_df, dfs) like Player_scrapper.get_player_stats
+
+    Falls back to the Selenium scraper when the fetched profile has no stats box
+    (e.g. a page that only renders client side) or can not be parsed.
+    """
+    client = client if client is not None else default_client()
+    try:
+        player_data = extract_profile(client.page(BASE_URL.format(region=region, username=username)), timeout=0)
+        if player_data['recent_stats'] is not None:
+            mastery_page = client.page(MASTERY_URL.format(region=region, username=username))
+            player_data['mastery_data'] = get_mastery_data(mastery_page, timeout=0)
+            return build_player_frames(player_data, region, username)
+        print(f"No stats box in the fetched profile of {username}")
+    except RateLimitedError:
+        raise
+    except Exception as e:
+        print(f"Error fetching player stats of {username}: {e}")
+
+    if fallback:
+        print(f"Falling back to Selenium for {username}")
+        return Player_scrapper.get_player_stats(region, username)
+    return None, {}
+
+
+def get_matches_stats(region, username, client=None, fallback=True):
+    """
+    get_matches_stats over HTTP: returns the match DataFrame like Recent_match_scrapper.get_matches_stats
+
+    Match dates are only shown in a hover tooltip, so a page without dates in its
+    markup falls back to the Selenium scraper, as does a page without matches.
+    """
+    client = client if client is not None else default_client()
+    try:
+        page = client.page(BASE_URL.format(region=region, username=username))
+        matches_data = extract_matches(page, username, timeout=0, read_date=static_match_date)
+        if matches_data and any(match['date'] for match in matches_data):
+            # Scraped values arrive as strings, type them once here
+            return coerce_scraped(pd.DataFrame(matches_data), 'recent_matches')
+        print(f"No dated matches in the fetched profile of {username}")
+    except RateLimitedError:
+        raise
+    except Exception as e:
+        print(f"Error fetching matches of {username}: {e}")
+
+    if fallback:
+        print(f"Falling back to Selenium for {username}")
+        return Recent_match_scrapper.get_matches_stats(region, username)
+    return pd.DataFrame()
+
+
+def get_meta_stats(client=None, fallback=True):
+    """get_meta_stats over HTTP: scrapes, saves and returns meta_stats like Meta_scrapper.get_meta_stats"""
+    client = client if client is not None else default_client()
+    all_roles_data = []
+    missing_roles = []
+    for role in ROLES:
+        try:
+            table = client.page(META_URL.format(role=role)).find_element(By.CSS_SELECTOR, TABLE_SELECTOR)
+            role_data = extract_champion_table(table, role)
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            print(f"Error fetching table data for {role}: {e}")
+            role_data = []
+        if not role_data:
+            missing_roles.append(role)
+        all_roles_data.extend(role_data)
+
+    if missing_roles:
+        if fallback:
+            print(f"No table fetched for {missing_roles}, falling back to Selenium")
+            return Meta_scrapper.get_meta_stats()
+        if not all_roles_data:
+            print("No data was collected from any role")
+            return pd.DataFrame()
+
+    df = coerce_scraped(pd.DataFrame(all_roles_data), 'meta_stats')
+
+    # Save data (Parquet plus CSV export)
+    filepath = save_dataset(df, 'meta_stats')
+    print(f"Saved meta stats to {filepath}")
+    return df
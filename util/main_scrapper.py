@@ -1,9 +1,8 @@
-from Recent_match_scrapper import get_multiple_matches_stats
 from Meta_scrapper import get_meta_stats
 from Leaderboard_scrapper import scrape_leaderboards
 from connection_check import check_connection
 from helper import merge_stats, filter_leaderboard, get_player_list
-from Player_scrapper import get_multiple_player_stats
+from Player_scrapper import get_multiple_player_page_stats
 from feature_eng import create_champion_features
 from Weekly_meta_scrapper import get_weekly_meta
 
@@ -26,11 +25,10 @@ filtered_lb = filter_leaderboard(                 #save to lb_filtered.csv
 #player_list = get_player_list(filtered_lb)             
 #player_list = get_player_list()               # without arg, it will read from lb_filtered.csv
 
-player_stats = get_multiple_player_stats(player_list)    #save to player_stats.csv
-recent_stats = get_multiple_matches_stats(player_list)   #save to recent_stats.csv
+player_stats, recent_stats = get_multiple_player_page_stats(player_list)    #one profile page load per player, save to player_stats.csv and recent_matches.csv
 
 
 merged_stats = merge_stats(recent_stats, player_stats)          #save to player_stats_merged.csv
 
 #feature engineering
-training_features = create_champion_features(merged_stats, meta_stats, weekly_meta_stats, consider_team_comp=True)   #save to feature_eng_stats.csv
\ No newline at end of file
+training_features = create_champion_features(merged_stats, meta_stats, weekly_meta_stats, consider_team_comp=True, incremental=True)   #save to feature_eng_stats.csv, reuses scores in cache/feature_store.db
\ No newline at end of file
@@ -0,0 +1,156 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Browser workers scraping players at the same time
+WORKERS = 4
+
+# Players per second started against one region and against one host. The old
+# sequential loop slept 2 seconds between players, REGION_RATE keeps that pace per region.
+REGION_RATE = 0.5
+HOST_RATE = 2.0
+DEFAULT_HOST = "www.op.gg"
+
+# Adaptive backoff: a 429 or empty page halves the bucket rate (down to MIN_RATE) and
+# pauses it for BACKOFF_SECONDS, each successful scrape raises the rate back by RECOVERY
+MIN_RATE = 0.05
+BACKOFF_SECONDS = 10.0
+RECOVERY = 1.25
+
+
+class RateLimitedError(Exception):
+    """Raised by a scrape that got an HTTP 429 response"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    reserve() always takes a token and returns how long the caller has to wait before using
+    it, so concurrent workers queue up in order instead of polling.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def backoff(self, seconds=BACKOFF_SECONDS):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.rate / 2, MIN_RATE)
+            self.tokens = min(self.tokens, 0.0)
+            self.paused_until = max(self.paused_until, now + seconds)
+
+    def recover(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.rate * RECOVERY, self.base_rate)
+
+
+class RateLimiter:
+    """
+    Token buckets per region and per host, created on first use.
+
+    acquire() blocks until both the region and the host bucket allow the next request.
+    An empty page backs off only its region, a 429 backs off the region and the host.
+    """
+
+    def __init__(self, region_rate=REGION_RATE, host_rate=HOST_RATE, burst=1):
+        self.region_rate = region_rate
+        self.host_rate = host_rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, kind, key):
+        with self._lock:
+            bucket = self._buckets.get((kind, key))
+            if bucket is None:
+                rate = self.region_rate if kind == 'region' else self.host_rate
+                bucket = self._buckets[(kind, key)] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def acquire(self, region, host=DEFAULT_HOST):
+        wait = max(self._bucket('region', region).reserve(), self._bucket('host', host).reserve())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def backoff(self, region, host=DEFAULT_HOST, rate_limited=False):
+        self._bucket('region', region).backoff()
+        if rate_limited:
+            self._bucket('host', host).backoff()
+
+    def recover(self, region, host=DEFAULT_HOST):
+        self._bucket('region', region).recover()
+        self._bucket('host', host).recover()
+
+
+def is_empty(result):
+    """True for the None / empty DataFrame the scrapers return when a page had no data"""
+    if isinstance(result, tuple):
+        return all(is_empty(part) for part in result)
+    return result is None or getattr(result, 'empty', False)
+
+
+class ScrapeExecutor:
+    """
+    Runs scrape(region, username) for many players on a fixed number of worker threads.
+
+    Every attempt waits for the rate limiter first. An empty result or RateLimitedError backs
+    the limiter off and the player is retried up to `retries` times. map() yields
+    (index, result, error) as players complete, so callers can checkpoint while scraping.
+    """
+
+    def __init__(self, scrape, workers=WORKERS, limiter=None, retries=1, host=DEFAULT_HOST):
+        self.scrape = scrape
+        self.workers = workers
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.retries = retries
+        self.host = host
+
+    def run(self, region, username):
+        """Scrape one player under the rate limiter, with backoff and retries"""
+        result = None
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(region, self.host)
+            try:
+                result = self.scrape(region, username)
+            except RateLimitedError as e:
+                print(f"Rate limited on {username} ({region}), backing off: {e}")
+                self.limiter.backoff(region, self.host, rate_limited=True)
+                result = None
+                continue
+            if not is_empty(result):
+                self.limiter.recover(region, self.host)
+                return result
+            self.limiter.backoff(region, self.host)
+        return result
+
+    def map(self, tasks):
+        """Scrape every (region, username) task, yields (index, result, error) in completion order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.run, region, username): i for i, (region, username) in enumerate(tasks)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e